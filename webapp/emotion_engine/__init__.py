@@ -0,0 +1,63 @@
+"""
+Headless emotion recognition engine.
+Face detection, preprocessing and batched classification, usable without the Streamlit UI.
+"""
+
+from .batching import MicroBatcher
+from .cascade import CascadePredictor, load_cascade
+from .cache import PredictionCache, artifact_version, content_key
+from .change import ChangeGate
+from .config import BACKEND, BASE_DIR, EMOTION_LABELS, IMG_SIZE, MODEL_CANDIDATES, find_model_path
+from .detection import FaceDetector
+from .early_exit import EarlyExitPredictor
+from .backends import available_backends, load_predictor, register_backend
+from .engine import EmotionEngine, FacePrediction, decode_prediction, load_keras_model
+from .metadata import load_metadata, save_metadata
+from .live import LiveAnalyzer, LiveFace, main_face
+from .pipeline import LivePipeline
+from .scheduler import AdaptiveScheduler
+from .preprocessing import crop_faces, normalize_batch, preprocess_image, resize_batch, to_gray, to_rgb
+from .serving import SERVING_MODE, KerasPredictor
+from .tracking import FaceTracker, Track
+
+__all__ = [
+    "BACKEND",
+    "BASE_DIR",
+    "EMOTION_LABELS",
+    "IMG_SIZE",
+    "MODEL_CANDIDATES",
+    "find_model_path",
+    "load_metadata",
+    "save_metadata",
+    "FaceDetector",
+    "FaceTracker",
+    "Track",
+    "EmotionEngine",
+    "FacePrediction",
+    "decode_prediction",
+    "load_keras_model",
+    "LiveAnalyzer",
+    "LiveFace",
+    "main_face",
+    "LivePipeline",
+    "AdaptiveScheduler",
+    "ChangeGate",
+    "PredictionCache",
+    "MicroBatcher",
+    "CascadePredictor",
+    "load_cascade",
+    "EarlyExitPredictor",
+    "artifact_version",
+    "content_key",
+    "available_backends",
+    "load_predictor",
+    "register_backend",
+    "KerasPredictor",
+    "SERVING_MODE",
+    "crop_faces",
+    "normalize_batch",
+    "preprocess_image",
+    "resize_batch",
+    "to_gray",
+    "to_rgb",
+]
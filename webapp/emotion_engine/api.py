@@ -0,0 +1,412 @@
+"""
+Standalone HTTP inference API (asyncio, standard library only).
+
+Exposes the same model loading, detection and batched classification as the Streamlit
+page to other services:
+
+    POST /v1/predict          raw JPEG/PNG body → faces found in that image
+    POST /v1/predict/batch    multipart/form-data, one image per part → one result per part
+    GET  /healthz             200 while the process is serving
+    GET  /readyz              200 once the model is loaded and warmed up, 503 before
+
+Each face is returned as `{"box": [x, y, w, h], "emotion", "confidence", "probabilities"}`.
+The event loop only parses HTTP. Decoding, detection and inference run in a thread pool,
+behind the shared micro-batcher (see batching.py), so concurrent requests share forward
+passes. The engine's FaceDetector keeps one Haar cascade per pool thread, because
+detectMultiScale is not thread-safe. At most `--max-concurrency` requests are processed at once and `--max-queue`
+more may wait. Beyond that the server answers 503 with Retry-After. Every response
+carries a `Server-Timing` header (queue, decode, detect, infer, total) and `X-Process-Time-Ms`.
+
+Usage (from the webapp directory):
+    python -m emotion_engine.api --host 127.0.0.1 --port 8000
+    curl --data-binary @face.jpg -H "Content-Type: image/jpeg" localhost:8000/v1/predict
+    curl -F a=@one.jpg -F b=@two.png localhost:8000/v1/predict/batch
+"""
+
+import argparse
+import asyncio
+import email.parser
+import email.policy
+import functools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http import HTTPStatus
+
+import cv2
+import numpy as np
+
+from .config import BACKEND, EMOTION_LABELS
+from .preprocessing import crop_faces
+
+logger = logging.getLogger(__name__)
+
+API_HOST = os.environ.get("EMOTION_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("EMOTION_API_PORT", "8000"))
+# requests processed at once (detection of one overlaps inference of another, and concurrent
+# requests share micro-batches) / waiting on top of those before the server sheds load
+API_MAX_CONCURRENCY = int(os.environ.get("EMOTION_API_MAX_CONCURRENCY", str(max(4, os.cpu_count() or 1))))
+API_MAX_QUEUE = int(os.environ.get("EMOTION_API_MAX_QUEUE", "64"))
+API_MAX_BODY_MB = float(os.environ.get("EMOTION_API_MAX_BODY_MB", "20"))
+API_MAX_BATCH_IMAGES = int(os.environ.get("EMOTION_API_MAX_BATCH_IMAGES", "32"))
+
+KEEP_ALIVE_TIMEOUT = 15.0
+# headers and body must arrive within this after the request line, so slow clients cannot hold a connection
+REQUEST_READ_TIMEOUT = 30.0
+MAX_HEADERS = 100
+IMAGE_TYPES = ("image/jpeg", "image/jpg", "image/png", "application/octet-stream")
+
+
+class HttpError(Exception):
+    def __init__(self, status: HTTPStatus, message: str = None, headers: dict = None):
+        super().__init__(message or status.phrase)
+        self.status = status
+        self.message = message or status.phrase
+        self.headers = headers or {}
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    version: str
+    headers: dict
+    body: bytes = b""
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("connection", "").lower()
+        return connection != "close" if self.version == "HTTP/1.1" else connection == "keep-alive"
+
+
+@dataclass
+class Timings:
+    """Per-request phase durations in milliseconds, reported in Server-Timing."""
+
+    phases: dict = field(default_factory=dict)
+
+    def add(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds * 1000.0
+
+    def header(self) -> str:
+        return ", ".join(f"{name};dur={ms:.2f}" for name, ms in self.phases.items())
+
+
+# ─────────────────────────────────────────────────────────────
+# CPU-bound work (runs in the thread pool)
+# ─────────────────────────────────────────────────────────────
+def decode_image(data: bytes) -> np.ndarray:
+    """JPEG/PNG bytes → RGB array; HttpError 400 when empty, 415 when the bytes are not an image."""
+    if not data:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Empty image")
+    frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise HttpError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "Body is not a decodable JPEG/PNG image")
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+
+def analyze_images(engine, images: list, timings: Timings) -> list:
+    """Decode, detect and classify every image; all faces share one classification batch.
+
+    Runs on up to `max_concurrency` pool threads at once; `engine.detect` uses that thread's cascade.
+    """
+    start = time.perf_counter()
+    frames = [decode_image(data) for data in images]
+    decoded = time.perf_counter()
+    timings.add("decode", decoded - start)
+    boxes = [[tuple(int(v) for v in box) for box in engine.detect(frame)] for frame in frames]
+    detected = time.perf_counter()
+    timings.add("detect", detected - decoded)
+    crops = [crop for frame, frame_boxes in zip(frames, boxes) for crop in crop_faces(frame, frame_boxes)]
+    probs = engine.predict_crops(crops) if crops else np.empty((0, len(EMOTION_LABELS)), dtype=np.float32)
+    timings.add("infer", time.perf_counter() - detected)
+
+    results, offset = [], 0
+    for frame, frame_boxes in zip(frames, boxes):
+        faces = []
+        for box, p in zip(frame_boxes, probs[offset : offset + len(frame_boxes)]):
+            idx = int(np.argmax(p))
+            faces.append({
+                "box": list(box),
+                "emotion": engine.labels[idx],
+                "confidence": float(p[idx]),
+                "probabilities": {label: float(v) for label, v in zip(engine.labels, p)},
+            })
+        offset += len(frame_boxes)
+        results.append({"width": frame.shape[1], "height": frame.shape[0], "faces": faces})
+    return results
+
+
+def multipart_images(content_type: str, body: bytes) -> list:
+    """Bytes of every file part (a filename or an image/* type) of a multipart/form-data body, in order.
+
+    Plain form fields are skipped; HttpError 400 when a file part is empty.
+    """
+    parser = email.parser.BytesParser(policy=email.policy.HTTP)
+    message = parser.parsebytes(b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body)
+    if not message.is_multipart():
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Expected a multipart/form-data body")
+    images = []
+    for part in message.iter_parts():
+        if part.get_filename() is None and part.get_content_maintype() != "image":
+            continue
+        data = part.get_payload(decode=True)
+        if not data:
+            name = part.get_param("name", header="content-disposition")
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"Empty file part {name!r}")
+        images.append(data)
+    return images
+
+
+def build_engine(path: str = None, backend: str = BACKEND):
+    """The web app's serving stack: predictor (or cascade) → micro-batcher → EmotionEngine."""
+    from .backends import default_artifact, load_predictor
+    from .batching import MICROBATCH, MicroBatcher
+    from .cascade import CASCADE_MODEL, load_cascade
+    from .detection import FaceDetector
+    from .engine import EmotionEngine
+
+    path = path or default_artifact(backend)
+    predictor = load_cascade(path, CASCADE_MODEL, backend) if CASCADE_MODEL else load_predictor(backend, path)
+    if MICROBATCH:
+        predictor = MicroBatcher(predictor)
+    return EmotionEngine(predictor, detector=FaceDetector())
+
+
+# ─────────────────────────────────────────────────────────────
+# HTTP server
+# ─────────────────────────────────────────────────────────────
+class InferenceServer:
+    """Minimal HTTP/1.1 server with keep-alive, admission control and a thread pool for inference."""
+
+    def __init__(self, model_path: str = None, backend: str = BACKEND, max_concurrency: int = API_MAX_CONCURRENCY,
+                 max_queue: int = API_MAX_QUEUE, max_body_mb: float = API_MAX_BODY_MB,
+                 max_batch_images: int = API_MAX_BATCH_IMAGES, engine=None, engine_factory=None):
+        self.model_path = model_path
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_body = int(max_body_mb * 1024 * 1024)
+        self.max_batch_images = max_batch_images
+        self.engine = engine
+        # builds the engine in the thread pool; the pre-fork workers pass one that uses shared weights
+        self.engine_factory = engine_factory or functools.partial(build_engine, model_path, backend)
+        self.load_error = None
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="emotion-api")
+        self._slots = None
+        self._admitted = 0
+        self.started_at = time.time()
+
+    # ── Lifecycle ─────────────────────────────────────────────
+    async def load(self):
+        """Load and warm up the model off the event loop; /readyz turns 200 afterwards."""
+        if self.engine is not None:
+            return
+        try:
+            self.engine = await asyncio.get_running_loop().run_in_executor(self._executor, self.engine_factory)
+            logger.info("Model ready (backend %s, input %d)", self.backend, self.engine.img_size)
+        except Exception as e:
+            self.load_error = str(e)
+            logger.exception("Model loading failed")
+
+    async def serve(self, host: str = API_HOST, port: int = API_PORT, sock=None):
+        """Serve until cancelled, on `host:port` or on an already listening `sock`."""
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        if sock is not None:
+            server = await asyncio.start_server(self.handle_connection, sock=sock)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+        logger.info("Listening on %s", ", ".join(str(s.getsockname()) for s in server.sockets))
+        loading = asyncio.create_task(self.load())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            loading.cancel()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ── Connection handling ───────────────────────────────────
+    async def read_request(self, reader: asyncio.StreamReader):
+        """Parse one request; None when the client closed the connection between requests."""
+        try:
+            line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return None
+        except ValueError:  # longer than the stream limit (LimitOverrunError surfaces as ValueError)
+            raise HttpError(HTTPStatus.REQUEST_URI_TOO_LONG)
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+        if version not in ("HTTP/1.0", "HTTP/1.1"):
+            raise HttpError(HTTPStatus.HTTP_VERSION_NOT_SUPPORTED)
+        try:
+            headers, body = await asyncio.wait_for(self._read_headers_and_body(reader), REQUEST_READ_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HttpError(HTTPStatus.REQUEST_TIMEOUT, f"Request not received within {REQUEST_READ_TIMEOUT:g}s")
+        return Request(method.upper(), target.split("?", 1)[0], version, headers, body)
+
+    async def _read_headers_and_body(self, reader: asyncio.StreamReader):
+        headers = {}
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HttpError(HTTPStatus.LENGTH_REQUIRED, "Chunked bodies are not supported; send Content-Length")
+        raw_length = headers.get("content-length", "0")
+        # digits only: int() would also accept "-5", "+5" and "1_0"
+        if not (raw_length.isascii() and raw_length.isdigit()):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        length = int(raw_length)
+        if length > self.max_body:
+            raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Body exceeds {self.max_body} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return headers, body
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except HttpError as e:
+                    await self.respond(writer, e.status, {"error": e.message}, {**e.headers, "Connection": "close"})
+                    break
+                if request is None:
+                    break
+                start = time.perf_counter()
+                try:
+                    status, payload, headers = await self.dispatch(request)
+                except HttpError as e:
+                    status, payload, headers = e.status, {"error": e.message}, e.headers
+                except Exception as e:
+                    logger.exception("Request %s %s failed", request.method, request.path)
+                    status, payload, headers = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}, {}
+                headers["X-Process-Time-Ms"] = f"{(time.perf_counter() - start) * 1000.0:.2f}"
+                if not request.keep_alive:
+                    headers["Connection"] = "close"
+                await self.respond(writer, status, payload, headers)
+                if not request.keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer: asyncio.StreamWriter, status: HTTPStatus, payload: dict, headers: dict):
+        body = json.dumps(payload).encode("utf-8")
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}", "Content-Type: application/json",
+                 f"Content-Length: {len(body)}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    # ── Routing ───────────────────────────────────────────────
+    async def dispatch(self, request: Request):
+        routes = {
+            "/healthz": ("GET", self.health),
+            "/readyz": ("GET", self.ready),
+            "/v1/predict": ("POST", self.predict),
+            "/v1/predict/batch": ("POST", self.predict_batch),
+        }
+        if request.path not in routes:
+            raise HttpError(HTTPStatus.NOT_FOUND)
+        method, handler = routes[request.path]
+        if request.method != method:
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, headers={"Allow": method})
+        return await handler(request)
+
+    async def health(self, request: Request):
+        return HTTPStatus.OK, {"status": "ok", "uptime_s": round(time.time() - self.started_at, 1)}, {}
+
+    async def ready(self, request: Request):
+        if self.engine is None:
+            status = "failed" if self.load_error else "loading"
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"status": status, "error": self.load_error}, {"Retry-After": "5"}
+        return HTTPStatus.OK, {
+            "status": "ready",
+            "backend": self.backend,
+            "img_size": self.engine.img_size,
+            "labels": list(self.engine.labels),
+            "in_flight": self._admitted,
+            "pid": os.getpid(),
+        }, {}
+
+    async def predict(self, request: Request):
+        content_type = request.headers.get("content-type", "application/octet-stream").split(";")[0].strip().lower()
+        if content_type not in IMAGE_TYPES:
+            raise HttpError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "Send a raw image/jpeg or image/png body")
+        if not request.body:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Empty body")
+        results, headers = await self.run([request.body])
+        return HTTPStatus.OK, results[0], headers
+
+    async def predict_batch(self, request: Request):
+        content_type = request.headers.get("content-type", "")
+        if not content_type.lower().startswith("multipart/form-data"):
+            raise HttpError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "Send multipart/form-data with one image per part")
+        images = multipart_images(content_type, request.body)
+        if not images:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "No images in the request")
+        if len(images) > self.max_batch_images:
+            raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"At most {self.max_batch_images} images per batch")
+        results, headers = await self.run(images)
+        return HTTPStatus.OK, {"images": results}, headers
+
+    async def run(self, images: list):
+        """Admit the request, then analyze `images` in the thread pool; returns (results, timing headers)."""
+        if self.engine is None:
+            raise HttpError(HTTPStatus.SERVICE_UNAVAILABLE, "Model is not ready", {"Retry-After": "5"})
+        if self._admitted >= self.max_concurrency + self.max_queue:
+            raise HttpError(HTTPStatus.SERVICE_UNAVAILABLE, "Server is at capacity", {"Retry-After": "1"})
+        timings = Timings()
+        self._admitted += 1
+        try:
+            queued = time.perf_counter()
+            async with self._slots:
+                timings.add("queue", time.perf_counter() - queued)
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, analyze_images, self.engine, images, timings
+                )
+                timings.add("total", time.perf_counter() - queued)
+        finally:
+            self._admitted -= 1
+        return results, {"Server-Timing": timings.header()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--model", default=None, help="Model path (default: auto-discovered)")
+    parser.add_argument("--backend", default=BACKEND)
+    parser.add_argument("--max-concurrency", type=int, default=API_MAX_CONCURRENCY,
+                        help="Requests processed at once")
+    parser.add_argument("--max-queue", type=int, default=API_MAX_QUEUE,
+                        help="Requests allowed to wait before the server answers 503")
+    parser.add_argument("--max-body-mb", type=float, default=API_MAX_BODY_MB)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    server = InferenceServer(args.model, args.backend, args.max_concurrency, args.max_queue, args.max_body_mb)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
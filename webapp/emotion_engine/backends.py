@@ -0,0 +1,109 @@
+"""
+Inference backend registry.
+
+Every backend is a loader `(path, img_size) -> predictor` where the predictor exposes
+`predict_batch(uint8 (N, H, W, 3) array) -> (N, classes) probabilities`. The active
+backend is chosen with the EMOTION_BACKEND environment variable; new backends register
+themselves with `@register_backend("name")`. `img_size` is None unless the caller
+overrides it or the artifact's metadata sidecar declares one; loaders then take it
+from the artifact's input shape.
+
+Without an explicit path or EMOTION_MODEL_PATH, a backend that declares `artifacts`
+(file suffixes) loads the first of them that exists next to the discovered Keras model.
+"""
+
+import os
+
+from .config import BACKEND, IMG_SIZE, find_model_path
+from .metadata import load_metadata, model_input_size
+
+BACKENDS = {}
+ARTIFACTS = {}
+
+
+def register_backend(name: str, artifacts: tuple = ()):
+    """Decorator registering a predictor loader under `name`.
+
+    `artifacts` are the suffixes replacing `.keras` in the default model path, in order
+    of preference; without them the backend loads the Keras model itself.
+    """
+
+    def decorator(loader):
+        BACKENDS[name] = loader
+        if artifacts:
+            ARTIFACTS[name] = tuple(artifacts)
+        return loader
+
+    return decorator
+
+
+def available_backends() -> list:
+    return sorted(BACKENDS)
+
+
+def artifact_candidates(backend: str = BACKEND) -> list:
+    """Paths `backend` loads by default, in order of preference."""
+    if os.environ.get("EMOTION_MODEL_PATH") or backend not in ARTIFACTS:
+        return [find_model_path()]
+    stem = os.path.splitext(find_model_path())[0]
+    return [stem + suffix for suffix in ARTIFACTS[backend]]
+
+
+def default_artifact(backend: str = BACKEND) -> str:
+    """The first existing default artifact of `backend`."""
+    candidates = artifact_candidates(backend)
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            return candidate
+    if os.environ.get("EMOTION_MODEL_PATH") or backend not in ARTIFACTS:
+        return candidates[0]  # the loader reports the missing file
+    raise FileNotFoundError(
+        f"No model for the {backend!r} backend next to {find_model_path()} (looked for "
+        f"{', '.join(os.path.basename(c) for c in candidates)}). Export one first or set EMOTION_MODEL_PATH."
+    )
+
+
+def load_predictor(backend: str = BACKEND, path: str = None, img_size: int = None, warmup: bool = True):
+    """Load the model artifact for `backend` and return a (warmed-up) predictor.
+
+    The input size comes from the artifact unless `img_size` is given; the predictor's
+    `img_size` attribute is what callers should resize faces to.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}; available: {', '.join(available_backends())}")
+    path = path or default_artifact(backend)
+    predictor = BACKENDS[backend](path, img_size or load_metadata(path).get("img_size"))
+    return predictor.warmup() if warmup else predictor
+
+
+# ─────────────────────────────────────────────────────────────
+# Built-in backends (heavy runtimes are imported lazily)
+# ─────────────────────────────────────────────────────────────
+@register_backend("keras")
+def _load_keras(path: str, img_size: int):
+    from .engine import load_keras_model
+    from .serving import KerasPredictor
+
+    model = load_keras_model(path)
+    return KerasPredictor(model, img_size or model_input_size(model, IMG_SIZE))
+
+
+@register_backend("tflite", artifacts=(".tflite", "_float16.tflite", "_int8.tflite"))
+def _load_tflite(path: str, img_size: int):
+    from .tflite import TFLitePredictor
+
+    return TFLitePredictor(path, img_size=img_size)
+
+
+@register_backend("onnxruntime", artifacts=(".onnx",))
+def _load_onnxruntime(path: str, img_size: int):
+    from .onnxrt import OnnxRuntimePredictor
+
+    return OnnxRuntimePredictor(path, img_size=img_size)
+
+
+@register_backend("early_exit")
+def _load_early_exit(path: str, img_size: int):
+    from .early_exit import load_early_exit
+
+    return load_early_exit(path, img_size)
@@ -0,0 +1,275 @@
+"""
+Offline batch classification of image directories.
+
+Walks a directory tree (laid out like model/test/<class>/ or any flat folder),
+decodes images and detects faces on a process pool with the same detector and
+preprocessing as the web app, classifies face crops in batches in the parent
+process, and streams one row per face to CSV or JSONL.
+
+Memory stays bounded: only `workers * 4` images are in flight and rows are written
+as each batch completes, in input order. A checkpoint next to the output records how
+many images (in sorted order) are written and the output size at that image boundary;
+`--resume` truncates anything written after it and continues from there.
+
+Usage (from the webapp directory):
+    python -m emotion_engine.batch ../model/test --output test_predictions.csv --faces auto
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .backends import load_predictor
+from .config import BACKEND, EMOTION_LABELS, IMG_SIZE
+from .datasets import IMAGE_EXTENSIONS
+from .engine import decode_prediction
+
+FACE_MODES = ("detect", "whole", "auto")
+
+# ─────────────────────────────────────────────────────────────
+# Input discovery
+# ─────────────────────────────────────────────────────────────
+def iter_image_paths(root: str):
+    """Yield image paths under `root` in a stable (sorted) order."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for fname in sorted(filenames):
+            if fname.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(dirpath, fname)
+
+
+def label_from_path(path: str):
+    """Class index when the parent folder is named 0..6 (model/test layout), else None."""
+    parent = os.path.basename(os.path.dirname(path))
+    if parent.isdigit() and int(parent) < len(EMOTION_LABELS):
+        return int(parent)
+    return None
+
+
+# ─────────────────────────────────────────────────────────────
+# Worker side: decode + detect + crop/resize
+# ─────────────────────────────────────────────────────────────
+_detector = None
+
+
+def _init_worker():
+    global _detector
+    import cv2
+
+    from .detection import FaceDetector
+
+    cv2.setNumThreads(1)  # parallelism comes from the pool
+    _detector = FaceDetector()
+
+
+def prepare_image(path: str, faces_mode: str = "detect", img_size: int = IMG_SIZE):
+    """Decode an image and return (path, boxes, uint8 crops, error)."""
+    from .datasets import load_image_rgb
+    from .preprocessing import crop_faces, resize_batch
+
+    try:
+        rgb = load_image_rgb(path)
+    except Exception as e:
+        return path, [], None, str(e)
+    boxes = []
+    if faces_mode in ("detect", "auto"):
+        boxes = [tuple(int(v) for v in b) for b in _detector.detect_rgb(rgb)]
+    if not boxes and faces_mode in ("whole", "auto"):
+        boxes = [(0, 0, rgb.shape[1], rgb.shape[0])]
+    crops = resize_batch(crop_faces(rgb, boxes), img_size) if boxes else None
+    return path, boxes, crops, None
+
+
+# ─────────────────────────────────────────────────────────────
+# Output writers
+# ─────────────────────────────────────────────────────────────
+class RowWriter:
+    """Append rows to CSV or JSONL (chosen by file extension) and report the flushed size."""
+
+    def __init__(self, path: str, append: bool):
+        self.path = path
+        self.jsonl = path.endswith((".jsonl", ".json"))
+        self.file = open(path, "a" if append else "w", newline="", encoding="utf-8")
+        self._csv = None
+        if not self.jsonl:
+            self._csv = csv.writer(self.file)
+            if not append or self.file.tell() == 0:
+                self._csv.writerow(
+                    ["path", "label", "face", "x", "y", "w", "h", "emotion", "confidence", "error"]
+                    + [f"p_{label}" for label in EMOTION_LABELS]
+                )
+
+    def write(self, row: dict):
+        if self.jsonl:
+            self.file.write(json.dumps(row) + "\n")
+            return
+        probs = row.get("probabilities") or {}
+        box = row.get("box") or (None, None, None, None)
+        self._csv.writerow(
+            [row["path"], row["label"], row["face"], *box, row["emotion"], row["confidence"], row["error"]]
+            + [probs.get(label) for label in EMOTION_LABELS]
+        )
+
+    def flush(self) -> int:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def load_checkpoint(path: str):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_checkpoint(path: str, done: int, output_bytes: int):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"done": done, "output_bytes": output_bytes}, f)
+    os.replace(tmp, path)
+
+
+# ─────────────────────────────────────────────────────────────
+# Driver
+# ─────────────────────────────────────────────────────────────
+class BatchClassifier:
+    """Collect face crops from prepared images and classify them in fixed-size batches.
+
+    Rows are written in input order, one image at a time: an image's rows (including the
+    error/no-face row) wait until every earlier image is complete. The output therefore
+    holds exactly the first `images_done` images whenever it is flushed.
+    """
+
+    def __init__(self, predictor, writer: RowWriter, batch_size: int = 64):
+        self.predictor = predictor
+        self.writer = writer
+        self.batch_size = batch_size
+        self._pending = []  # (image entry, row, crop) awaiting a forward pass
+        self._images = deque()  # {"rows": [...], "left": faces still pending}, in input order
+        self.images_done = 0
+        self.faces_done = 0
+
+    def add(self, path: str, boxes, crops, error):
+        label = label_from_path(path)
+        if error or not boxes:
+            rows = [self._row(path, label, None, None, error or "")]
+            self._images.append({"rows": rows, "left": 0})
+        else:
+            rows = [self._row(path, label, i, box, None) for i, box in enumerate(boxes)]
+            image = {"rows": rows, "left": len(rows)}
+            self._images.append(image)
+            self._pending.extend((image, row, crop) for row, crop in zip(rows, crops))
+        if len(self._pending) >= self.batch_size:
+            self.run()
+        else:
+            self._write_complete()
+
+    @staticmethod
+    def _row(path, label, face, box, error):
+        return {"path": path, "label": label, "face": face, "box": box, "emotion": None,
+                "confidence": None, "error": error, "probabilities": None}
+
+    def run(self):
+        """Classify everything pending and write the rows of every image that is now complete."""
+        if self._pending:
+            batch = np.stack([crop for _, _, crop in self._pending])
+            probs = self.predictor.predict_batch(batch)
+            for (image, row, _), p in zip(self._pending, probs):
+                emotion, confidence, all_predictions = decode_prediction(p)
+                row.update(emotion=emotion, confidence=confidence, error="", probabilities=all_predictions)
+                image["left"] -= 1
+            self._pending = []
+        self._write_complete()
+
+    def _write_complete(self):
+        while self._images and self._images[0]["left"] == 0:
+            for row in self._images.popleft()["rows"]:
+                self.writer.write(row)
+                self.faces_done += row["emotion"] is not None
+            self.images_done += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Image directory (class folders or flat)")
+    parser.add_argument("--output", required=True, help="Output file (.csv or .jsonl)")
+    parser.add_argument("--backend", default=BACKEND)
+    parser.add_argument("--model", default=None, help="Model artifact (default: auto-discovered)")
+    parser.add_argument("--faces", choices=FACE_MODES, default="detect",
+                        help="detect faces like the web app, use the whole image, or detect with whole-image fallback")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--img-size", type=int, default=None, help="Override the model's input size")
+    parser.add_argument("--resume", action="store_true", help="Continue from the checkpoint next to --output")
+    parser.add_argument("--limit", type=int, default=None, help="Only process the first N images")
+    args = parser.parse_args(argv)
+
+    checkpoint_path = args.output + ".checkpoint"
+    skip = 0
+    if args.resume:
+        state = load_checkpoint(checkpoint_path)
+        if state and os.path.exists(args.output):
+            skip = state["done"]
+            with open(args.output, "r+b") as f:
+                f.truncate(state["output_bytes"])  # drop rows of images that were not fully written
+            print(f"Resuming after {skip} images")
+
+    paths = iter_image_paths(args.input)
+    if args.limit is not None:
+        paths = (p for i, p in enumerate(paths) if i < args.limit)
+    paths = (p for i, p in enumerate(paths) if i >= skip)
+
+    # spawn, not fork: workers start a fresh interpreter and never inherit the parent's TensorFlow runtime
+    pool = ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker)
+    predictor = load_predictor(args.backend, args.model, args.img_size)
+    img_size = predictor.img_size
+    writer = RowWriter(args.output, append=skip > 0)
+    classifier = BatchClassifier(predictor, writer, args.batch_size)
+    classifier.images_done = skip
+
+    in_flight = deque()
+    max_in_flight = max(1, args.workers) * 4
+    start = time.perf_counter()
+    last_report = start
+    try:
+        for path in paths:
+            in_flight.append(pool.submit(prepare_image, path, args.faces, img_size))
+            while len(in_flight) >= max_in_flight:
+                classifier.add(*in_flight.popleft().result())
+            now = time.perf_counter()
+            if classifier.images_done > skip and now - last_report > 5:
+                save_checkpoint(checkpoint_path, classifier.images_done, writer.flush())
+                rate = (classifier.images_done - skip) / (now - start)
+                print(f"{classifier.images_done} images, {classifier.faces_done} faces, {rate:.1f} img/s", file=sys.stderr)
+                last_report = now
+        while in_flight:
+            classifier.add(*in_flight.popleft().result())
+        classifier.run()
+        save_checkpoint(checkpoint_path, classifier.images_done, writer.flush())
+    finally:
+        writer.close()
+        pool.shutdown(cancel_futures=True)
+
+    elapsed = time.perf_counter() - start
+    processed = classifier.images_done - skip
+    print(
+        f"Classified {processed} images ({classifier.faces_done} faces) in {elapsed:.1f}s "
+        f"with {args.workers} workers: {processed / max(elapsed, 1e-9):.1f} img/s -> {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
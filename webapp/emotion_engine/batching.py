@@ -0,0 +1,225 @@
+"""
+Cross-session dynamic micro-batching for the shared predictor.
+
+Every Streamlit session runs in its own thread and used to call the cached model
+directly, so concurrent users contended for it one face at a time. `MicroBatcher`
+wraps any predictor with the same `predict_batch` contract:
+
+    session threads ──► request queue ──► batching thread ──► one forward pass
+          ▲                                                        │
+          └──────────────────── Future per request ◄───────────────┘
+
+The batching thread takes the oldest request, adds whatever else is already queued,
+and then waits at most `max_wait_ms` for more, up to `max_batch` faces. It runs one
+forward pass and hands every caller its own rows through a `concurrent.futures.Future`.
+The wait only happens after a batch that served more than one request. A lone user
+therefore pays only a thread hand-off. Under load, requests that arrive during a
+forward pass go into the next batch.
+
+Configure it with EMOTION_MICROBATCH (1/0), EMOTION_MICROBATCH_MAX_SIZE and
+EMOTION_MICROBATCH_MAX_WAIT_MS. Measure throughput and latency with N concurrent clients:
+    python -m emotion_engine.batching --clients 1 4 16 32
+"""
+
+import argparse
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+import numpy as np
+
+MICROBATCH = os.environ.get("EMOTION_MICROBATCH", "1") == "1"
+MICROBATCH_MAX_SIZE = int(os.environ.get("EMOTION_MICROBATCH_MAX_SIZE", "16"))
+MICROBATCH_MAX_WAIT_MS = float(os.environ.get("EMOTION_MICROBATCH_MAX_WAIT_MS", "2"))
+
+
+@dataclass
+class Request:
+    batch: np.ndarray
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class MicroBatcher:
+    """Gather predict_batch calls from many threads into shared forward passes."""
+
+    def __init__(self, predictor, max_batch: int = MICROBATCH_MAX_SIZE, max_wait_ms: float = MICROBATCH_MAX_WAIT_MS,
+                 history: int = 512):
+        self.predictor = predictor
+        self.img_size = predictor.img_size
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._requests = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch_sizes = deque(maxlen=history)
+        self._queue_depths = deque(maxlen=history)
+        self._waits = deque(maxlen=history)
+        self.batches = 0
+        self.faces = 0
+        self._carry = None
+        self._shared = False  # did the last batch serve more than one request?
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    # ── Caller side ───────────────────────────────────────────
+    def submit(self, batch: np.ndarray) -> Future:
+        """Queue a uint8 (N, H, W, 3) batch; the future resolves to its (N, classes) probabilities."""
+        request = Request(batch)
+        if not self._running:
+            request.future.set_exception(RuntimeError("MicroBatcher is closed"))
+        else:
+            self._requests.put(request)
+        return request.future
+
+    def predict_batch(self, batch: np.ndarray) -> np.ndarray:
+        return self.submit(batch).result()
+
+    def warmup(self, batch_size: int = 1):
+        self.predictor.warmup(batch_size)
+        return self
+
+    def close(self):
+        self._running = False
+        self._requests.put(None)
+        self._thread.join(timeout=5.0)
+
+    # ── Batching thread ───────────────────────────────────────
+    def _collect(self, first: Request) -> list:
+        requests, rows = [first], len(first.batch)
+        deadline = time.perf_counter() + (self.max_wait if self._shared else 0.0)
+        while rows < self.max_batch:
+            try:
+                request = self._requests.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if request is None:
+                self._requests.put(None)
+                break
+            if rows + len(request.batch) > self.max_batch:
+                # keep batches bounded: this one starts the next batch
+                self._carry = request
+                break
+            requests.append(request)
+            rows += len(request.batch)
+        return requests
+
+    def _run(self):
+        while True:
+            first, self._carry = self._carry, None
+            if first is None:
+                first = self._requests.get()
+            if first is None:
+                break
+            depth = self._requests.qsize()
+            requests = self._collect(first)
+            self._shared = len(requests) > 1
+            started = time.perf_counter()
+            try:
+                batch = requests[0].batch if len(requests) == 1 else np.concatenate([r.batch for r in requests])
+                probs = self.predictor.predict_batch(batch)
+            except Exception as e:
+                for request in requests:
+                    request.future.set_exception(e)
+                continue
+            offset = 0
+            for request in requests:
+                request.future.set_result(probs[offset : offset + len(request.batch)])
+                offset += len(request.batch)
+            with self._lock:
+                self.batches += 1
+                self.faces += offset
+                self._batch_sizes.append(offset)
+                self._queue_depths.append(depth + 1)
+                self._waits.extend(started - r.enqueued_at for r in requests)
+        for request in list(self._requests.queue):
+            if request is not None:
+                request.future.set_exception(RuntimeError("MicroBatcher is closed"))
+
+    # ── Metrics ───────────────────────────────────────────────
+    def stats(self) -> dict:
+        """Totals plus recent batch size, queue depth (requests waiting at batch start) and queueing delay."""
+        with self._lock:
+            sizes, depths, waits = list(self._batch_sizes), list(self._queue_depths), list(self._waits)
+            stats = {"batches": self.batches, "faces": self.faces, "queue_depth": self._requests.qsize()}
+        stats["batch_size_mean"] = float(np.mean(sizes)) if sizes else 0.0
+        stats["batch_size_max"] = max(sizes, default=0)
+        stats["queue_depth_mean"] = float(np.mean(depths)) if depths else 0.0
+        stats["wait_p95_ms"] = float(np.percentile(waits, 95)) * 1000.0 if waits else 0.0
+        return stats
+
+    def summary(self) -> str:
+        stats = self.stats()
+        text = (f"Micro-batches {stats['batch_size_mean']:.1f} faces avg (max {stats['batch_size_max']}) · "
+                f"queue {stats['queue_depth_mean']:.1f} · wait p95 {stats['wait_p95_ms']:.1f} ms")
+        if hasattr(self.predictor, "summary"):
+            text += f" · {self.predictor.summary()}"
+        return text
+
+
+# ─────────────────────────────────────────────────────────────
+# Concurrent-client load test
+# ─────────────────────────────────────────────────────────────
+def load_test(predictor, clients: int, seconds: float, img_size: int) -> dict:
+    """`clients` threads each classify one face at a time for `seconds`; return throughput and latency."""
+    from .latency import percentiles
+
+    face = np.random.default_rng(0).integers(0, 256, (1, img_size, img_size, 3), dtype=np.uint8)
+    samples = [[] for _ in range(clients)]
+    stop = time.perf_counter() + seconds
+
+    def client(out):
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            predictor.predict_batch(face)
+            out.append((time.perf_counter() - start) * 1000.0)
+
+    threads = [threading.Thread(target=client, args=(s,)) for s in samples]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    latencies = [ms for s in samples for ms in s]
+    return {"faces_per_s": len(latencies) / elapsed, **percentiles(latencies)}
+
+
+def main(argv=None):
+    from .backends import load_predictor
+    from .config import BACKEND
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=None, help="Model path (default: auto-discovered)")
+    parser.add_argument("--backend", default=BACKEND)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=MICROBATCH_MAX_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=MICROBATCH_MAX_WAIT_MS)
+    args = parser.parse_args(argv)
+
+    predictor = load_predictor(args.backend, args.model)
+    predictor.warmup(args.max_batch)
+    print(f"{'clients':>7} {'mode':>8} {'faces/s':>8} {'p50 ms':>7} {'p95 ms':>7} {'batch':>6}")
+    for clients in args.clients:
+        for mode in ("direct", "batched"):
+            batcher = MicroBatcher(predictor, args.max_batch, args.max_wait_ms) if mode == "batched" else None
+            r = load_test(batcher or predictor, clients, args.seconds, predictor.img_size)
+            batch = batcher.stats()["batch_size_mean"] if batcher else 1.0
+            if batcher:
+                batcher.close()
+            print(f"{clients:>7} {mode:>8} {r['faces_per_s']:>8.1f} {r['p50']:>7.2f} {r['p95']:>7.2f} {batch:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Face detection time against input resolution.
+
+Compares the original full-resolution cascade pass (scaleFactor=1.1, no size limits)
+with the downscaled detector at several frame sizes. Frames are synthesized from
+`--image` (or test faces tiled onto a plain background) so the numbers are repeatable.
+
+Usage (from the webapp directory):
+    python -m emotion_engine.bench_detection --repeats 5
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from .config import TEST_DIR
+from .datasets import list_labeled_images
+from .detection import DETECTION_WIDTH, FaceDetector
+
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080), (3840, 2160)]
+
+
+def synthetic_frame(width: int, height: int, faces: int = 3, seed: int = 0) -> np.ndarray:
+    """Grayscale frame with `faces` test-set faces pasted at ~1/4 of the frame height."""
+    rng = np.random.default_rng(seed)
+    frame = np.full((height, width), 110, dtype=np.uint8)
+    items = list_labeled_images(TEST_DIR)
+    side = height // 4
+    for i in range(faces):
+        path, _ = items[int(rng.integers(len(items)))]
+        face = cv2.resize(cv2.imread(path, cv2.IMREAD_GRAYSCALE), (side, side))
+        x = int((i + 0.5) * width / faces - side / 2)
+        y = int(rng.integers(0, height - side))
+        frame[y : y + side, x : x + side] = face
+    return frame
+
+
+def time_detector(detector: FaceDetector, gray: np.ndarray, repeats: int):
+    detector.detect(gray)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        faces = detector.detect(gray)
+    return (time.perf_counter() - start) / repeats * 1000.0, len(faces)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", default=None, help="Use this image (resized) instead of synthetic frames")
+    parser.add_argument("--working-width", type=int, default=DETECTION_WIDTH)
+    parser.add_argument("--refine", action="store_true", help="Also time full-resolution ROI refinement")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    native = FaceDetector(working_width=0, min_face_fraction=0.0, max_face_fraction=1.0)
+    scaled = FaceDetector(working_width=args.working_width, refine=args.refine)
+
+    source = cv2.imread(args.image, cv2.IMREAD_GRAYSCALE) if args.image else None
+    print(f"{'resolution':<12} {'native ms':>10} {'faces':>6} {'scaled ms':>10} {'faces':>6} {'speed-up':>9}")
+    for width, height in RESOLUTIONS:
+        gray = cv2.resize(source, (width, height)) if source is not None else synthetic_frame(width, height)
+        native_ms, native_faces = time_detector(native, gray, args.repeats)
+        scaled_ms, scaled_faces = time_detector(scaled, gray, args.repeats)
+        print(
+            f"{width}x{height:<7} {native_ms:>10.1f} {native_faces:>6} {scaled_ms:>10.1f} {scaled_faces:>6} "
+            f"{native_ms / max(scaled_ms, 1e-9):>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
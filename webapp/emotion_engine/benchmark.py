@@ -0,0 +1,242 @@
+"""
+Reproducible accuracy + latency benchmark over model/test.
+
+Runs headless against any registered backend and records:
+  - top-1 accuracy, per-class recall and the confusion matrix
+  - p50/p95/p99 single-image latency
+  - batch throughput (images/s) at several batch sizes
+  - peak resident memory of the process
+
+Results are written to a versioned JSON file and compared against a stored
+baseline; any regression beyond the tolerances makes the command exit with 1.
+Latency, throughput and memory depend on the machine, so no baseline ships with
+the repo: record one with --save-baseline on the machine that runs the check.
+Without a baseline the command exits with 2 (unless --allow-missing-baseline).
+
+Usage (from the webapp directory):
+    python -m emotion_engine.benchmark --backend keras --save-baseline   # one-time setup
+    python -m emotion_engine.benchmark --backend keras            # compare to the baseline
+    python -m emotion_engine.benchmark --backend keras --packed   # read the memory-mapped test split
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from .backends import default_artifact, load_predictor
+from .cache import artifact_version
+from .config import BACKEND, EMOTION_LABELS, TEST_DIR, WEBAPP_DIR
+from .datasets import load_image_rgb, sample_labeled_images
+from .evaluation import predict_arrays, predict_items
+from .latency import percentiles, time_single_images
+from .packed import PACKED_DIR, ensure_packed, sample_rows
+from .preprocessing import resize_batch
+
+SCHEMA_VERSION = 1
+BENCHMARK_DIR = os.path.join(WEBAPP_DIR, "benchmarks")
+
+# Allowed change before a metric counts as a regression
+TOLERANCES = {
+    "accuracy_drop": 0.005,  # absolute
+    "latency_increase": 0.15,  # relative, p50/p95
+    "throughput_drop": 0.15,  # relative
+    "rss_increase": 0.15,  # relative
+}
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def git_revision():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=WEBAPP_DIR, capture_output=True, text=True, timeout=5
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def per_class_recall(preds: np.ndarray, labels: np.ndarray):
+    n = len(EMOTION_LABELS)
+    confusion = np.zeros((n, n), dtype=np.int64)
+    np.add.at(confusion, (labels, preds), 1)
+    support = confusion.sum(axis=1)
+    recall = {
+        EMOTION_LABELS[i]: (float(confusion[i, i] / support[i]) if support[i] else None) for i in range(n)
+    }
+    return recall, confusion.tolist()
+
+
+def batch_throughput(predictor, images: np.ndarray, batch_size: int, repeats: int = 3) -> float:
+    """Images per second for back-to-back predict_batch calls of `batch_size`."""
+    batches = [images[i : i + batch_size] for i in range(0, len(images) - batch_size + 1, batch_size)]
+    if not batches:
+        return None
+    predictor.predict_batch(batches[0])  # warm-up for this shape
+    best = 0.0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for batch in batches:
+            predictor.predict_batch(batch)
+        elapsed = time.perf_counter() - start
+        best = max(best, len(batches) * batch_size / elapsed)
+    return best
+
+
+def run_benchmark(backend: str, model_path: str, test_dir: str, limit=None, latency_samples: int = 200,
+                  batch_sizes=(1, 8, 32, 64), img_size: int = None, seed: int = 0, packed: bool = False) -> dict:
+    load_start = time.perf_counter()
+    predictor = load_predictor(backend, model_path, img_size)
+    load_seconds = time.perf_counter() - load_start
+    img_size = predictor.img_size
+    timing_count = max(latency_samples, max(batch_sizes) * 4)
+
+    data_start = time.perf_counter()
+    if packed:
+        split = ensure_packed(test_dir, os.path.join(PACKED_DIR, os.path.basename(os.path.normpath(test_dir))))
+        idx = sample_rows(len(split), limit, seed)
+        preds, labels = predict_arrays(predictor, split.images[idx], split.labels[idx], img_size, batch_size=64)
+        timing_images = resize_batch(split.images[sample_rows(len(split), timing_count, seed + 1)], img_size)
+    else:
+        items = sample_labeled_images(test_dir, limit, seed=seed)
+        preds, labels = predict_items(predictor, items, img_size, batch_size=64)
+        timing_items = sample_labeled_images(test_dir, timing_count, seed=seed + 1)
+        timing_images = resize_batch([load_image_rgb(path) for path, _ in timing_items], img_size)
+    eval_seconds = time.perf_counter() - data_start
+    recall, confusion = per_class_recall(preds, labels)
+
+    # timing inputs are pre-resized so only the model is measured
+    singles = [timing_images[i : i + 1] for i in range(min(latency_samples, len(timing_images)))]
+    latency = percentiles(time_single_images(predictor, singles))
+
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "backend": backend,
+        "model": {"path": model_path, "version": artifact_version(model_path, backend),
+                  "size_mb": os.path.getsize(model_path) / 1e6, "load_seconds": load_seconds,
+                  "img_size": img_size},
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "git_revision": git_revision(),
+        },
+        "dataset": {"path": test_dir, "format": "packed" if packed else "files", "images": len(labels),
+                    "seed": seed, "eval_seconds": eval_seconds},
+        "accuracy": float(np.mean(preds == labels)) if len(labels) else None,
+        "per_class_recall": recall,
+        "confusion_matrix": confusion,
+        "latency_ms": latency,
+        "throughput_ips": {str(bs): batch_throughput(predictor, timing_images, bs) for bs in batch_sizes},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare(result: dict, baseline: dict, tolerances: dict = TOLERANCES) -> list:
+    """Human-readable regressions of `result` against `baseline`."""
+    problems = []
+    if baseline.get("schema_version") != result["schema_version"]:
+        return [f"baseline schema {baseline.get('schema_version')} != {result['schema_version']}; re-record it"]
+    if baseline.get("accuracy") is not None and result["accuracy"] is not None:
+        drop = baseline["accuracy"] - result["accuracy"]
+        if drop > tolerances["accuracy_drop"]:
+            problems.append(f"accuracy {result['accuracy']:.4f} vs {baseline['accuracy']:.4f}")
+    for key in ("p50", "p95"):
+        old, new = baseline["latency_ms"].get(key), result["latency_ms"].get(key)
+        if old and new > old * (1 + tolerances["latency_increase"]):
+            problems.append(f"latency {key} {new:.2f} ms vs {old:.2f} ms")
+    for bs, old in baseline.get("throughput_ips", {}).items():
+        new = result["throughput_ips"].get(bs)
+        if old and new is not None and new < old * (1 - tolerances["throughput_drop"]):
+            problems.append(f"throughput@{bs} {new:.1f} vs {old:.1f} img/s")
+    old_rss, new_rss = baseline.get("peak_rss_mb"), result.get("peak_rss_mb")
+    if old_rss and new_rss and new_rss > old_rss * (1 + tolerances["rss_increase"]):
+        problems.append(f"peak RSS {new_rss:.0f} MB vs {old_rss:.0f} MB")
+    return problems
+
+
+def print_summary(result: dict):
+    data = result["dataset"]
+    print(f"backend {result['backend']} on {data['images']} images ({data['format']}, {data['eval_seconds']:.1f}s)")
+    print(f"accuracy        {result['accuracy']:.4f}")
+    print("recall          " + "  ".join(
+        f"{k}={v:.2f}" if v is not None else f"{k}=n/a" for k, v in result["per_class_recall"].items()
+    ))
+    lat = result["latency_ms"]
+    print(f"latency ms      p50 {lat['p50']:.2f}  p95 {lat['p95']:.2f}  p99 {lat['p99']:.2f}")
+    print("throughput      " + "  ".join(
+        f"bs{bs}={v:.1f}/s" for bs, v in result["throughput_ips"].items() if v is not None
+    ))
+    if result["peak_rss_mb"] is not None:
+        print(f"peak RSS        {result['peak_rss_mb']:.0f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default=BACKEND)
+    parser.add_argument("--model", default=None, help="Model artifact (default: auto-discovered)")
+    parser.add_argument("--test-dir", default=TEST_DIR)
+    parser.add_argument("--packed", action="store_true", help="Read the memory-mapped pack of the test set (built if stale)")
+    parser.add_argument("--limit", type=int, default=None, help="Score a fixed random subset of the test set")
+    parser.add_argument("--latency-samples", type=int, default=200)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--img-size", type=int, default=None, help="Override the model's input size")
+    parser.add_argument("--output", default=None, help="Result JSON (default: benchmarks/results/<backend>-<time>.json)")
+    parser.add_argument("--baseline", default=None, help="Baseline JSON (default: benchmarks/baseline-<backend>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--allow-missing-baseline", action="store_true",
+                        help="Exit 0 instead of 2 when there is no baseline to compare against")
+    args = parser.parse_args(argv)
+
+    model_path = args.model or default_artifact(args.backend)
+    result = run_benchmark(args.backend, model_path, args.test_dir, args.limit, args.latency_samples,
+                           args.batch_sizes, args.img_size, packed=args.packed)
+    print_summary(result)
+
+    output = args.output or os.path.join(
+        BENCHMARK_DIR, "results", f"{args.backend}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"Wrote {output}")
+
+    baseline_path = args.baseline or os.path.join(BENCHMARK_DIR, f"baseline-{args.backend}.json")
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(baseline_path)), exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved baseline {baseline_path}")
+        return 0
+    if not os.path.exists(baseline_path):
+        print(f"No baseline at {baseline_path}; record one on this machine with --save-baseline", file=sys.stderr)
+        return 0 if args.allow_missing_baseline else 2
+    with open(baseline_path, encoding="utf-8") as f:
+        problems = compare(result, json.load(f))
+    if problems:
+        print("REGRESSIONS against " + baseline_path)
+        for problem in problems:
+            print("  - " + problem)
+        return 1
+    print(f"No regressions against {baseline_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Content-addressed, size-bounded LRU cache for analysis results.
+
+Keys are a hash of the input bytes plus the model version, so identical uploads
+hit the cache across reruns and sessions, and a new model artifact never serves
+stale predictions.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def artifact_version(path: str, backend: str = "") -> str:
+    """Cheap model version tag from the artifact's name, size and modification time."""
+    try:
+        st = os.stat(path)
+        tag = f"{backend}:{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}"
+    except OSError:
+        tag = f"{backend}:{path}"
+    return hashlib.sha1(tag.encode()).hexdigest()[:12]
+
+
+def content_key(data: bytes, model_version: str) -> str:
+    """Cache key for raw input bytes analyzed by a given model version."""
+    h = hashlib.sha256(data)
+    h.update(model_version.encode())
+    return h.hexdigest()
+
+
+def approx_size(value) -> int:
+    """Rough memory footprint of a cached value (arrays, bytes and containers of them)."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(approx_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(approx_size(v) for v in value)
+    return 64
+
+
+class PredictionCache:
+    """Thread-safe LRU bounded by entry count and approximate total bytes."""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: str, value):
+        size = approx_size(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,186 @@
+"""
+Confidence-gated two-stage classifier cascade.
+
+A small, fast model (e.g. the distilled 48×48 student) classifies every face; only
+crops where its top-1 probability is below `confidence` or the gap to the runner-up
+is below `margin` are re-classified by the full model. The cascade is a predictor
+like any other (`predict_batch(uint8 batch) -> probabilities`), so the engine, live
+pipeline and upload path use it unchanged. It takes batches at the larger of the two
+input sizes and downsizes them for the other stage.
+
+Enable it in the web app with EMOTION_CASCADE_MODEL=<fast model>; tune the gate with
+EMOTION_CASCADE_CONFIDENCE / EMOTION_CASCADE_MARGIN. Sweep thresholds offline with:
+    python -m emotion_engine.cascade --fast ../model/mod_student48.keras --confidence 0.5 0.6 0.7 0.8
+"""
+
+import argparse
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from .config import BACKEND
+
+# Fast first-stage model; the cascade is off when unset
+CASCADE_MODEL = os.environ.get("EMOTION_CASCADE_MODEL")
+CASCADE_BACKEND = os.environ.get("EMOTION_CASCADE_BACKEND", BACKEND)
+CASCADE_CONFIDENCE = float(os.environ.get("EMOTION_CASCADE_CONFIDENCE", "0.7"))
+CASCADE_MARGIN = float(os.environ.get("EMOTION_CASCADE_MARGIN", "0.0"))
+
+
+def escalation_mask(probs: np.ndarray, confidence: float, margin: float) -> np.ndarray:
+    """True for rows whose top-1 probability or top-1/top-2 margin is too low to trust."""
+    if len(probs) == 0:
+        return np.zeros(0, dtype=bool)
+    top2 = np.sort(probs, axis=1)[:, -2:]
+    return (top2[:, 1] < confidence) | (top2[:, 1] - top2[:, 0] < margin)
+
+
+def resize_to(batch: np.ndarray, img_size: int) -> np.ndarray:
+    if batch.shape[1] == img_size:
+        return batch
+    interpolation = cv2.INTER_AREA if batch.shape[1] > img_size else cv2.INTER_LINEAR
+    return np.stack([cv2.resize(img, (img_size, img_size), interpolation=interpolation) for img in batch])
+
+
+class CascadePredictor:
+    """Serve `fast` first and escalate low-confidence faces to `full`."""
+
+    def __init__(self, fast, full, confidence: float = CASCADE_CONFIDENCE, margin: float = CASCADE_MARGIN):
+        self.fast = fast
+        self.full = full
+        self.confidence = confidence
+        self.margin = margin
+        self.img_size = max(fast.img_size, full.img_size)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.faces = 0
+        self.escalated = 0
+        self.fast_seconds = 0.0
+        self.full_seconds = 0.0
+
+    def warmup(self, batch_size: int = 1):
+        self.fast.warmup(batch_size)
+        self.full.warmup(batch_size)
+        return self
+
+    def predict_batch(self, batch: np.ndarray) -> np.ndarray:
+        """Return (N, classes) probabilities for a uint8 (N, H, W, 3) batch at `img_size`."""
+        start = time.perf_counter()
+        probs = np.array(self.fast.predict_batch(resize_to(batch, self.fast.img_size)), dtype=np.float32)
+        fast_done = time.perf_counter()
+        escalate = np.flatnonzero(escalation_mask(probs, self.confidence, self.margin))
+        if len(escalate):
+            probs[escalate] = self.full.predict_batch(resize_to(batch[escalate], self.full.img_size))
+        with self._lock:
+            self.faces += len(batch)
+            self.escalated += len(escalate)
+            self.fast_seconds += fast_done - start
+            self.full_seconds += time.perf_counter() - fast_done
+        return probs
+
+    def stats(self) -> dict:
+        with self._lock:
+            faces = max(self.faces, 1)
+            return {
+                "faces": self.faces,
+                "escalated": self.escalated,
+                "escalation_rate": self.escalated / faces,
+                "ms_per_face": (self.fast_seconds + self.full_seconds) * 1000.0 / faces,
+            }
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return (f"Escalated {stats['escalation_rate']:.0%} of {stats['faces']} faces · "
+                f"{stats['ms_per_face']:.1f} ms/face")
+
+
+def load_cascade(full_path: str = None, fast_path: str = CASCADE_MODEL, backend: str = BACKEND,
+                 fast_backend: str = CASCADE_BACKEND, confidence: float = CASCADE_CONFIDENCE,
+                 margin: float = CASCADE_MARGIN, warmup: bool = True, full=None) -> CascadePredictor:
+    """Fast model in front of the full one; `full` may be an already loaded predictor."""
+    from .backends import load_predictor
+
+    fast = load_predictor(fast_backend, fast_path, warmup=False)
+    full = full or load_predictor(backend, full_path, warmup=False)
+    cascade = CascadePredictor(fast, full, confidence, margin)
+    return cascade.warmup() if warmup else cascade
+
+
+# ─────────────────────────────────────────────────────────────
+# Offline threshold sweep on model/test
+# ─────────────────────────────────────────────────────────────
+def per_face_ms(predictor, images: np.ndarray, batch_size: int = 32) -> float:
+    """Average per-face time of `predictor` at a given batch size."""
+    batches = [images[i : i + batch_size] for i in range(0, len(images) - batch_size + 1, batch_size)] or [images]
+    predictor.predict_batch(batches[0])
+    start = time.perf_counter()
+    for batch in batches:
+        predictor.predict_batch(batch)
+    return (time.perf_counter() - start) * 1000.0 / sum(len(b) for b in batches)
+
+
+def sweep(fast_probs, full_probs, labels, fast_ms: float, full_ms: float, confidences, margins) -> list:
+    """Escalation rate, cost per face and accuracy for every (confidence, margin) pair."""
+    fast_pred, full_pred = fast_probs.argmax(1), full_probs.argmax(1)
+    rows = []
+    for confidence in confidences:
+        for margin in margins:
+            escalate = escalation_mask(fast_probs, confidence, margin)
+            pred = np.where(escalate, full_pred, fast_pred)
+            rate = float(escalate.mean())
+            rows.append({
+                "confidence": confidence,
+                "margin": margin,
+                "escalation_rate": rate,
+                "ms_per_face": fast_ms + rate * full_ms,
+                "accuracy": float(np.mean(pred == labels)),
+            })
+    return rows
+
+
+def main(argv=None):
+    from .backends import load_predictor
+    from .packed import packed_split, sample_rows
+    from .preprocessing import resize_batch
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fast", default=CASCADE_MODEL, required=CASCADE_MODEL is None, help="First-stage model")
+    parser.add_argument("--full", default=None, help="Second-stage model (default: auto-discovered)")
+    parser.add_argument("--fast-backend", default=CASCADE_BACKEND)
+    parser.add_argument("--backend", default=BACKEND)
+    parser.add_argument("--confidence", type=float, nargs="+", default=[0.5, 0.6, 0.7, 0.8, 0.9])
+    parser.add_argument("--margin", type=float, nargs="+", default=[0.0])
+    parser.add_argument("--limit", type=int, default=None, help="Score a fixed random subset of the test set")
+    parser.add_argument("--timing-samples", type=int, default=256)
+    args = parser.parse_args(argv)
+
+    fast = load_predictor(args.fast_backend, args.fast)
+    full = load_predictor(args.backend, args.full)
+    test = packed_split("test")
+    rows = sample_rows(len(test), args.limit)
+    images, labels = test.images[rows], np.asarray(test.labels[rows], dtype=np.int32)
+
+    fast_probs = np.concatenate([fast.predict_batch(resize_batch(images[i : i + 64], fast.img_size))
+                                 for i in range(0, len(images), 64)])
+    full_probs = np.concatenate([full.predict_batch(resize_batch(images[i : i + 64], full.img_size))
+                                 for i in range(0, len(images), 64)])
+    timing = images[sample_rows(len(images), args.timing_samples, seed=1)]
+    fast_ms = per_face_ms(fast, resize_batch(timing, fast.img_size))
+    full_ms = per_face_ms(full, resize_batch(timing, full.img_size))
+
+    full_acc = float(np.mean(full_probs.argmax(1) == labels))
+    fast_acc = float(np.mean(fast_probs.argmax(1) == labels))
+    print(f"{len(labels)} test faces · fast {fast_acc:.4f} @ {fast_ms:.2f} ms/face · full {full_acc:.4f} @ {full_ms:.2f} ms/face")
+    print(f"{'confidence':>10} {'margin':>7} {'escalated':>10} {'ms/face':>8} {'accuracy':>9} {'vs full':>8}")
+    for r in sweep(fast_probs, full_probs, labels, fast_ms, full_ms, args.confidence, args.margin):
+        print(f"{r['confidence']:>10.2f} {r['margin']:>7.2f} {r['escalation_rate']:>10.1%} {r['ms_per_face']:>8.2f} "
+              f"{r['accuracy']:>9.4f} {r['accuracy'] - full_acc:>+8.4f}")
+
+
+if __name__ == "__main__":
+    main()
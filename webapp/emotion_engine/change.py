@@ -0,0 +1,75 @@
+"""
+Per-track change detection and probability smoothing.
+
+Consecutive crops of a still face are nearly identical, so re-running the model on
+them wastes CPU. Each track keeps a compact descriptor of its last classified crop
+(a mean-centred 16×16 grayscale thumbnail); when a new crop differs by less than
+`threshold` the previous prediction is reused. New predictions are blended into an
+exponential moving average of the probability vector for a steadier label.
+"""
+
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+DESCRIPTOR_SIZE = 16
+
+
+def crop_descriptor(gray: np.ndarray, box, size: int = DESCRIPTOR_SIZE) -> np.ndarray:
+    """Mean-centred thumbnail of a face box in a grayscale frame, values in [-1, 1]."""
+    x, y, w, h = box
+    crop = gray[max(0, y) : y + h, max(0, x) : x + w]
+    thumb = cv2.resize(crop, (size, size), interpolation=cv2.INTER_AREA).astype(np.float32) / 255.0
+    return thumb - thumb.mean()
+
+
+def descriptor_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """Mean absolute difference between two descriptors."""
+    return float(np.mean(np.abs(a - b)))
+
+
+@dataclass
+class FaceState:
+    descriptor: np.ndarray
+    probabilities: np.ndarray
+    reused: int = 0
+
+
+class ChangeGate:
+    """Decide per track whether a crop needs inference, and smooth the resulting probabilities."""
+
+    def __init__(self, threshold: float = 0.03, smoothing: float = 0.5, max_reuse: int = 30):
+        self.threshold = threshold
+        self.smoothing = smoothing
+        self.max_reuse = max_reuse
+        self.states = {}  # track id -> FaceState
+
+    def changed(self, track_id: int, descriptor: np.ndarray) -> bool:
+        """True if the track is new, its crop moved past the threshold, or it was reused too long."""
+        state = self.states.get(track_id)
+        if state is None or state.reused >= self.max_reuse:
+            return True
+        if descriptor_distance(state.descriptor, descriptor) >= self.threshold:
+            return True
+        state.reused += 1
+        return False
+
+    def update(self, track_id: int, descriptor: np.ndarray, probabilities: np.ndarray) -> np.ndarray:
+        """Store a fresh prediction; return the smoothed probability vector."""
+        state = self.states.get(track_id)
+        if state is None:
+            smoothed = np.asarray(probabilities, dtype=np.float32)
+        else:
+            a = self.smoothing
+            smoothed = a * np.asarray(probabilities, dtype=np.float32) + (1 - a) * state.probabilities
+        self.states[track_id] = FaceState(descriptor, smoothed)
+        return smoothed
+
+    def probabilities(self, track_id: int):
+        state = self.states.get(track_id)
+        return None if state is None else state.probabilities
+
+    def prune(self, live_ids):
+        """Forget tracks that are no longer followed."""
+        self.states = {k: v for k, v in self.states.items() if k in live_ids}
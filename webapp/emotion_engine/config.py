@@ -0,0 +1,47 @@
+"""
+Shared configuration for the emotion recognition engine.
+Label order, input size and model file discovery used by the web app and the headless tools.
+"""
+
+import os
+
+# Emotion labels in the same order used when training (class folders 0..6)
+EMOTION_LABELS = ["Angry", "Disgust", "Fear", "Happy", "Neutral", "Sad", "Surprise"]
+
+# Input size for artifacts that declare none (the 224×224 MobileNetV2 from face.ipynb);
+# models carry their own size in a metadata sidecar, see metadata.py
+IMG_SIZE = 224
+
+# Inference backend registered in backends.py: "keras" (default), "tflite", "onnxruntime"
+BACKEND = os.environ.get("EMOTION_BACKEND", "keras")
+
+# ─────────────────────────────────────────────────────────────
+# Model file discovery
+# ─────────────────────────────────────────────────────────────
+WEBAPP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_DIR = os.path.dirname(WEBAPP_DIR)
+
+MODEL_FILENAME = "mod_my_model01.keras"
+
+# FER image folders laid out as <split>/<class index>/<image>.jpg
+TRAIN_DIR = os.path.join(BASE_DIR, "model", "train")
+TEST_DIR = os.path.join(BASE_DIR, "model", "test")
+
+MODEL_CANDIDATES = [
+    os.path.join(BASE_DIR, "model", MODEL_FILENAME),  # model/mod_my_model01.keras from root
+    os.path.join(BASE_DIR, MODEL_FILENAME),  # mod_my_model01.keras in root
+    os.path.join(WEBAPP_DIR, MODEL_FILENAME),  # webapp/mod_my_model01.keras
+    MODEL_FILENAME,  # current working directory
+    os.path.join("..", MODEL_FILENAME),  # parent directory (relative)
+    os.path.join("..", "model", MODEL_FILENAME),  # model directory (relative)
+]
+
+
+def find_model_path(candidates=None) -> str:
+    """Return $EMOTION_MODEL_PATH, the first existing candidate, or the default location under model/."""
+    if os.environ.get("EMOTION_MODEL_PATH"):
+        return os.environ["EMOTION_MODEL_PATH"]
+    for candidate in candidates or MODEL_CANDIDATES:
+        if os.path.exists(candidate):
+            return candidate
+    return os.path.join(BASE_DIR, "model", MODEL_FILENAME)
@@ -0,0 +1,42 @@
+"""
+Helpers for reading the FER image folders (model/train, model/test).
+"""
+
+import os
+import random
+
+import cv2
+import numpy as np
+
+from .config import EMOTION_LABELS
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def list_labeled_images(root: str):
+    """Return sorted (path, class index) pairs for a <root>/<class index>/<image> tree."""
+    items = []
+    for class_idx in range(len(EMOTION_LABELS)):
+        folder = os.path.join(root, str(class_idx))
+        if not os.path.isdir(folder):
+            continue
+        for fname in sorted(os.listdir(folder)):
+            if fname.lower().endswith(IMAGE_EXTENSIONS):
+                items.append((os.path.join(folder, fname), class_idx))
+    return items
+
+
+def sample_labeled_images(root: str, limit: int = None, seed: int = 0):
+    """Deterministic random subset of `list_labeled_images` (all images if limit is None)."""
+    items = list_labeled_images(root)
+    if limit is not None and limit < len(items):
+        items = random.Random(seed).sample(items, limit)
+    return items
+
+
+def load_image_rgb(path: str) -> np.ndarray:
+    """Read an image file as an RGB uint8 array."""
+    img = cv2.imread(path)
+    if img is None:
+        raise IOError(f"Could not read image {path}")
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
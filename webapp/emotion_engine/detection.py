@@ -0,0 +1,128 @@
+"""
+Haar cascade face detection.
+
+Detection runs on a frame downscaled to a configurable working width, with the
+cascade's min/max face size derived from the frame size so the image pyramid only
+covers plausible face scales. Boxes are mapped back to full-resolution coordinates
+and can optionally be refined at full resolution inside their own region of interest.
+
+`cv2.CascadeClassifier.detectMultiScale` is not thread-safe, so a `FaceDetector`
+loads one cascade per calling thread and can be shared by sessions and worker pools.
+"""
+
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from .preprocessing import to_gray
+
+HAAR_CASCADE_PATH = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+
+# Width frames are downscaled to before detection (0 disables downscaling)
+DETECTION_WIDTH = int(os.environ.get("EMOTION_DETECTION_WIDTH", "640"))
+
+# Face size limits as fractions of the shorter image side
+MIN_FACE_FRACTION = 0.05
+MAX_FACE_FRACTION = 0.95
+
+# Smallest window the frontal-face cascade can match
+CASCADE_WINDOW = 24
+
+
+def face_size_limits(shape, min_fraction: float = MIN_FACE_FRACTION, max_fraction: float = MAX_FACE_FRACTION):
+    """(minSize, maxSize) for detectMultiScale derived from an image shape."""
+    short_side = min(shape[:2])
+    min_side = max(CASCADE_WINDOW, int(short_side * min_fraction))
+    max_side = max(min_side, int(short_side * max_fraction))
+    return (min_side, min_side), (max_side, max_side)
+
+
+class FaceDetector:
+    """OpenCV cascade on a downscaled frame; returns full-resolution boxes as an (N, 4) int array.
+
+    Safe to share between threads: each thread gets its own cascade (about 20 ms to load).
+    """
+
+    def __init__(
+        self,
+        scale_factor: float = 1.1,
+        min_neighbors: int = 4,
+        cascade_path: str = HAAR_CASCADE_PATH,
+        working_width: int = DETECTION_WIDTH,
+        min_face_fraction: float = MIN_FACE_FRACTION,
+        max_face_fraction: float = MAX_FACE_FRACTION,
+        refine: bool = False,
+    ):
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.working_width = working_width
+        self.min_face_fraction = min_face_fraction
+        self.max_face_fraction = max_face_fraction
+        self.refine = refine
+        self.cascade_path = cascade_path
+        self._local = threading.local()
+        self._load()  # fail fast on a bad path, on the constructing thread
+
+    def _load(self) -> cv2.CascadeClassifier:
+        cascade = cv2.CascadeClassifier(self.cascade_path)
+        if cascade.empty():
+            raise IOError(f"Could not load face cascade from {self.cascade_path}")
+        self._local.cascade = cascade
+        return cascade
+
+    @property
+    def cascade(self) -> cv2.CascadeClassifier:
+        """This thread's cascade, loaded on first use."""
+        cascade = getattr(self._local, "cascade", None)
+        return cascade if cascade is not None else self._load()
+
+    def _run(self, gray: np.ndarray, min_size=None, max_size=None) -> np.ndarray:
+        kwargs = {}
+        if min_size is not None:
+            kwargs["minSize"] = min_size
+        if max_size is not None:
+            kwargs["maxSize"] = max_size
+        faces = self.cascade.detectMultiScale(gray, self.scale_factor, self.min_neighbors, **kwargs)
+        if len(faces) == 0:
+            return np.empty((0, 4), dtype=np.int32)
+        return np.asarray(faces, dtype=np.int32)
+
+    def detect(self, gray: np.ndarray) -> np.ndarray:
+        """Detect faces in a grayscale image; return (x, y, w, h) boxes in its coordinates."""
+        width = gray.shape[1]
+        scale = 1.0
+        small = gray
+        if self.working_width and width > self.working_width:
+            scale = self.working_width / float(width)
+            small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        min_size, max_size = face_size_limits(small.shape, self.min_face_fraction, self.max_face_fraction)
+        faces = self._run(small, min_size, max_size)
+        if scale != 1.0 and len(faces):
+            faces = np.round(faces / scale).astype(np.int32)
+        if self.refine and scale != 1.0 and len(faces):
+            faces = np.asarray([self._refine(gray, box) for box in faces], dtype=np.int32)
+        return faces
+
+    def _refine(self, gray: np.ndarray, box, margin: float = 0.25):
+        """Re-run the cascade at full resolution inside the box's neighbourhood only."""
+        x, y, w, h = (int(v) for v in box)
+        H, W = gray.shape[:2]
+        mx, my = int(w * margin), int(h * margin)
+        x0, y0 = max(0, x - mx), max(0, y - my)
+        x1, y1 = min(W, x + w + mx), min(H, y + h + my)
+        lo = max(CASCADE_WINDOW, int(min(w, h) * 0.7))
+        hi = max(lo, int(max(w, h) * 1.3))
+        found = self._run(gray[y0:y1, x0:x1], (lo, lo), (hi, hi))
+        if len(found) == 0:
+            return box
+        # keep the candidate whose centre is closest to the coarse box centre
+        cx, cy = x + w / 2.0 - x0, y + h / 2.0 - y0
+        fx, fy, fw, fh = min(found, key=lambda f: (f[0] + f[2] / 2.0 - cx) ** 2 + (f[1] + f[3] / 2.0 - cy) ** 2)
+        return fx + x0, fy + y0, fw, fh
+
+    def detect_rgb(self, frame: np.ndarray) -> np.ndarray:
+        """Detect faces in an RGB (or grayscale) frame."""
+        return self.detect(to_gray(frame))
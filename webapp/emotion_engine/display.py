@@ -0,0 +1,132 @@
+"""
+Display path for the live view: downscale, annotate, JPEG-encode and rate-limit frames.
+
+Configure it with EMOTION_DISPLAY_WIDTH (0 keeps the capture resolution),
+EMOTION_DISPLAY_JPEG_QUALITY and EMOTION_DISPLAY_FPS. Compare the cost with `st.image`:
+    python -m emotion_engine.display frame.jpg --width 640 --quality 75
+"""
+
+import argparse
+import io
+import os
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from .pipeline import RateMeter
+
+DISPLAY_WIDTH = int(os.environ.get("EMOTION_DISPLAY_WIDTH", "640"))
+DISPLAY_JPEG_QUALITY = int(os.environ.get("EMOTION_DISPLAY_JPEG_QUALITY", "75"))
+DISPLAY_FPS = float(os.environ.get("EMOTION_DISPLAY_FPS", "15"))
+
+
+def scale_box(box, scale: float) -> tuple:
+    """Map an (x, y, w, h) box from capture to display coordinates."""
+    return tuple(int(round(v * scale)) for v in box)
+
+
+class FramePublisher:
+    """Turn captured BGR frames into JPEG bytes at the display size, at most `fps` times a second."""
+
+    def __init__(self, width: int = DISPLAY_WIDTH, quality: int = DISPLAY_JPEG_QUALITY, fps: float = DISPLAY_FPS,
+                 history: int = 120):
+        self.width = max(0, int(width))
+        self.quality = int(np.clip(quality, 1, 100))
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.rate = RateMeter()
+        self.published = 0
+        self._next = 0.0
+        self._sizes = deque(maxlen=history)
+        self._encode_ms = deque(maxlen=history)
+
+    def wait(self):
+        """Sleep until the next publish slot; the caller then takes the newest frame."""
+        now = time.perf_counter()
+        if self._next > now:
+            time.sleep(self._next - now)
+            now = self._next
+        # keep the cadence when on time, but never bank slots to catch up after a slow frame
+        self._next = max(self._next + self.interval, now)
+
+    def prepare(self, frame_bgr: np.ndarray):
+        """(display-sized copy of the frame to draw on, capture-to-display scale)."""
+        h, w = frame_bgr.shape[:2]
+        if not self.width or w <= self.width:
+            return frame_bgr.copy(), 1.0
+        scale = self.width / w
+        return cv2.resize(frame_bgr, (self.width, max(1, round(h * scale))), interpolation=cv2.INTER_AREA), scale
+
+    def encode(self, frame_bgr: np.ndarray) -> bytes:
+        start = time.perf_counter()
+        ok, buf = cv2.imencode(".jpg", frame_bgr, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise ValueError("JPEG encoding failed")
+        self._encode_ms.append((time.perf_counter() - start) * 1000.0)
+        self._sizes.append(buf.size)
+        self.published += 1
+        self.rate.tick()
+        return buf.tobytes()
+
+    # ── Metrics ───────────────────────────────────────────────
+    def stats(self) -> dict:
+        return {
+            "published": self.published,
+            "publish_fps": self.rate.rate,
+            "kb_per_frame": float(np.mean(self._sizes)) / 1024.0 if self._sizes else 0.0,
+            "encode_ms": float(np.median(self._encode_ms)) if self._encode_ms else 0.0,
+        }
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return (f"Published {stats['publish_fps']:.0f} fps · {stats['kb_per_frame']:.0f} KB/frame "
+                f"({stats['kb_per_frame'] * stats['publish_fps'] * 8 / 1024:.1f} Mbit/s) · "
+                f"encode {stats['encode_ms']:.1f} ms")
+
+
+# ─────────────────────────────────────────────────────────────
+# Old vs new display path
+# ─────────────────────────────────────────────────────────────
+def legacy_publish(frame_bgr: np.ndarray) -> bytes:
+    """What `st.image(rgb_frame)` did per frame: full-resolution RGB copy, PIL, quality-100 JPEG."""
+    from PIL import Image
+
+    rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+    out = io.BytesIO()
+    Image.fromarray(rgb.astype(np.uint8)).save(out, format="JPEG", quality=100)
+    return out.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("image", help="A captured frame (any size; e.g. a webcam still)")
+    parser.add_argument("--width", type=int, default=DISPLAY_WIDTH)
+    parser.add_argument("--quality", type=int, default=DISPLAY_JPEG_QUALITY)
+    parser.add_argument("--fps", type=float, default=DISPLAY_FPS, help="Publish rate used for the bandwidth estimate")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    frame = cv2.imread(args.image)
+    if frame is None:
+        raise SystemExit(f"Could not read {args.image}")
+    publisher = FramePublisher(args.width, args.quality, fps=0)
+
+    def publish(f):
+        small, _ = publisher.prepare(f)
+        return publisher.encode(small)
+
+    print(f"{frame.shape[1]}x{frame.shape[0]} frame, {args.fps:g} fps")
+    print(f"{'path':>8} {'ms/frame':>9} {'KB/frame':>9} {'Mbit/s':>7}")
+    for name, fn in (("legacy", legacy_publish), ("display", publish)):
+        fn(frame)
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            data = fn(frame)
+        ms = (time.perf_counter() - start) * 1000.0 / args.repeats
+        kb = len(data) / 1024.0
+        print(f"{name:>8} {ms:>9.2f} {kb:>9.1f} {kb * args.fps * 8 / 1024:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Early-exit serving for MobileNetV2 models with auxiliary classifier heads.
+
+`emotion_engine.training.early_exit` adds copies of the notebook's head
+(GlobalAveragePooling → Dense → softmax) on intermediate inverted-residual blocks and
+saves one multi-output artifact: `[exit_1, ..., exit_k, final]`. Here that model is
+cut at the exit blocks into consecutive stages. Each face runs stage by stage and
+leaves at the first head whose top-1 probability clears that exit's threshold, so
+easy faces pay only for the blocks they actually need.
+
+Serve it with EMOTION_BACKEND=early_exit (the thresholds come from the artifact's
+metadata; override them with EMOTION_EXIT_THRESHOLDS="0.9,0.85,0.8" or one value for
+all exits). Benchmark exit depths, accuracy and latency on model/test with:
+    python -m emotion_engine.early_exit --model ../model/mod_my_model01_exits.keras --sweep 0.6 0.7 0.8 0.9
+"""
+
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+
+from .config import IMG_SIZE
+from .metadata import load_metadata
+
+# Comma-separated per-exit confidence thresholds (one value applies to every exit)
+EXIT_THRESHOLDS = os.environ.get("EMOTION_EXIT_THRESHOLDS")
+
+
+def parse_thresholds(value, exits: int) -> list:
+    """Per-exit thresholds from a comma-separated string or a list; one value is broadcast."""
+    if isinstance(value, str):
+        value = [float(v) for v in value.split(",") if v.strip()]
+    value = [float(v) for v in value]
+    if len(value) == 1:
+        value = value * exits
+    if len(value) != exits:
+        raise ValueError(f"Expected 1 or {exits} exit thresholds, got {len(value)}")
+    return value
+
+
+def _inputs(layer):
+    inputs = layer.input
+    return inputs if isinstance(inputs, (list, tuple)) else [inputs]
+
+
+def split_stages(model, exits: list) -> list:
+    """Cut a multi-output early-exit model into consecutive stage models.
+
+    Stage k maps the output of exit block k-1 (the image for k = 0) to
+    `(exit block k output, exit head k probabilities)`; the last stage maps the last
+    exit block to the final head. Each exit block must be the only tensor the later
+    layers depend on.
+    """
+    from tensorflow import keras
+
+    blocks = [model.get_layer(name).output for name in exits]
+    heads = list(model.outputs)
+    stages = []
+    start = model.input
+    for k in range(len(exits) + 1):
+        stage_input = keras.Input(start.shape[1:], name=f"stage_{k}_input")
+        tensors = {start.name: stage_input}
+        for layer in model.layers:
+            inputs = _inputs(layer)
+            if not inputs or layer.output.name in tensors or not all(t.name in tensors for t in inputs):
+                continue
+            args = [tensors[t.name] for t in inputs]
+            tensors[layer.output.name] = layer(args if isinstance(layer.input, (list, tuple)) else args[0])
+        wanted = [blocks[k], heads[k]] if k < len(exits) else [heads[k]]
+        missing = [t.name for t in wanted if t.name not in tensors]
+        if missing:
+            raise ValueError(f"Stage {k} depends on tensors from before {start.name}; pick other exit blocks")
+        outputs = [tensors[t.name] for t in wanted]
+        stages.append(keras.Model(stage_input, outputs if len(outputs) > 1 else outputs[0], name=f"stage_{k}"))
+        if k < len(exits):
+            start = blocks[k]
+    return stages
+
+
+class EarlyExitPredictor:
+    """Run stage by stage; each face returns the probabilities of the first confident exit."""
+
+    def __init__(self, model, exits: list, thresholds, img_size: int = IMG_SIZE):
+        import tensorflow as tf
+
+        self.model = model
+        self.exits = list(exits)
+        self.thresholds = parse_thresholds(thresholds, len(self.exits))
+        self.img_size = img_size
+        self.stages = split_stages(model, self.exits)
+        self._serve = []
+        for k, stage in enumerate(self.stages):
+            dtype = tf.uint8 if k == 0 else tf.float32
+            spec = tf.TensorSpec([None, *stage.input.shape[1:]], dtype)
+            self._serve.append(tf.function(self._runner(stage, normalize=k == 0), input_signature=[spec]))
+        self.last_depths = np.zeros(0, dtype=np.int32)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @staticmethod
+    def _runner(stage, normalize: bool):
+        import tensorflow as tf
+
+        def run(x):
+            if normalize:
+                x = tf.cast(x, tf.float32) / 255.0
+            return stage(x, training=False)
+
+        return run
+
+    def reset_stats(self):
+        self.faces = 0
+        self.exit_counts = np.zeros(len(self.exits) + 1, dtype=np.int64)
+        self.seconds = 0.0
+
+    def warmup(self, batch_size: int = 1):
+        # no face may exit during warm-up, so every stage gets traced
+        thresholds, self.thresholds = self.thresholds, [np.inf] * len(self.exits)
+        try:
+            self.predict_batch(np.zeros((batch_size, self.img_size, self.img_size, 3), dtype=np.uint8))
+        finally:
+            self.thresholds = thresholds
+        self.reset_stats()
+        return self
+
+    def predict_batch(self, batch: np.ndarray) -> np.ndarray:
+        """Return (N, classes) probabilities for a uint8 (N, H, W, 3) batch."""
+        start = time.perf_counter()
+        n = len(batch)
+        probs = None
+        depths = np.full(n, len(self.exits), dtype=np.int32)
+        pending = np.arange(n)
+        x = batch
+        for k, serve in enumerate(self._serve):
+            if k == len(self.exits):
+                head = serve(x).numpy()
+                exiting = np.ones(len(pending), dtype=bool)
+            else:
+                features, head = serve(x)
+                head = head.numpy()
+                exiting = head.max(axis=1) >= self.thresholds[k]
+            if probs is None:
+                probs = np.empty((n, head.shape[1]), dtype=np.float32)
+            probs[pending[exiting]] = head[exiting]
+            depths[pending[exiting]] = k
+            pending = pending[~exiting]
+            if not len(pending):
+                break
+            x = features.numpy()[~exiting]
+        with self._lock:
+            self.faces += n
+            self.exit_counts += np.bincount(depths, minlength=len(self.exit_counts))
+            self.seconds += time.perf_counter() - start
+            self.last_depths = depths
+        return probs
+
+    def stats(self) -> dict:
+        with self._lock:
+            faces = max(self.faces, 1)
+            return {
+                "faces": self.faces,
+                "exit_rates": (self.exit_counts / faces).tolist(),
+                "ms_per_face": self.seconds * 1000.0 / faces,
+            }
+
+    def summary(self) -> str:
+        stats = self.stats()
+        rates = "/".join(f"{r:.0%}" for r in stats["exit_rates"])
+        return f"Exits {rates} of {stats['faces']} faces · {stats['ms_per_face']:.1f} ms/face"
+
+
+def load_early_exit(path: str, img_size: int = None, thresholds=None) -> EarlyExitPredictor:
+    from .engine import load_keras_model
+    from .metadata import model_input_size
+
+    meta = load_metadata(path)
+    if "exits" not in meta:
+        raise ValueError(f"{path} has no early-exit metadata; train it with emotion_engine.training.early_exit")
+    model = load_keras_model(path)
+    thresholds = thresholds or EXIT_THRESHOLDS or meta.get("thresholds", [0.8])
+    return EarlyExitPredictor(model, meta["exits"], thresholds, img_size or model_input_size(model, IMG_SIZE))
+
+
+# ─────────────────────────────────────────────────────────────
+# Exit-depth benchmark on model/test
+# ─────────────────────────────────────────────────────────────
+def all_exit_probs(predictor: EarlyExitPredictor, images: np.ndarray, batch_size: int = 64) -> list:
+    """Probabilities of every head (exits then final) for every image, in one pass per batch."""
+    from .preprocessing import resize_batch
+
+    per_head = [[] for _ in predictor.stages]
+    for i in range(0, len(images), batch_size):
+        x = resize_batch(images[i : i + batch_size], predictor.img_size)
+        for k, serve in enumerate(predictor._serve):
+            if k == len(predictor.exits):
+                per_head[k].append(serve(x).numpy())
+            else:
+                x, head = serve(x)
+                per_head[k].append(head.numpy())
+    return [np.concatenate(p) for p in per_head]
+
+
+def exit_depths(head_probs: list, thresholds: list) -> np.ndarray:
+    """Index of the first head whose confidence clears its threshold (the final head otherwise)."""
+    depths = np.full(len(head_probs[0]), len(thresholds), dtype=np.int32)
+    for k in reversed(range(len(thresholds))):
+        depths[head_probs[k].max(axis=1) >= thresholds[k]] = k
+    return depths
+
+
+def sweep(head_probs: list, labels: np.ndarray, threshold_sets: list, head_macs: list) -> list:
+    """Exit distribution, accuracy and average MACs per face for each threshold setting."""
+    stacked = np.stack([p.argmax(axis=1) for p in head_probs])
+    rows = []
+    for thresholds in threshold_sets:
+        depths = exit_depths(head_probs, thresholds)
+        pred = stacked[depths, np.arange(len(depths))]
+        rows.append({
+            "thresholds": thresholds,
+            "exit_rates": np.bincount(depths, minlength=len(head_probs)) / len(depths),
+            "accuracy": float(np.mean(pred == labels)),
+            "mmacs": float(np.mean(np.asarray(head_macs)[depths])) / 1e6,
+        })
+    return rows
+
+
+def head_macs(model) -> list:
+    """MACs per face of the backbone up to each head plus the head itself."""
+    from tensorflow import keras
+
+    from .training.models import estimate_macs
+
+    return [estimate_macs(keras.Model(model.input, output)) for output in model.outputs]
+
+
+def report(predictor: EarlyExitPredictor, images: np.ndarray, labels: np.ndarray, threshold_sets: list,
+           latency_samples: int = 200, seed: int = 1):
+    from .latency import percentiles
+    from .packed import sample_rows
+    from .preprocessing import resize_batch
+
+    names = [*predictor.exits, "final"]
+    probs = all_exit_probs(predictor, images)
+    macs = head_macs(predictor.model)
+    print(f"{len(labels)} test faces · heads: " + ", ".join(
+        f"{name} {np.mean(p.argmax(1) == labels):.4f} @ {m / 1e6:.0f} MMACs" for name, p, m in zip(names, probs, macs)))
+    full_acc = float(np.mean(probs[-1].argmax(1) == labels))
+    print(f"{'thresholds':<18} " + " ".join(f"{'exit ' + str(k):>7}" for k in range(len(names) - 1)) +
+          f" {'final':>7} {'MMACs':>7} {'accuracy':>9} {'vs final':>9}")
+    for r in sweep(probs, labels, threshold_sets, macs):
+        print(f"{','.join(f'{t:g}' for t in r['thresholds']):<18} " +
+              " ".join(f"{rate:>7.1%}" for rate in r["exit_rates"]) +
+              f" {r['mmacs']:>7.0f} {r['accuracy']:>9.4f} {r['accuracy'] - full_acc:>+9.4f}")
+
+    # measured single-face latency with the predictor's own thresholds, grouped by exit depth
+    rows = sample_rows(len(images), latency_samples, seed=seed)
+    singles = [resize_batch(images[i : i + 1], predictor.img_size) for i in rows]
+    for settings in ([np.inf] * len(predictor.exits), predictor.thresholds):
+        kept, predictor.thresholds = predictor.thresholds, settings
+        samples, depths = [], []
+        for batch in singles:
+            start = time.perf_counter()
+            predictor.predict_batch(batch)
+            samples.append((time.perf_counter() - start) * 1000.0)
+            depths.append(int(predictor.last_depths[0]))
+        predictor.thresholds = kept
+        samples, depths = np.asarray(samples), np.asarray(depths)
+        label = "no early exit" if np.isinf(settings[0]) else "thresholds " + ",".join(f"{t:g}" for t in settings)
+        overall = percentiles(samples)
+        by_depth = " · ".join(f"{names[d]} {np.median(samples[depths == d]):.2f} ms (n={np.sum(depths == d)})"
+                              for d in np.unique(depths))
+        print(f"{label}: p50 {overall['p50']:.2f} ms, p95 {overall['p95']:.2f} ms, mean {overall['mean']:.2f} ms"
+              f" | {by_depth}")
+
+
+def main(argv=None):
+    from .packed import packed_split, sample_rows
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", required=True, help="Early-exit Keras model")
+    parser.add_argument("--thresholds", default=None, help="Comma-separated thresholds to time (default: metadata)")
+    parser.add_argument("--sweep", type=float, nargs="+", default=[0.5, 0.6, 0.7, 0.8, 0.9, 0.95],
+                        help="Uniform thresholds to evaluate")
+    parser.add_argument("--limit", type=int, default=None, help="Score a fixed random subset of the test set")
+    parser.add_argument("--latency-samples", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    predictor = load_early_exit(args.model, thresholds=args.thresholds).warmup()
+    test = packed_split("test")
+    rows = sample_rows(len(test), args.limit)
+    images, labels = test.images[rows], np.asarray(test.labels[rows], dtype=np.int32)
+    threshold_sets = [[t] * len(predictor.exits) for t in args.sweep] + [predictor.thresholds]
+    report(predictor, images, labels, threshold_sets, args.latency_samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+EmotionEngine: detect every face in a frame and classify all of them in one forward pass.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .config import BACKEND, EMOTION_LABELS, IMG_SIZE, find_model_path
+from .detection import FaceDetector
+from .metadata import model_input_size
+from .preprocessing import crop_faces, resize_batch
+from .serving import KerasPredictor
+
+
+@dataclass
+class FacePrediction:
+    """Classification result for one face."""
+
+    box: tuple
+    emotion: str
+    confidence: float
+    probabilities: np.ndarray
+
+    @property
+    def all_predictions(self) -> dict:
+        return {label: float(p) for label, p in zip(EMOTION_LABELS, self.probabilities)}
+
+
+def decode_prediction(probs: np.ndarray, labels=EMOTION_LABELS):
+    """Turn one probability vector into (emotion, confidence, {label: probability})."""
+    idx = int(np.argmax(probs))
+    all_predictions = {labels[i]: float(probs[i]) for i in range(len(labels))}
+    return labels[idx], float(probs[idx]), all_predictions
+
+
+def load_keras_model(path: str = None):
+    """Load the trained Keras model from disk."""
+    from tensorflow import keras
+
+    return keras.models.load_model(path or find_model_path())
+
+
+class EmotionEngine:
+    """Headless face detection + batched emotion classification.
+
+    `model` is either a Keras model (served through `KerasPredictor`) or any object
+    exposing `predict_batch(uint8 batch) -> probabilities`.
+    """
+
+    def __init__(self, model, detector: FaceDetector = None, img_size: int = None, labels=EMOTION_LABELS):
+        self.model = model
+        if hasattr(model, "predict_batch"):
+            self.predictor = model
+        else:
+            self.predictor = KerasPredictor(model, img_size or model_input_size(model, IMG_SIZE))
+        self.detector = detector or FaceDetector()
+        # faces are resized to whatever the model was built for
+        self.img_size = img_size or getattr(self.predictor, "img_size", IMG_SIZE)
+        self.labels = labels
+
+    @classmethod
+    def from_path(cls, path: str = None, backend: str = BACKEND, **kwargs):
+        from .backends import load_predictor
+
+        predictor = load_predictor(backend, path, kwargs.get("img_size"))
+        return cls(predictor, **kwargs)
+
+    # ── Classification ────────────────────────────────────────
+    def predict_batch(self, batch: np.ndarray) -> np.ndarray:
+        """Run one forward pass on a uint8 (N, H, W, 3) batch; return (N, classes) probabilities."""
+        if len(batch) == 0:
+            return np.empty((0, len(self.labels)), dtype=np.float32)
+        return self.predictor.predict_batch(batch)
+
+    def predict_crops(self, crops) -> np.ndarray:
+        """Classify a list of RGB face crops in a single batch."""
+        return self.predict_batch(resize_batch(crops, self.img_size))
+
+    def classify(self, frame: np.ndarray, boxes) -> list:
+        """Classify the given face boxes of an RGB frame."""
+        boxes = [tuple(int(v) for v in box) for box in boxes]
+        probs = self.predict_crops(crop_faces(frame, boxes))
+        results = []
+        for box, p in zip(boxes, probs):
+            emotion, confidence, _ = decode_prediction(p, self.labels)
+            results.append(FacePrediction(box, emotion, confidence, p))
+        return results
+
+    # ── Detection + classification ────────────────────────────
+    def detect(self, frame: np.ndarray) -> np.ndarray:
+        """Detect faces in an RGB frame."""
+        return self.detector.detect_rgb(frame)
+
+    def analyze(self, frame: np.ndarray) -> list:
+        """Detect every face in an RGB frame and classify them all in one batch."""
+        return self.classify(frame, self.detect(frame))
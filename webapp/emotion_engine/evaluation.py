@@ -0,0 +1,43 @@
+"""
+Accuracy evaluation of any predictor against a labelled image tree or a packed split.
+"""
+
+import numpy as np
+
+from .datasets import load_image_rgb
+from .preprocessing import resize_batch
+
+
+def iter_batches(items, img_size: int, batch_size: int = 32):
+    """Yield (uint8 batch, labels) from (path, label) pairs."""
+    for start in range(0, len(items), batch_size):
+        chunk = items[start : start + batch_size]
+        batch = resize_batch([load_image_rgb(path) for path, _ in chunk], img_size)
+        yield batch, np.array([label for _, label in chunk], dtype=np.int32)
+
+
+def predict_items(predictor, items, img_size: int, batch_size: int = 32):
+    """Return (predicted labels, true labels) for (path, label) pairs."""
+    preds, labels = [], []
+    for batch, y in iter_batches(items, img_size, batch_size):
+        preds.append(np.argmax(predictor.predict_batch(batch), axis=1))
+        labels.append(y)
+    if not preds:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32)
+    return np.concatenate(preds), np.concatenate(labels)
+
+
+def predict_arrays(predictor, images: np.ndarray, labels: np.ndarray, img_size: int, batch_size: int = 32):
+    """Return (predicted labels, true labels) for in-memory or memory-mapped uint8 images."""
+    preds = []
+    for start in range(0, len(images), batch_size):
+        preds.append(np.argmax(predictor.predict_batch(resize_batch(images[start : start + batch_size], img_size)), axis=1))
+    if not preds:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32)
+    return np.concatenate(preds), np.asarray(labels, dtype=np.int32)
+
+
+def evaluate_accuracy(predictor, items, img_size: int, batch_size: int = 32) -> float:
+    """Top-1 accuracy of `predictor` on (path, label) pairs."""
+    preds, labels = predict_items(predictor, items, img_size, batch_size)
+    return float(np.mean(preds == labels)) if len(labels) else 0.0
@@ -0,0 +1,69 @@
+"""
+Export the Keras emotion model to ONNX for the `onnxruntime` backend.
+
+Normalization is folded into the graph, so the exported model takes raw uint8
+(N, H, W, 3) pixels like every other predictor. Requires `tf2onnx`.
+
+Usage (from the webapp directory):
+    python -m emotion_engine.export_onnx --eval-limit 1000
+"""
+
+import argparse
+import os
+
+from .config import IMG_SIZE, TEST_DIR, find_model_path
+from .datasets import sample_labeled_images
+from .engine import load_keras_model
+from .evaluation import evaluate_accuracy
+from .metadata import artifact_img_size, copy_metadata
+from .onnxrt import OnnxRuntimePredictor
+from .serving import KerasPredictor
+
+
+def convert(model, output_path: str, img_size: int = IMG_SIZE, opset: int = 17):
+    """Write an ONNX model taking uint8 pixels and returning class probabilities."""
+    import tensorflow as tf
+
+    try:
+        import tf2onnx
+    except ImportError as e:
+        raise ImportError("ONNX export needs tf2onnx: pip install -r requirements-backends.txt") from e
+
+    signature = (tf.TensorSpec([None, img_size, img_size, 3], tf.uint8, name="pixels"),)
+
+    @tf.function(input_signature=signature)
+    def serve(pixels):
+        return model(tf.cast(pixels, tf.float32) / 255.0, training=False)
+
+    tf2onnx.convert.from_function(serve, input_signature=signature, opset=opset, output_path=output_path)
+    return output_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=None, help="Keras model path (default: auto-discovered)")
+    parser.add_argument("--output", default=None, help="Output .onnx path (default: next to the model)")
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--test-dir", default=TEST_DIR)
+    parser.add_argument("--eval-limit", type=int, default=500, help="Test images used for the accuracy check")
+    parser.add_argument("--img-size", type=int, default=None, help="Override the model's input size")
+    args = parser.parse_args(argv)
+
+    model_path = args.model or find_model_path()
+    output = args.output or os.path.splitext(model_path)[0] + ".onnx"
+    model = load_keras_model(model_path)
+    img_size = args.img_size or artifact_img_size(model_path, model)
+    convert(model, output, img_size, args.opset)
+    copy_metadata(model_path, output, img_size, backend="onnxruntime")
+    print(f"Wrote {output} ({os.path.getsize(output) / 1e6:.1f} MB)")
+
+    items = sample_labeled_images(args.test_dir, args.eval_limit, seed=1)
+    if items:
+        keras_acc = evaluate_accuracy(KerasPredictor(model, img_size).warmup(), items, img_size)
+        onnx_acc = evaluate_accuracy(OnnxRuntimePredictor(output).warmup(), items, img_size)
+        print(f"accuracy on {len(items)} test images: keras {keras_acc:.4f}, onnxruntime {onnx_acc:.4f}")
+    return output
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Export the Keras emotion model to float16 and full-int8 TensorFlow Lite models.
+
+Int8 calibration uses a representative sample drawn from model/train; both exports
+are then scored on model/test next to the Keras model so the accuracy cost of the
+speed-up is visible.
+
+Usage (from the webapp directory):
+    python -m emotion_engine.export_tflite --calib-samples 500 --eval-limit 2000
+"""
+
+import argparse
+import os
+import time
+
+from .config import IMG_SIZE, TEST_DIR, TRAIN_DIR, find_model_path
+from .datasets import load_image_rgb, sample_labeled_images
+from .engine import load_keras_model
+from .evaluation import evaluate_accuracy
+from .metadata import artifact_img_size, copy_metadata
+from .preprocessing import normalize_batch, resize_batch
+from .serving import KerasPredictor
+from .tflite import TFLitePredictor
+
+QUANTIZATIONS = ("float16", "int8")
+
+
+def representative_dataset(items, img_size: int):
+    """Calibration generator yielding normalized single-image batches."""
+
+    def gen():
+        for path, _ in items:
+            yield [normalize_batch(resize_batch([load_image_rgb(path)], img_size))]
+
+    return gen
+
+
+def convert(model, quantization: str, calib_items=None, img_size: int = IMG_SIZE) -> bytes:
+    """Convert a Keras model to a `.tflite` flatbuffer with the given quantization."""
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        if not calib_items:
+            raise ValueError("int8 export needs calibration images")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset(calib_items, img_size)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.uint8
+        converter.inference_output_type = tf.uint8
+    elif quantization != "float32":
+        raise ValueError(f"Unknown quantization: {quantization}")
+    return converter.convert()
+
+
+def export_path(model_path: str, quantization: str, out_dir: str = None) -> str:
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(out_dir or os.path.dirname(os.path.abspath(model_path)), f"{stem}_{quantization}.tflite")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=None, help="Keras model path (default: auto-discovered)")
+    parser.add_argument("--out-dir", default=None, help="Output directory (default: next to the model)")
+    parser.add_argument("--quantization", nargs="+", choices=QUANTIZATIONS, default=list(QUANTIZATIONS))
+    parser.add_argument("--train-dir", default=TRAIN_DIR, help="Images used for int8 calibration")
+    parser.add_argument("--calib-samples", type=int, default=300)
+    parser.add_argument("--test-dir", default=TEST_DIR, help="Images used for the accuracy comparison")
+    parser.add_argument("--eval-limit", type=int, default=None, help="Score only a sample of the test set")
+    parser.add_argument("--img-size", type=int, default=None, help="Override the model's input size")
+    args = parser.parse_args(argv)
+
+    model_path = args.model or find_model_path()
+    model = load_keras_model(model_path)
+    img_size = args.img_size or artifact_img_size(model_path, model)
+    calib_items = sample_labeled_images(args.train_dir, args.calib_samples, seed=0)
+    test_items = sample_labeled_images(args.test_dir, args.eval_limit, seed=1)
+
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+    exported = {}
+    for quantization in args.quantization:
+        start = time.perf_counter()
+        flatbuffer = convert(model, quantization, calib_items, img_size)
+        path = export_path(model_path, quantization, args.out_dir)
+        with open(path, "wb") as f:
+            f.write(flatbuffer)
+        copy_metadata(model_path, path, img_size, backend="tflite", quantization=quantization)
+        exported[quantization] = path
+        print(
+            f"Wrote {path} ({len(flatbuffer) / 1e6:.1f} MB) in {time.perf_counter() - start:.1f}s"
+        )
+
+    if not test_items:
+        print(f"No test images found in {args.test_dir}; skipping accuracy comparison")
+        return exported
+
+    print(f"Scoring on {len(test_items)} images from {args.test_dir}")
+    base_acc = evaluate_accuracy(KerasPredictor(model, img_size).warmup(), test_items, img_size)
+    print(f"{'model':<10} {'size MB':>8} {'accuracy':>9} {'delta':>8}")
+    print(f"{'keras':<10} {os.path.getsize(model_path) / 1e6:>8.1f} {base_acc:>9.4f} {0.0:>+8.4f}")
+    for quantization, path in exported.items():
+        acc = evaluate_accuracy(TFLitePredictor(path), test_items, img_size)
+        print(f"{quantization:<10} {os.path.getsize(path) / 1e6:>8.1f} {acc:>9.4f} {acc - base_acc:>+8.4f}")
+    return exported
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Single-image latency: compiled serving function vs `model.predict`.
+
+Usage (from the webapp directory):
+    python -m emotion_engine.latency --model ../model/mod_my_model01.keras --limit 300
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from .config import TEST_DIR, find_model_path
+from .datasets import load_image_rgb, sample_labeled_images
+from .engine import load_keras_model
+from .metadata import artifact_img_size
+from .preprocessing import resize_batch
+from .serving import KerasPredictor
+
+
+def percentiles(samples_ms):
+    arr = np.asarray(samples_ms)
+    return {
+        "p50": float(np.percentile(arr, 50)),
+        "p95": float(np.percentile(arr, 95)),
+        "p99": float(np.percentile(arr, 99)),
+        "mean": float(arr.mean()),
+    }
+
+
+def time_single_images(predictor, batches) -> list:
+    """Time predict_batch on each (1, H, W, 3) batch; return milliseconds per call."""
+    samples = []
+    for batch in batches:
+        start = time.perf_counter()
+        predictor.predict_batch(batch)
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=None, help="Keras model path (default: auto-discovered)")
+    parser.add_argument("--images", default=TEST_DIR, help="Image tree laid out as <class>/<image>")
+    parser.add_argument("--limit", type=int, default=200, help="Number of test images to time")
+    parser.add_argument("--img-size", type=int, default=None, help="Override the model's input size")
+    args = parser.parse_args(argv)
+
+    model_path = args.model or find_model_path()
+    model = load_keras_model(model_path)
+    img_size = args.img_size or artifact_img_size(model_path, model)
+    items = sample_labeled_images(args.images, args.limit)
+    batches = [resize_batch([load_image_rgb(path)], img_size) for path, _ in items]
+    print(f"Timing {len(batches)} single-image requests from {args.images}")
+
+    results = {}
+    for mode in ("predict", "compiled"):
+        predictor = KerasPredictor(model, img_size, mode=mode).warmup()
+        results[mode] = percentiles(time_single_images(predictor, batches))
+
+    print(f"{'mode':<10} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9}")
+    for mode, stats in results.items():
+        print(f"{mode:<10} {stats['p50']:>9.2f} {stats['p99']:>9.2f} {stats['mean']:>9.2f}")
+    speedup = results["predict"]["p50"] / max(results["compiled"]["p50"], 1e-9)
+    print(f"compiled p50 speed-up over model.predict: {speedup:.1f}x")
+    return results
+
+
+if __name__ == "__main__":
+    main()
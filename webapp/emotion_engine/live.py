@@ -0,0 +1,118 @@
+"""
+Per-frame analysis for live video: track faces and periodically classify them.
+"""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from .change import ChangeGate, crop_descriptor
+from .engine import EmotionEngine, FacePrediction, decode_prediction
+from .preprocessing import to_gray
+from .scheduler import AdaptiveScheduler
+from .tracking import FaceTracker
+
+
+@dataclass
+class LiveFace:
+    """A tracked face and its most recent prediction (None until first classified)."""
+
+    track_id: int
+    box: tuple
+    prediction: FacePrediction = None
+
+
+class LiveAnalyzer:
+    """Detect-then-track faces and classify all tracked faces periodically.
+
+    Without a scheduler, faces are classified every `classify_every` frames and the
+    tracker keeps its own detection interval. With an `AdaptiveScheduler`, both
+    intervals follow the scheduler's decisions and every stage is timed for it.
+    On a classification frame, only tracks whose crop changed (per `ChangeGate`)
+    go through the model; the rest keep their smoothed previous prediction.
+    """
+
+    def __init__(
+        self,
+        engine: EmotionEngine,
+        tracker: FaceTracker = None,
+        classify_every: int = 5,
+        scheduler: AdaptiveScheduler = None,
+        gate: ChangeGate = None,
+    ):
+        self.engine = engine
+        self.tracker = tracker or FaceTracker(engine.detector)
+        self.classify_every = max(1, classify_every)
+        self.scheduler = scheduler
+        self.gate = gate or ChangeGate()
+        self.predictions = {}  # track id -> FacePrediction
+        self.frame_index = 0
+        self.model_calls = 0
+        self.faces_inferred = 0
+        self.faces_reused = 0
+        self.started_at = time.perf_counter()
+
+    def _due(self, tracks) -> bool:
+        if not tracks:
+            return False
+        if self.scheduler is not None:
+            return self.scheduler.should_classify()
+        return self.frame_index % self.classify_every == 0
+
+    def process(self, frame_rgb: np.ndarray, gray: np.ndarray = None) -> list:
+        """Analyze one RGB frame; return a LiveFace per tracked face."""
+        if self.scheduler is not None:
+            self.tracker.detect_every = self.scheduler.detect_every
+        if gray is None:
+            gray = to_gray(frame_rgb)
+        start = time.perf_counter()
+        tracks = self.tracker.update(gray)
+        if self.scheduler is not None:
+            elapsed = time.perf_counter() - start
+            if self.tracker.last_detected:
+                self.scheduler.record_detect(elapsed)
+            else:
+                self.scheduler.record_track(elapsed)
+
+        if self._due(tracks):
+            self._classify(frame_rgb, gray, tracks)
+        live_ids = {t.track_id for t in tracks}
+        self.predictions = {k: v for k, v in self.predictions.items() if k in live_ids}
+        self.gate.prune(live_ids)
+
+        self.frame_index += 1
+        if self.scheduler is not None:
+            self.scheduler.end_frame()
+        return [LiveFace(t.track_id, tuple(t.box), self.predictions.get(t.track_id)) for t in tracks]
+
+    def _classify(self, frame_rgb: np.ndarray, gray: np.ndarray, tracks):
+        descriptors = {t.track_id: crop_descriptor(gray, t.box) for t in tracks}
+        stale = [t for t in tracks if self.gate.changed(t.track_id, descriptors[t.track_id])]
+        self.faces_reused += len(tracks) - len(stale)
+        if not stale:
+            return
+        # all changed faces go through the model in a single batch
+        start = time.perf_counter()
+        results = self.engine.classify(frame_rgb, [t.box for t in stale])
+        if self.scheduler is not None:
+            self.scheduler.record_infer(time.perf_counter() - start)
+        self.model_calls += 1
+        self.faces_inferred += len(stale)
+        for track, result in zip(stale, results):
+            smoothed = self.gate.update(track.track_id, descriptors[track.track_id], result.probabilities)
+            emotion, confidence, _ = decode_prediction(smoothed, self.engine.labels)
+            self.predictions[track.track_id] = FacePrediction(result.box, emotion, confidence, smoothed)
+
+    @property
+    def model_calls_per_minute(self) -> float:
+        elapsed = time.perf_counter() - self.started_at
+        return self.model_calls * 60.0 / elapsed if elapsed > 0 else 0.0
+
+
+def main_face(faces):
+    """The largest classified face, which drives the summary card."""
+    classified = [f for f in faces if f.prediction is not None]
+    if not classified:
+        return None
+    return max(classified, key=lambda f: f.box[2] * f.box[3])
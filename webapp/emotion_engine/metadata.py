@@ -0,0 +1,63 @@
+"""
+Model metadata stored next to each artifact.
+
+The input size (and anything else the serving side must know about a model) travels
+with the artifact in a `<artifact>.meta.json` sidecar (e.g. `mod_native48.keras.meta.json`) instead of being a global constant,
+so a 224×224 MobileNetV2 and a native 48×48 model can be served by the same code.
+Artifacts without a sidecar fall back to their own input shape, then to IMG_SIZE.
+"""
+
+import json
+import os
+import time
+
+from .config import EMOTION_LABELS, IMG_SIZE
+
+METADATA_SUFFIX = ".meta.json"
+
+
+def metadata_path(artifact_path: str) -> str:
+    return artifact_path + METADATA_SUFFIX
+
+
+def load_metadata(artifact_path: str) -> dict:
+    """Sidecar metadata of an artifact ({} when there is none or it is unreadable)."""
+    try:
+        with open(metadata_path(artifact_path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_metadata(artifact_path: str, img_size: int, **fields) -> str:
+    """Write the sidecar for `artifact_path`; extra keyword fields are stored as given."""
+    meta = {"img_size": int(img_size), "labels": list(EMOTION_LABELS), "created": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+    meta.update(fields)
+    path = metadata_path(artifact_path)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return path
+
+
+def copy_metadata(source_path: str, target_path: str, img_size: int, **fields) -> str:
+    """Carry a source model's metadata over to an export of it."""
+    meta = load_metadata(source_path)
+    meta.pop("created", None)
+    meta.update(fields, source=os.path.basename(source_path))
+    meta.pop("img_size", None)
+    return save_metadata(target_path, img_size, **meta)
+
+
+def model_input_size(model, default=None):
+    """Square input size declared by a Keras model (None/default when it is dynamic)."""
+    shape = getattr(model, "input_shape", None)
+    if isinstance(shape, list):
+        shape = shape[0]
+    if shape and len(shape) == 4 and isinstance(shape[1], int):
+        return shape[1]
+    return default
+
+
+def artifact_img_size(artifact_path: str, model=None, default: int = IMG_SIZE) -> int:
+    """Input size of an artifact: its sidecar, else the loaded model's input shape, else `default`."""
+    return load_metadata(artifact_path).get("img_size") or model_input_size(model, default)
@@ -0,0 +1,48 @@
+"""
+ONNX Runtime inference backend.
+
+Runs an ONNX export of the emotion model on the CPU execution provider behind the
+common `predict_batch(uint8 batch) -> probabilities` contract.
+"""
+
+import os
+
+import numpy as np
+
+from .config import IMG_SIZE
+
+ONNX_THREADS = int(os.environ.get("EMOTION_ONNX_THREADS", "0"))  # 0 lets ONNX Runtime decide
+
+
+class OnnxRuntimePredictor:
+    """Run a `.onnx` emotion classifier on uint8 face batches."""
+
+    def __init__(self, model_path: str, num_threads: int = ONNX_THREADS, providers=("CPUExecutionProvider",),
+                 img_size: int = None):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError(
+                "The onnxruntime backend needs onnxruntime: pip install -r requirements-backends.txt"
+            ) from e
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.model_path = model_path
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=list(providers))
+        self._input = self.session.get_inputs()[0]
+        self._output_name = self.session.get_outputs()[0].name
+        size = self._input.shape[1]
+        self.img_size = size if isinstance(size, int) else (img_size or IMG_SIZE)
+        # exports that fold normalization into the graph take raw uint8 pixels
+        self._raw_uint8 = self._input.type == "tensor(uint8)"
+
+    def warmup(self, batch_size: int = 1):
+        self.predict_batch(np.zeros((batch_size, self.img_size, self.img_size, 3), dtype=np.uint8))
+        return self
+
+    def predict_batch(self, batch: np.ndarray) -> np.ndarray:
+        """Return (N, classes) probabilities for a uint8 (N, H, W, 3) batch."""
+        x = batch if self._raw_uint8 else batch.astype(np.float32) / 255.0
+        return self.session.run([self._output_name], {self._input.name: x})[0]
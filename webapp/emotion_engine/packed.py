@@ -0,0 +1,179 @@
+"""
+Packed, memory-mapped FER splits.
+
+Tens of thousands of tiny JPEGs cost far more in directory listings, file opens
+and JPEG decoding than in pixels. The packer decodes a <split>/<class>/ tree once
+into a single contiguous uint8 array (`images.npy`, shape (N, H, W) grayscale or
+(N, H, W, C)), a label array (`labels.npy`) and a filename index (`index.json`).
+Readers open the arrays with `np.load(mmap_mode="r")`, so loading a whole split is
+zero-copy and takes milliseconds.
+
+`index.json` stores a fingerprint of the source tree (relative path, size and
+mtime of every image); `ensure_packed` rebuilds the pack when it no longer matches.
+
+Usage (from the webapp directory):
+    python -m emotion_engine.packed --splits train test
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+from .config import BASE_DIR, TEST_DIR, TRAIN_DIR
+from .datasets import list_labeled_images
+
+PACK_VERSION = 1
+PACKED_DIR = os.path.join(BASE_DIR, "model", "packed")
+SOURCE_DIRS = {"train": TRAIN_DIR, "test": TEST_DIR}
+
+
+@dataclass
+class PackedSplit:
+    images: np.ndarray  # read-only memmap, (N, H, W) or (N, H, W, C) uint8
+    labels: np.ndarray  # read-only memmap, (N,) uint8
+    filenames: list  # paths relative to the source root
+    meta: dict
+
+    def __len__(self):
+        return len(self.labels)
+
+
+def source_fingerprint(items, root: str) -> str:
+    """SHA-256 over (relative path, size, mtime) of every source image."""
+    h = hashlib.sha256()
+    for path, label in items:
+        st = os.stat(path)
+        h.update(f"{os.path.relpath(path, root)}|{label}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def _read_index(out_dir: str):
+    try:
+        with open(os.path.join(out_dir, "index.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_stale(src_dir: str, out_dir: str, img_size: int = 48, channels: int = 1) -> bool:
+    meta = _read_index(out_dir)
+    if meta is None or meta.get("version") != PACK_VERSION:
+        return True
+    if meta.get("img_size") != img_size or meta.get("channels") != channels:
+        return True
+    return meta.get("fingerprint") != source_fingerprint(list_labeled_images(src_dir), src_dir)
+
+
+def _decode(path: str, img_size: int, channels: int) -> np.ndarray:
+    flag = cv2.IMREAD_GRAYSCALE if channels == 1 else cv2.IMREAD_COLOR
+    img = cv2.imread(path, flag)
+    if img is None:
+        raise IOError(f"Could not read image {path}")
+    if img.shape[:2] != (img_size, img_size):
+        img = cv2.resize(img, (img_size, img_size), interpolation=cv2.INTER_AREA)
+    if channels == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    return img
+
+
+def pack_split(src_dir: str, out_dir: str, img_size: int = 48, channels: int = 1, workers: int = 8) -> PackedSplit:
+    """Decode a <class>/<image> tree into packed arrays under `out_dir` (written atomically)."""
+    items = list_labeled_images(src_dir)
+    shape = (len(items), img_size, img_size) + ((channels,) if channels > 1 else ())
+    tmp_dir = out_dir.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    images = np.lib.format.open_memmap(os.path.join(tmp_dir, "images.npy"), mode="w+", dtype=np.uint8, shape=shape)
+    with ThreadPoolExecutor(workers) as pool:
+        for i, img in enumerate(pool.map(lambda item: _decode(item[0], img_size, channels), items)):
+            images[i] = img
+    images.flush()
+    del images
+    np.save(os.path.join(tmp_dir, "labels.npy"), np.array([label for _, label in items], dtype=np.uint8))
+
+    meta = {
+        "version": PACK_VERSION,
+        "source": os.path.abspath(src_dir),
+        "img_size": img_size,
+        "channels": channels,
+        "count": len(items),
+        "fingerprint": source_fingerprint(items, src_dir),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "filenames": [os.path.relpath(path, src_dir) for path, _ in items],
+    }
+    with open(os.path.join(tmp_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return open_packed(out_dir)
+
+
+def open_packed(out_dir: str) -> PackedSplit:
+    """Memory-map a packed split (no decoding, no per-image file access)."""
+    meta = _read_index(out_dir)
+    if meta is None:
+        raise FileNotFoundError(f"No packed split at {out_dir}")
+    images = np.load(os.path.join(out_dir, "images.npy"), mmap_mode="r")
+    labels = np.load(os.path.join(out_dir, "labels.npy"), mmap_mode="r")
+    filenames = meta.pop("filenames")
+    return PackedSplit(images, labels, filenames, meta)
+
+
+def ensure_packed(src_dir: str, out_dir: str, img_size: int = 48, channels: int = 1) -> PackedSplit:
+    """Open the packed split, (re)building it first if the source images changed."""
+    if is_stale(src_dir, out_dir, img_size, channels):
+        print(f"Packing {src_dir} -> {out_dir}")
+        return pack_split(src_dir, out_dir, img_size, channels)
+    return open_packed(out_dir)
+
+
+def packed_split(split: str, img_size: int = 48, channels: int = 1, check: bool = True) -> PackedSplit:
+    """Packed model/train or model/test; `check=False` skips the source staleness scan."""
+    out_dir = os.path.join(PACKED_DIR, split)
+    if check:
+        return ensure_packed(SOURCE_DIRS[split], out_dir, img_size, channels)
+    return open_packed(out_dir)
+
+
+def sample_rows(count: int, limit=None, seed: int = 0) -> np.ndarray:
+    """Sorted random subset of range(count), so memory-mapped reads stay sequential."""
+    if limit is None or limit >= count:
+        return np.arange(count)
+    return np.sort(np.random.default_rng(seed).choice(count, limit, replace=False))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--splits", nargs="+", choices=sorted(SOURCE_DIRS), default=sorted(SOURCE_DIRS))
+    parser.add_argument("--img-size", type=int, default=48)
+    parser.add_argument("--channels", type=int, choices=(1, 3), default=1)
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the pack is up to date")
+    args = parser.parse_args(argv)
+
+    for split in args.splits:
+        out_dir = os.path.join(PACKED_DIR, split)
+        start = time.perf_counter()
+        if args.force:
+            packed = pack_split(SOURCE_DIRS[split], out_dir, args.img_size, args.channels)
+        else:
+            packed = ensure_packed(SOURCE_DIRS[split], out_dir, args.img_size, args.channels)
+        print(f"{split}: {len(packed)} images {packed.images.shape} ready in {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        reopened = open_packed(out_dir)
+        checksum = int(np.asarray(reopened.labels).sum())
+        print(f"{split}: memory-mapped open in {(time.perf_counter() - start) * 1000:.1f} ms (label sum {checksum})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Threaded capture / inference / render pipeline for live detection.
+
+    capture thread ──► display queue ─────────────► render (caller's thread)
+          └──────────► inference queue ─► worker ─► result queue ──┘
+
+Every queue is bounded and drops its oldest entry when full, so a slow model
+never stalls capture and stale frames never pile up: the capture thread always
+holds the newest frame, the worker always analyzes the newest frame it can get,
+and the render stage draws the newest frame with the newest available result.
+Each frame carries its capture timestamp so frame-to-label latency is measurable.
+An exception in either stage is logged, stored in `error` and stops the pipeline.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FramePacket:
+    frame_id: int
+    captured_at: float
+    frame: np.ndarray
+
+
+@dataclass
+class ResultPacket:
+    frame_id: int
+    captured_at: float
+    finished_at: float
+    result: object
+
+    @property
+    def latency_ms(self) -> float:
+        """Frame-to-label latency: capture time to analysis result."""
+        return (self.finished_at - self.captured_at) * 1000.0
+
+
+def put_latest(q: queue.Queue, item) -> int:
+    """Put `item`, evicting the oldest entries if the queue is full; return how many were dropped."""
+    dropped = 0
+    while True:
+        try:
+            q.put_nowait(item)
+            return dropped
+        except queue.Full:
+            try:
+                q.get_nowait()
+                dropped += 1
+            except queue.Empty:
+                pass
+
+
+class RateMeter:
+    """Events per second over a sliding window of timestamps."""
+
+    def __init__(self, window: int = 60):
+        self._times = deque(maxlen=window)
+
+    def tick(self, now: float = None):
+        self._times.append(time.perf_counter() if now is None else now)
+
+    @property
+    def rate(self) -> float:
+        if len(self._times) < 2:
+            return 0.0
+        span = self._times[-1] - self._times[0]
+        return (len(self._times) - 1) / span if span > 0 else 0.0
+
+
+class LivePipeline:
+    """Run `read()` on a capture thread and `analyze(frame)` on a worker thread.
+
+    `read` returns `(ok, frame)` like `cv2.VideoCapture.read`; `analyze` receives a
+    captured frame and returns any result object. The render stage calls
+    `next_frame()` and `latest_result()` from its own thread.
+    """
+
+    def __init__(self, read, analyze, queue_size: int = 1, latency_window: int = 120):
+        self._read = read
+        self._analyze = analyze
+        self._display_q = queue.Queue(maxsize=queue_size)
+        self._infer_q = queue.Queue(maxsize=queue_size)
+        self._result_q = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._threads = []
+        self._latest_result = None
+        self._latencies = deque(maxlen=latency_window)
+        self.capture_rate = RateMeter()
+        self.inference_rate = RateMeter()
+        self.render_rate = RateMeter()
+        self.dropped_frames = 0
+        self.error = None
+        self.capture_finished = False
+
+    # ── Lifecycle ─────────────────────────────────────────────
+    def start(self):
+        for target, name in ((self._capture_loop, "capture"), (self._inference_loop, "inference")):
+            thread = threading.Thread(target=target, name=f"live-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    @property
+    def running(self) -> bool:
+        return not self._stop.is_set() and not self.capture_finished and self.error is None
+
+    def _fail(self, stage: str, error: Exception):
+        logger.exception("live %s stage failed", stage)
+        self.error = error
+        self._stop.set()
+
+    # ── Stages ────────────────────────────────────────────────
+    def _capture_loop(self):
+        frame_id = 0
+        try:
+            while not self._stop.is_set():
+                ok, frame = self._read()
+                if not ok:
+                    break
+                packet = FramePacket(frame_id, time.perf_counter(), frame)
+                frame_id += 1
+                self.capture_rate.tick(packet.captured_at)
+                put_latest(self._display_q, packet)
+                self.dropped_frames += put_latest(self._infer_q, packet)
+        except Exception as e:
+            self._fail("capture", e)
+        finally:
+            self.capture_finished = True
+
+    def _inference_loop(self):
+        while not self._stop.is_set():
+            try:
+                packet = self._infer_q.get(timeout=0.1)
+            except queue.Empty:
+                if self.capture_finished:
+                    break
+                continue
+            try:
+                result = self._analyze(packet.frame)
+            except Exception as e:
+                self._fail("inference", e)
+                break
+            done = ResultPacket(packet.frame_id, packet.captured_at, time.perf_counter(), result)
+            self.inference_rate.tick(done.finished_at)
+            self._latencies.append(done.latency_ms)
+            put_latest(self._result_q, done)
+
+    # ── Render-side API ───────────────────────────────────────
+    def next_frame(self, timeout: float = 1.0):
+        """Block for the newest captured frame; None on timeout or once capture has ended."""
+        try:
+            packet = self._display_q.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        self.render_rate.tick()
+        return packet
+
+    def latest_result(self):
+        """Newest ResultPacket produced so far (None before the first one)."""
+        try:
+            while True:
+                self._latest_result = self._result_q.get_nowait()
+        except queue.Empty:
+            pass
+        return self._latest_result
+
+    def stats(self) -> dict:
+        latencies = np.asarray(self._latencies) if self._latencies else None
+        return {
+            "capture_fps": self.capture_rate.rate,
+            "inference_fps": self.inference_rate.rate,
+            "render_fps": self.render_rate.rate,
+            "dropped_frames": self.dropped_frames,
+            "latency_p50_ms": float(np.percentile(latencies, 50)) if latencies is not None else None,
+            "latency_p95_ms": float(np.percentile(latencies, 95)) if latencies is not None else None,
+        }
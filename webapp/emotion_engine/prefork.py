@@ -0,0 +1,383 @@
+"""
+Pre-fork serving: one parent process, N HTTP API workers sharing one copy of the weights.
+
+Scaling by running more copies of the container makes every copy load the model
+with `keras.models.load_model`: each one unzips the archive, parses the HDF5 weights
+and holds its own copy of every library. Here one parent prepares everything that can
+be shared and then forks:
+
+1. The Keras artifact is exported once, in a throwaway process, to a flat
+   `weights.bin` plus the model config under model/shared/<artifact version>/.
+2. The parent memory-maps `weights.bin` and imports TensorFlow and the engine modules,
+   but runs no TensorFlow op. Op execution starts the runtime's thread pools, and
+   those do not survive a fork.
+3. It binds the listening socket and forks N workers. The workers inherit the mapping
+   and the imported modules copy-on-write. Each one rebuilds the model from the config
+   with deferred (never allocated) variables and wraps the mapped arrays as tensors
+   through DLPack, so the forward pass reads the weights from the shared page-cache
+   pages. It then serves `emotion_engine.api` on the shared socket, and the kernel
+   spreads the connections across the workers.
+
+Every worker sets its own TensorFlow intra-op thread count (default: cores / workers)
+and uses one inter-op thread, so N workers do not oversubscribe the CPU. Non-Keras
+backends and the fast model of a cascade (EMOTION_CASCADE_MODEL) load per worker.
+
+Usage (from the webapp directory):
+    python -m emotion_engine.prefork --workers 4 --port 8000
+    python -m emotion_engine.prefork --bench 1 2 4 --seconds 20    # throughput and memory per worker count
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import sys
+import time
+
+import numpy as np
+
+from .backends import default_artifact
+from .cache import artifact_version
+from .config import BACKEND, BASE_DIR
+
+logger = logging.getLogger(__name__)
+
+SHARED_DIR = os.path.join(BASE_DIR, "model", "shared")
+PREFORK_WORKERS = int(os.environ.get("EMOTION_PREFORK_WORKERS", str(os.cpu_count() or 1)))
+# intra-op threads per worker; 0 splits the cores evenly between the workers
+PREFORK_THREADS = int(os.environ.get("EMOTION_PREFORK_THREADS", "0"))
+ALIGNMENT = 64
+
+
+# ─────────────────────────────────────────────────────────────
+# Shared weight file
+# ─────────────────────────────────────────────────────────────
+def _export(path: str, out_dir: str):
+    """Write `path`'s config and weights to `out_dir` (runs in a spawned process)."""
+    from .engine import load_keras_model
+    from .metadata import artifact_img_size
+
+    model = load_keras_model(path)
+    tmp_dir = out_dir.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    entries, offset = [], 0
+    with open(os.path.join(tmp_dir, "weights.bin"), "wb") as f:
+        for w in model.get_weights():
+            w = np.ascontiguousarray(w)
+            padding = -offset % ALIGNMENT
+            f.write(b"\0" * padding)
+            offset += padding
+            entries.append({"shape": list(w.shape), "dtype": w.dtype.str, "offset": offset})
+            f.write(w.tobytes())
+            offset += w.nbytes
+    with open(os.path.join(tmp_dir, "model.json"), "w", encoding="utf-8") as f:
+        f.write(model.to_json())
+    with open(os.path.join(tmp_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump({"source": os.path.abspath(path), "img_size": artifact_img_size(path, model),
+                   "bytes": offset, "weights": entries}, f)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+
+
+def ensure_shared(path: str) -> str:
+    """Directory with the exported weights of `path`, exporting them first if needed."""
+    out_dir = os.path.join(SHARED_DIR, artifact_version(path, "keras"))
+    if not os.path.exists(os.path.join(out_dir, "index.json")):
+        # a spawned child keeps TensorFlow's runtime out of the parent that will fork
+        process = multiprocessing.get_context("spawn").Process(target=_export, args=(path, out_dir))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            raise RuntimeError(f"Exporting shared weights of {path} failed (exit code {process.exitcode})")
+        logger.info("Exported shared weights to %s", out_dir)
+    return out_dir
+
+
+class SharedWeights:
+    """Memory map of an exported model; `arrays()` are views into the mapping."""
+
+    def __init__(self, out_dir: str):
+        with open(os.path.join(out_dir, "index.json"), encoding="utf-8") as f:
+            self.index = json.load(f)
+        with open(os.path.join(out_dir, "model.json"), encoding="utf-8") as f:
+            self.config = f.read()
+        self.img_size = self.index["img_size"]
+        # copy-on-write rather than read-only: DLPack only exports writable arrays. Nothing
+        # writes to the weights, so every page stays shared with the page cache.
+        self.buffer = np.memmap(os.path.join(out_dir, "weights.bin"), dtype=np.uint8, mode="c")
+
+    def arrays(self) -> list:
+        return [
+            np.frombuffer(self.buffer, dtype=np.dtype(e["dtype"]), count=int(np.prod(e["shape"])),
+                          offset=e["offset"]).reshape(e["shape"])
+            for e in self.index["weights"]
+        ]
+
+    def build_model(self):
+        """The model with its weights read from the mapping (no per-worker copy)."""
+        import tensorflow as tf
+        from tensorflow import keras
+
+        # variables created here stay uninitialised: they never get a buffer of their own
+        with keras.StatelessScope(initialize_variables=False):
+            model = keras.models.model_from_json(self.config)
+        # DLPack wraps the 64-byte aligned views without copying; tf.constant would copy
+        tensors = [tf.experimental.dlpack.from_dlpack(a.__dlpack__()) for a in self.arrays()]
+        return SharedModel(model, tensors)
+
+
+class SharedModel:
+    """Call a Keras model whose variables are mapped to externally owned tensors."""
+
+    def __init__(self, model, tensors: list):
+        if len(model.weights) != len(tensors):
+            raise ValueError(f"Model has {len(model.weights)} weights, shared file has {len(tensors)}")
+        self.model = model
+        self.state = list(zip(model.weights, tensors))
+
+    def __call__(self, x, training: bool = False):
+        from tensorflow import keras
+
+        with keras.StatelessScope(state_mapping=self.state, initialize_variables=False):
+            return self.model(x, training=training)
+
+    def predict(self, x, verbose: int = 0) -> np.ndarray:
+        return np.asarray(self(x))
+
+
+# ─────────────────────────────────────────────────────────────
+# Workers
+# ─────────────────────────────────────────────────────────────
+def limit_threads(intra_op: int):
+    """Per-process thread limits; must run before the first TensorFlow op in the worker."""
+    import cv2
+    import tensorflow as tf
+
+    os.environ["EMOTION_TFLITE_THREADS"] = str(intra_op)
+    os.environ["EMOTION_ONNX_THREADS"] = str(intra_op)
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    cv2.setNumThreads(1)
+
+
+def shared_engine(shared: SharedWeights):
+    from .batching import MICROBATCH, MicroBatcher
+    from .cascade import CASCADE_MODEL, load_cascade
+    from .detection import FaceDetector
+    from .engine import EmotionEngine
+    from .serving import KerasPredictor
+
+    predictor = KerasPredictor(shared.build_model(), shared.img_size)
+    # same stack as api.build_engine; the shared model is the cascade's full model
+    predictor = load_cascade(fast_path=CASCADE_MODEL, full=predictor) if CASCADE_MODEL else predictor.warmup()
+    if MICROBATCH:
+        predictor = MicroBatcher(predictor)
+    return EmotionEngine(predictor, detector=FaceDetector())
+
+
+def _worker(sock: socket.socket, model_path: str, backend: str, shared, intra_op: int, api_options: dict):
+    import asyncio
+    import functools
+
+    from .api import InferenceServer, build_engine
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    limit_threads(intra_op)
+    if shared is not None:
+        factory = functools.partial(shared_engine, shared)
+    else:
+        factory = functools.partial(build_engine, model_path, backend)
+    server = InferenceServer(model_path, backend, engine_factory=factory, **api_options)
+    asyncio.run(server.serve(sock=sock))
+
+
+class PreforkPool:
+    """Parent process: prepares the shared state, forks workers and restarts any that die."""
+
+    def __init__(self, model_path: str = None, backend: str = BACKEND, workers: int = PREFORK_WORKERS,
+                 threads: int = PREFORK_THREADS, **api_options):
+        self.model_path = model_path or default_artifact(backend)
+        self.backend = backend
+        self.workers = workers
+        self.threads = threads or max(1, (os.cpu_count() or 1) // workers)
+        self.api_options = api_options
+        self.processes = []
+        self._stopping = False
+
+    def prepare(self):
+        """Everything shared copy-on-write: the weight mapping and the imported modules."""
+        self.shared = None
+        if self.backend == "keras":
+            self.shared = SharedWeights(ensure_shared(self.model_path))
+        import tensorflow  # noqa: F401  (module import only: no op runs before the fork)
+
+        from . import api  # noqa: F401
+
+    def _spawn(self, sock):
+        context = multiprocessing.get_context("fork")
+        process = context.Process(
+            target=_worker, args=(sock, self.model_path, self.backend, self.shared, self.threads, self.api_options),
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def serve(self, host: str, port: int):
+        self.prepare()
+        sock = socket.create_server((host, port), backlog=1024)
+        logger.info("Forking %d workers (%d intra-op threads each) on %s:%d", self.workers, self.threads, host, port)
+        self.processes = [self._spawn(sock) for _ in range(self.workers)]
+
+        def stop(signum, frame):
+            self._stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        try:
+            while not self._stopping:
+                for i, process in enumerate(self.processes):
+                    if not process.is_alive():
+                        logger.warning("Worker %d exited with %s; restarting", process.pid, process.exitcode)
+                        self.processes[i] = self._spawn(sock)
+                time.sleep(0.5)
+        finally:
+            for process in self.processes:
+                process.terminate()
+            for process in self.processes:
+                process.join(timeout=10)
+            sock.close()
+
+
+# ─────────────────────────────────────────────────────────────
+# Scaling benchmark
+# ─────────────────────────────────────────────────────────────
+def memory_kb(pid: int) -> dict:
+    """Resident and proportional (shared pages split between their users) set size of a process."""
+    sizes = {}
+    with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("Rss", "Pss"):
+                sizes[name.lower()] = int(value.split()[0])
+    return sizes
+
+
+def _child_pids(pid: int) -> list:
+    with open(f"/proc/{pid}/task/{pid}/children", encoding="utf-8") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def _sample_image() -> bytes:
+    import cv2
+
+    from .packed import packed_split
+
+    face = cv2.resize(packed_split("test").images[0], (240, 240))
+    framed = cv2.copyMakeBorder(face, 40, 40, 40, 40, cv2.BORDER_REPLICATE)
+    return cv2.imencode(".jpg", cv2.cvtColor(framed, cv2.COLOR_RGB2BGR))[1].tobytes()
+
+
+def _wait_ready(port: int, workers: int, timeout: float = 600.0):
+    """Block until `workers` distinct worker pids have answered /readyz with 200."""
+    import http.client
+
+    ready, deadline = set(), time.time() + timeout
+    while len(ready) < workers:
+        if time.time() > deadline:
+            raise TimeoutError(f"Only {len(ready)}/{workers} workers became ready")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/readyz", headers={"Connection": "close"})
+            response = conn.getresponse()
+            body = json.loads(response.read())
+            if response.status == 200:
+                ready.add(body["pid"])
+        except (OSError, ValueError):
+            pass
+        time.sleep(0.2)
+
+
+def bench(worker_counts, seconds: float, clients_per_worker: int, model_path: str = None, port: int = 8765):
+    import http.client
+    import subprocess
+    import threading
+
+    from .latency import percentiles
+
+    image = _sample_image()
+    print(f"{'workers':>7} {'req/s':>8} {'scaling':>8} {'p50 ms':>7} {'p95 ms':>7} {'RSS MB/worker':>14} "
+          f"{'PSS MB/worker':>14} {'total PSS MB':>13}")
+    base = None
+    for workers in worker_counts:
+        cmd = [sys.executable, "-m", "emotion_engine.prefork", "--workers", str(workers), "--port", str(port)]
+        if model_path:
+            cmd += ["--model", model_path]
+        parent = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            _wait_ready(port, workers)
+            latencies, stop = [], time.perf_counter() + seconds
+
+            def client():
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                while time.perf_counter() < stop:
+                    start = time.perf_counter()
+                    conn.request("POST", "/v1/predict", image, {"Content-Type": "image/jpeg"})
+                    response = conn.getresponse()
+                    response.read()
+                    if response.status == 200:
+                        latencies.append((time.perf_counter() - start) * 1000.0)
+
+            threads = [threading.Thread(target=client) for _ in range(workers * clients_per_worker)]
+            started = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            throughput = len(latencies) / (time.perf_counter() - started)
+            memory = [memory_kb(pid) for pid in _child_pids(parent.pid)]
+            total_pss = sum(m["pss"] for m in memory) + memory_kb(parent.pid)["pss"]
+        finally:
+            parent.terminate()
+            parent.wait(timeout=30)
+        base = base or throughput
+        lat = percentiles(latencies)
+        print(f"{workers:>7} {throughput:>8.1f} {throughput / base:>7.2f}x {lat['p50']:>7.1f} {lat['p95']:>7.1f} "
+              f"{np.mean([m['rss'] for m in memory]) / 1024:>14.0f} {np.mean([m['pss'] for m in memory]) / 1024:>14.0f} "
+              f"{total_pss / 1024:>13.0f}")
+
+
+def main(argv=None):
+    from .api import API_HOST, API_MAX_CONCURRENCY, API_MAX_QUEUE, API_PORT
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--model", default=None, help="Model path (default: auto-discovered)")
+    parser.add_argument("--backend", default=BACKEND)
+    parser.add_argument("--workers", type=int, default=PREFORK_WORKERS)
+    parser.add_argument("--threads", type=int, default=PREFORK_THREADS,
+                        help="Intra-op threads per worker (0 = cores / workers)")
+    parser.add_argument("--max-concurrency", type=int, default=API_MAX_CONCURRENCY, help="Per worker")
+    parser.add_argument("--max-queue", type=int, default=API_MAX_QUEUE, help="Per worker")
+    parser.add_argument("--bench", type=int, nargs="+", default=None, help="Benchmark these worker counts")
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--clients-per-worker", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(process)d %(name)s: %(message)s")
+    if args.bench:
+        bench(args.bench, args.seconds, args.clients_per_worker, args.model)
+        return
+    pool = PreforkPool(args.model, args.backend, args.workers, args.threads,
+                       max_concurrency=args.max_concurrency, max_queue=args.max_queue)
+    pool.serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
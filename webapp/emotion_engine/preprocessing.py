@@ -0,0 +1,50 @@
+"""
+Image preprocessing shared by every inference path.
+Face crops are converted to RGB, resized to the model input size and stacked into one batch.
+"""
+
+import cv2
+import numpy as np
+
+from .config import IMG_SIZE
+
+
+def to_rgb(arr: np.ndarray) -> np.ndarray:
+    """Return a 3-channel RGB view of a grayscale, RGB or RGBA array."""
+    if arr.ndim == 2:
+        return cv2.cvtColor(arr, cv2.COLOR_GRAY2RGB)
+    if arr.shape[2] == 4:
+        return cv2.cvtColor(arr, cv2.COLOR_RGBA2RGB)
+    return arr
+
+
+def to_gray(arr: np.ndarray) -> np.ndarray:
+    """Return a grayscale copy of an RGB image (grayscale input is returned as is)."""
+    if arr.ndim == 2:
+        return arr
+    if arr.shape[2] == 4:
+        return cv2.cvtColor(arr, cv2.COLOR_RGBA2GRAY)
+    return cv2.cvtColor(arr, cv2.COLOR_RGB2GRAY)
+
+
+def crop_faces(frame: np.ndarray, boxes) -> list:
+    """Cut every (x, y, w, h) box out of a frame."""
+    return [frame[y : y + h, x : x + w] for (x, y, w, h) in boxes]
+
+
+def resize_batch(crops, img_size: int = IMG_SIZE) -> np.ndarray:
+    """Resize RGB face crops into a single uint8 batch of shape (N, img_size, img_size, 3)."""
+    batch = np.empty((len(crops), img_size, img_size, 3), dtype=np.uint8)
+    for i, crop in enumerate(crops):
+        batch[i] = cv2.resize(to_rgb(np.asarray(crop)), (img_size, img_size))
+    return batch
+
+
+def normalize_batch(batch: np.ndarray) -> np.ndarray:
+    """Scale a uint8 batch to float32 in [0, 1], as done during training."""
+    return batch.astype(np.float32) / 255.0
+
+
+def preprocess_image(image, img_size: int = IMG_SIZE) -> np.ndarray:
+    """Resize and normalize a single face image into a batch of one."""
+    return normalize_batch(resize_batch([np.array(image)], img_size))
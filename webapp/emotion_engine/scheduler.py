@@ -0,0 +1,152 @@
+"""
+Latency-budget adaptive scheduling for the live loop.
+
+Given a target frame rate and a CPU budget (the fraction of each frame interval
+that may be spent on vision work), the scheduler measures detection, tracking and
+inference times as they happen and picks how often to classify faces and how often
+to re-run full detection so the expected per-frame cost fits the budget:
+
+    track + detect / detect_every + infer / classify_every <= cpu_budget / target_fps
+
+Among the interval pairs that fit, it picks the smallest `classify_every + detect_every`,
+preferring fresher labels on ties. Every change is logged and kept in `decisions`.
+"""
+
+import logging
+import time
+from dataclasses import asdict, dataclass
+
+logger = logging.getLogger(__name__)
+
+
+class Ema:
+    """Exponential moving average of a timing, None until the first sample."""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.value = None
+
+    def update(self, sample: float):
+        self.value = sample if self.value is None else self.alpha * sample + (1 - self.alpha) * self.value
+
+
+@dataclass
+class Decision:
+    timestamp: float
+    classify_every: int
+    detect_every: int
+    detect_ms: float
+    track_ms: float
+    infer_ms: float
+    budget_ms: float
+    expected_ms: float
+
+
+class AdaptiveScheduler:
+    """Choose classification and re-detection intervals from measured costs."""
+
+    def __init__(
+        self,
+        target_fps: float = 15.0,
+        cpu_budget: float = 0.6,
+        classify_range=(1, 30),
+        detect_range=(1, 30),
+        adjust_every: int = 15,
+        alpha: float = 0.2,
+    ):
+        self.target_fps = target_fps
+        self.cpu_budget = cpu_budget
+        self.classify_range = classify_range
+        self.detect_range = detect_range
+        self.adjust_every = adjust_every
+        self.detect_cost = Ema(alpha)
+        self.track_cost = Ema(alpha)
+        self.infer_cost = Ema(alpha)
+        self.classify_every = classify_range[0]
+        self.detect_every = detect_range[0]
+        self.decisions = []
+        self._frames = 0
+        self._since_classify = None
+
+    @property
+    def budget(self) -> float:
+        """Seconds of vision work allowed per frame."""
+        return self.cpu_budget / self.target_fps
+
+    # ── Measurements ──────────────────────────────────────────
+    def record_detect(self, seconds: float):
+        self.detect_cost.update(seconds)
+
+    def record_track(self, seconds: float):
+        self.track_cost.update(seconds)
+
+    def record_infer(self, seconds: float):
+        self.infer_cost.update(seconds)
+
+    # ── Decisions ─────────────────────────────────────────────
+    def should_classify(self) -> bool:
+        """Call once per frame with faces present; True when this frame should be classified."""
+        if self._since_classify is None or self._since_classify + 1 >= self.classify_every:
+            self._since_classify = 0
+            return True
+        self._since_classify += 1
+        return False
+
+    def end_frame(self):
+        """Call once per processed frame; re-plans every `adjust_every` frames."""
+        self._frames += 1
+        if self._frames % self.adjust_every == 0:
+            self.plan()
+
+    def expected_cost(self, classify_every: int, detect_every: int) -> float:
+        track = self.track_cost.value or 0.0
+        detect = self.detect_cost.value or 0.0
+        infer = self.infer_cost.value or 0.0
+        return track + detect / detect_every + infer / classify_every
+
+    def plan(self):
+        """Pick the freshest interval pair that fits the budget."""
+        if self.detect_cost.value is None or self.infer_cost.value is None:
+            return
+        best = None
+        for k in range(self.classify_range[0], self.classify_range[1] + 1):
+            for d in range(self.detect_range[0], self.detect_range[1] + 1):
+                if self.expected_cost(k, d) <= self.budget:
+                    key = (k + d, k)
+                    if best is None or key < best[0]:
+                        best = (key, k, d)
+                    break  # larger d for this k only costs freshness
+        if best is None:
+            k, d = self.classify_range[1], self.detect_range[1]
+        else:
+            _, k, d = best
+        if (k, d) != (self.classify_every, self.detect_every):
+            self.classify_every, self.detect_every = k, d
+            decision = Decision(
+                time.time(),
+                k,
+                d,
+                (self.detect_cost.value or 0.0) * 1000.0,
+                (self.track_cost.value or 0.0) * 1000.0,
+                (self.infer_cost.value or 0.0) * 1000.0,
+                self.budget * 1000.0,
+                self.expected_cost(k, d) * 1000.0,
+            )
+            self.decisions.append(decision)
+            logger.info("scheduler: %s", asdict(decision))
+
+    def report(self) -> dict:
+        """Current intervals, measured costs and decision history (JSON-serializable)."""
+        return {
+            "target_fps": self.target_fps,
+            "cpu_budget": self.cpu_budget,
+            "classify_every": self.classify_every,
+            "detect_every": self.detect_every,
+            "detect_ms": (self.detect_cost.value or 0.0) * 1000.0,
+            "track_ms": (self.track_cost.value or 0.0) * 1000.0,
+            "infer_ms": (self.infer_cost.value or 0.0) * 1000.0,
+            "budget_ms": self.budget * 1000.0,
+            "expected_ms": self.expected_cost(self.classify_every, self.detect_every) * 1000.0,
+            "frames": self._frames,
+            "decisions": [asdict(d) for d in self.decisions],
+        }
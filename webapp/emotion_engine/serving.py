@@ -0,0 +1,70 @@
+"""
+Low-latency Keras serving path.
+
+`keras.Model.predict` sets up a data adapter, callbacks and a fresh step-function
+dispatch on every call, which dominates latency for a single 224×224 face. Here
+the model is wrapped in one traced `tf.function` with a fixed uint8 input signature
+(normalization happens inside the graph), warmed up once, and called directly.
+"""
+
+import logging
+import os
+
+import numpy as np
+
+from .config import IMG_SIZE
+from .preprocessing import normalize_batch
+
+logger = logging.getLogger(__name__)
+
+# "compiled" (traced tf.function) or "predict" (plain model.predict, the original behaviour)
+SERVING_MODE = os.environ.get("EMOTION_SERVING_MODE", "compiled")
+
+
+class KerasPredictor:
+    """Run a Keras classifier on uint8 face batches through a traced, fixed-signature function."""
+
+    def __init__(self, model, img_size: int = IMG_SIZE, mode: str = SERVING_MODE, jit_compile: bool = False):
+        self.model = model
+        self.img_size = img_size
+        self.mode = mode
+        self._serve = None
+        if mode == "compiled":
+            try:
+                self._serve = self._trace(jit_compile)
+            except Exception as e:
+                logger.warning("Could not trace serving function, falling back to model.predict: %s", e)
+                self.mode = "predict"
+
+    def _trace(self, jit_compile: bool):
+        import tensorflow as tf
+
+        model = self.model
+        signature = [tf.TensorSpec([None, self.img_size, self.img_size, 3], tf.uint8)]
+
+        @tf.function(input_signature=signature, jit_compile=jit_compile)
+        def serve(batch):
+            x = tf.cast(batch, tf.float32) / 255.0
+            return model(x, training=False)
+
+        return serve
+
+    def warmup(self, batch_size: int = 1):
+        """Trigger tracing/graph optimisation once so the first real request is not slow."""
+        dummy = np.zeros((batch_size, self.img_size, self.img_size, 3), dtype=np.uint8)
+        try:
+            self.predict_batch(dummy)
+        except Exception as e:
+            if self.mode != "compiled":
+                raise
+            logger.warning("Compiled serving warm-up failed, falling back to model.predict: %s", e)
+            self.mode = "predict"
+            self._serve = None
+            self.predict_batch(dummy)
+        return self
+
+    def predict_batch(self, batch: np.ndarray) -> np.ndarray:
+        """Return (N, classes) probabilities for a uint8 (N, H, W, 3) batch."""
+        if self.mode == "compiled":
+            return self._serve(batch).numpy()
+        return np.asarray(self.model.predict(normalize_batch(batch), verbose=0))
@@ -0,0 +1,109 @@
+"""
+TensorFlow Lite inference backend.
+
+Loads a float32, float16 or full-int8 `.tflite` export of the emotion model and
+exposes the same `predict_batch(uint8 batch) -> probabilities` contract as
+`KerasPredictor`. Quantized inputs/outputs are (de)quantized with the tensor's
+own scale and zero point.
+
+The interpreter comes from LiteRT (`pip install ai-edge-litert`, see
+requirements-backends.txt) or tflite-runtime. TensorFlow's deprecated
+`tf.lite.Interpreter` is only a fallback and logs a warning.
+"""
+
+import functools
+import logging
+import os
+import threading
+
+import numpy as np
+
+from .config import IMG_SIZE
+
+logger = logging.getLogger(__name__)
+
+TFLITE_THREADS = int(os.environ.get("EMOTION_TFLITE_THREADS", os.cpu_count() or 1))
+
+
+@functools.lru_cache(maxsize=None)
+def _interpreter_class():
+    """Prefer the standalone LiteRT / tflite-runtime interpreters, fall back to TensorFlow's."""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+
+            logger.warning(
+                "Neither ai-edge-litert nor tflite-runtime is installed; falling back to the deprecated "
+                "tf.lite.Interpreter. Install LiteRT with `pip install -r requirements-backends.txt`."
+            )
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLitePredictor:
+    """Run a `.tflite` emotion classifier on uint8 face batches."""
+
+    def __init__(self, model_path: str, num_threads: int = TFLITE_THREADS, img_size: int = None):
+        self.model_path = model_path
+        self.interpreter = _interpreter_class()(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        shape = self._input["shape"]
+        # a fixed input size wins; dynamic (-1) spatial dimensions take `img_size`
+        size = int(self._input.get("shape_signature", shape)[1])
+        self.img_size = size if size > 0 else (img_size or IMG_SIZE)
+        # None makes the first call resize the input when its allocated size differs
+        self._batch_size = int(shape[0]) if int(shape[1]) == self.img_size else None
+        # the interpreter holds mutable tensor buffers; serialize calls across threads
+        self._lock = threading.Lock()
+
+    @property
+    def input_dtype(self):
+        return self._input["dtype"]
+
+    def _quantize_input(self, batch: np.ndarray) -> np.ndarray:
+        x = batch.astype(np.float32) / 255.0
+        dtype = self._input["dtype"]
+        if dtype == np.float32:
+            return x
+        if dtype == np.float16:
+            return x.astype(np.float16)
+        scale, zero_point = self._input["quantization"]
+        info = np.iinfo(dtype)
+        return np.clip(np.round(x / scale + zero_point), info.min, info.max).astype(dtype)
+
+    def _dequantize_output(self, out: np.ndarray) -> np.ndarray:
+        if np.issubdtype(out.dtype, np.integer):
+            scale, zero_point = self._output["quantization"]
+            return (out.astype(np.float32) - zero_point) * scale
+        return out.astype(np.float32)
+
+    def _resize(self, batch_size: int):
+        """Resize the input tensor only when the batch size actually changes."""
+        if batch_size == self._batch_size:
+            return
+        self.interpreter.resize_tensor_input(
+            self._input["index"], [batch_size, self.img_size, self.img_size, 3]
+        )
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = batch_size
+
+    def warmup(self, batch_size: int = 1):
+        self.predict_batch(np.zeros((batch_size, self.img_size, self.img_size, 3), dtype=np.uint8))
+        return self
+
+    def predict_batch(self, batch: np.ndarray) -> np.ndarray:
+        """Return (N, classes) probabilities for a uint8 (N, H, W, 3) batch."""
+        with self._lock:
+            self._resize(len(batch))
+            self.interpreter.set_tensor(self._input["index"], self._quantize_input(batch))
+            self.interpreter.invoke()
+            out = self.interpreter.get_tensor(self._output["index"])
+        return self._dequantize_output(out)
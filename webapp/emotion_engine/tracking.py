@@ -0,0 +1,190 @@
+"""
+Detect-then-track face pipeline for live video.
+
+The full-frame Haar pass only runs every `detect_every` frames, or sooner when a
+track loses confidence. In between, each face is followed by normalized template
+matching inside a small search window around its last box, on a downscaled patch.
+Detections are associated with existing tracks by IoU so track ids stay stable,
+and matched boxes are smoothed to avoid flicker.
+"""
+
+from dataclasses import dataclass, field
+from itertools import count
+
+import cv2
+import numpy as np
+
+from .detection import FaceDetector
+
+# Width (px) templates and search windows are scaled to before matching
+TEMPLATE_WIDTH = 32
+
+
+def iou(a, b) -> float:
+    """Intersection over union of two (x, y, w, h) boxes."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+@dataclass
+class Track:
+    """One followed face. `score` is the last template-match (or detection) confidence."""
+
+    track_id: int
+    box: tuple
+    template: np.ndarray = field(repr=False)
+    score: float = 1.0
+    age: int = 0
+    misses: int = 0
+
+
+class FaceTracker:
+    """Follow faces across frames, running full detection only when needed."""
+
+    def __init__(
+        self,
+        detector: FaceDetector,
+        detect_every: int = 10,
+        min_score: float = 0.6,
+        search_margin: float = 0.5,
+        match_iou: float = 0.3,
+        smoothing: float = 0.6,
+        max_misses: int = 1,
+    ):
+        self.detector = detector
+        self.detect_every = max(1, detect_every)
+        self.min_score = min_score
+        self.search_margin = search_margin
+        self.match_iou = match_iou
+        self.smoothing = smoothing
+        self.max_misses = max_misses
+        self.tracks = []
+        self.frame_index = 0
+        self.detections_run = 0
+        self.last_detected = False  # whether the last update ran the full detector
+        self._ids = count(1)
+        self._since_detect = 0
+        self._force_detect = True
+
+    # ── Public API ────────────────────────────────────────────
+    def update(self, gray: np.ndarray) -> list:
+        """Advance one grayscale frame; return the current tracks."""
+        self.last_detected = self._force_detect or not self.tracks or self._since_detect >= self.detect_every
+        if self.last_detected:
+            self._detect(gray)
+        else:
+            self._follow(gray)
+        self.frame_index += 1
+        return self.tracks
+
+    def observe(self, gray: np.ndarray, boxes) -> list:
+        """Advance one frame with detections computed elsewhere (e.g. on a worker pool).
+
+        Returns the track id of every box, in the order given.
+        """
+        ids = self._associate(gray, [tuple(int(v) for v in b) for b in boxes])
+        self.last_detected = True
+        self.frame_index += 1
+        return ids
+
+    def reset(self):
+        self.tracks = []
+        self._force_detect = True
+
+    @property
+    def detection_rate(self) -> float:
+        """Fraction of frames that ran the full detector."""
+        return self.detections_run / self.frame_index if self.frame_index else 0.0
+
+    # ── Internals ─────────────────────────────────────────────
+    def _detect(self, gray: np.ndarray):
+        self._associate(gray, [tuple(int(v) for v in b) for b in self.detector.detect(gray)])
+
+    def _associate(self, gray: np.ndarray, boxes: list) -> list:
+        """Match detections to tracks by IoU, start tracks for the rest; return each box's track id."""
+        ids = [None] * len(boxes)
+        self.detections_run += 1
+        self._since_detect = 1
+        self._force_detect = False
+
+        # greedy IoU association keeps ids stable across re-detections
+        pairs = sorted(
+            ((iou(t.box, b), ti, bi) for ti, t in enumerate(self.tracks) for bi, b in enumerate(boxes)),
+            reverse=True,
+        )
+        matched_tracks, matched_boxes = set(), set()
+        for overlap, ti, bi in pairs:
+            if overlap < self.match_iou:
+                break
+            if ti in matched_tracks or bi in matched_boxes:
+                continue
+            matched_tracks.add(ti)
+            matched_boxes.add(bi)
+            track = self.tracks[ti]
+            track.box = self._smooth(track.box, boxes[bi])
+            track.template = self._template(gray, track.box)
+            track.score = 1.0
+            track.age += 1
+            track.misses = 0
+            ids[bi] = track.track_id
+
+        survivors = []
+        for ti, track in enumerate(self.tracks):
+            if ti in matched_tracks:
+                survivors.append(track)
+            else:
+                track.misses += 1
+                if track.misses <= self.max_misses:
+                    survivors.append(track)
+        for bi, box in enumerate(boxes):
+            if bi not in matched_boxes:
+                survivors.append(Track(next(self._ids), box, self._template(gray, box)))
+                ids[bi] = survivors[-1].track_id
+        self.tracks = survivors
+        return ids
+
+    def _follow(self, gray: np.ndarray):
+        self._since_detect += 1
+        for track in self.tracks:
+            box, score = self._match(gray, track)
+            track.score = score
+            track.age += 1
+            if score >= self.min_score:
+                track.box = self._smooth(track.box, box)
+            else:
+                # lost confidence: re-detect on the next frame instead of drifting
+                self._force_detect = True
+
+    def _match(self, gray: np.ndarray, track: Track):
+        x, y, w, h = track.box
+        mx, my = int(w * self.search_margin), int(h * self.search_margin)
+        H, W = gray.shape[:2]
+        sx0, sy0 = max(0, x - mx), max(0, y - my)
+        sx1, sy1 = min(W, x + w + mx), min(H, y + h + my)
+        scale = TEMPLATE_WIDTH / float(w)
+        region = gray[sy0:sy1, sx0:sx1]
+        th, tw = track.template.shape[:2]
+        rw, rh = int(round(region.shape[1] * scale)), int(round(region.shape[0] * scale))
+        if rw < tw or rh < th:
+            return track.box, 0.0
+        region = cv2.resize(region, (rw, rh), interpolation=cv2.INTER_AREA)
+        result = cv2.matchTemplate(region, track.template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (px, py) = cv2.minMaxLoc(result)
+        nx = min(max(0, sx0 + int(round(px / scale))), max(0, W - w))
+        ny = min(max(0, sy0 + int(round(py / scale))), max(0, H - h))
+        return (nx, ny, w, h), float(score)
+
+    def _template(self, gray: np.ndarray, box) -> np.ndarray:
+        x, y, w, h = box
+        patch = gray[max(0, y) : y + h, max(0, x) : x + w]
+        th = max(1, int(round(h * TEMPLATE_WIDTH / float(w))))
+        return cv2.resize(patch, (TEMPLATE_WIDTH, th), interpolation=cv2.INTER_AREA)
+
+    def _smooth(self, old, new) -> tuple:
+        a = self.smoothing
+        return tuple(int(round(a * n + (1 - a) * o)) for o, n in zip(old, new))
@@ -0,0 +1,5 @@
+"""
+Training utilities for the emotion model (used from model/face.ipynb).
+
+These modules import TensorFlow at import time and are never loaded by the web app.
+"""
@@ -0,0 +1,281 @@
+"""
+Compress a trained MobileNetV2 emotion model: channel pruning, magnitude pruning and
+weight clustering, followed by a short fine-tune.
+
+  1. Structured: the least important channels of every inverted-residual expansion
+     (ranked by |BN gamma| × L1 of the expand filters) are removed. The expand conv,
+     depthwise conv and project conv all shrink, so RSS and MACs drop with the file.
+  2. Magnitude: the smallest weights of each conv/dense kernel are zeroed.
+  3. Clustering: each kernel's non-zero weights are snapped to `clusters` shared
+     values (1-D k-means).
+  4. Fine-tune on model/train; after every step the masks and centroids are
+     re-applied, so the result stays exactly sparse and clustered.
+
+The artifact is an ordinary `.keras` file re-zipped with deflate (Keras writes it
+uncompressed), where zeros and repeated values compress well; `load_model` and every
+backend read it unchanged.
+
+Usage (from the webapp directory):
+    python -m emotion_engine.training.compress --channel-prune 0.25 --sparsity 0.5 --clusters 16
+"""
+
+import argparse
+import copy
+import json
+import os
+import subprocess
+import sys
+import time
+import zipfile
+
+import numpy as np
+import tensorflow as tf
+
+from ..backends import load_predictor
+from ..config import WEBAPP_DIR, find_model_path
+from ..evaluation import predict_arrays
+from ..metadata import artifact_img_size, copy_metadata
+from ..packed import PackedSplit, packed_split, sample_rows
+from .data import make_packed_train_val_datasets
+from .models import estimate_macs
+
+PRUNABLE = (tf.keras.layers.Conv2D, tf.keras.layers.Dense)  # includes DepthwiseConv2D/SeparableConv2D
+MIN_KERNEL_SIZE = 1024  # smaller kernels (biases, tiny convs) are left alone
+
+
+# ─────────────────────────────────────────────────────────────
+# Structured channel pruning
+# ─────────────────────────────────────────────────────────────
+def expansion_blocks(model) -> list:
+    """Prefixes of inverted-residual blocks with an expand → depthwise → project chain."""
+    names = {layer.name for layer in model.layers}
+    return [
+        name[: -len("_expand")]
+        for name in names
+        if name.endswith("_expand")
+        and {f"{name[:-7]}_expand_BN", f"{name[:-7]}_depthwise", f"{name[:-7]}_depthwise_BN", f"{name[:-7]}_project"} <= names
+    ]
+
+
+def channel_scores(model, block: str) -> np.ndarray:
+    kernel = model.get_layer(f"{block}_expand").get_weights()[0]
+    gamma = model.get_layer(f"{block}_expand_BN").get_weights()[0]
+    return np.abs(gamma) * np.abs(kernel).sum(axis=(0, 1, 2))
+
+
+def prune_channels(model, ratio: float, multiple: int = 8):
+    """Rebuild `model` without the weakest `ratio` of every block's expansion channels."""
+    keep = {}
+    for block in expansion_blocks(model):
+        scores = channel_scores(model, block)
+        n = max(multiple, int(round(len(scores) * (1 - ratio) / multiple)) * multiple)
+        keep[block] = np.sort(np.argsort(scores)[::-1][: min(n, len(scores))])
+
+    config = copy.deepcopy(model.get_config())
+    for layer in config["layers"]:
+        layer.pop("build_config", None)  # shapes change; layers rebuild when called
+        name = layer["config"]["name"]
+        if name.endswith("_expand") and name[:-7] in keep:
+            layer["config"]["filters"] = int(len(keep[name[:-7]]))
+    pruned = tf.keras.Model.from_config(config)
+
+    for layer in model.layers:
+        weights = layer.get_weights()
+        block = next((b for b in keep if layer.name.startswith(b + "_")), None)
+        if block is not None and weights:
+            idx, suffix = keep[block], layer.name[len(block) + 1 :]
+            if suffix == "expand":
+                weights = [weights[0][..., idx]] + [w[idx] for w in weights[1:]]
+            elif suffix in ("expand_BN", "depthwise_BN"):
+                weights = [w[idx] for w in weights]
+            elif suffix == "depthwise":
+                weights = [weights[0][:, :, idx, :]] + [w[idx] for w in weights[1:]]
+            elif suffix == "project":
+                weights = [weights[0][:, :, idx, :]] + weights[1:]
+        pruned.get_layer(layer.name).set_weights(weights)
+    return pruned
+
+
+# ─────────────────────────────────────────────────────────────
+# Magnitude pruning + weight clustering
+# ─────────────────────────────────────────────────────────────
+def compressible_layers(model) -> list:
+    return [
+        layer for layer in model.layers
+        if isinstance(layer, PRUNABLE) and layer.get_weights() and layer.get_weights()[0].size >= MIN_KERNEL_SIZE
+    ]
+
+
+def kmeans_1d(values: np.ndarray, k: int, iterations: int = 15) -> np.ndarray:
+    """Sorted 1-D k-means centroids with linear initialisation over the value range."""
+    if len(values) == 0:
+        return np.zeros(1, dtype=np.float32)
+    centroids = np.linspace(values.min(), values.max(), k)
+    for _ in range(iterations):
+        assign = np.searchsorted((centroids[1:] + centroids[:-1]) / 2, values)
+        sums = np.bincount(assign, weights=values, minlength=k)
+        counts = np.bincount(assign, minlength=k)
+        centroids = np.where(counts > 0, sums / np.maximum(counts, 1), centroids)
+    return np.sort(centroids).astype(np.float32)
+
+
+def snap(kernel: np.ndarray, mask: np.ndarray, centroids) -> np.ndarray:
+    """Zero pruned weights and move the rest to their nearest centroid."""
+    if centroids is not None:
+        kernel = centroids[np.searchsorted((centroids[1:] + centroids[:-1]) / 2, kernel)]
+    return np.where(mask, kernel, 0.0).astype(np.float32)
+
+
+class Compressor:
+    """Per-kernel sparsity masks and cluster centroids, re-applied after each training step."""
+
+    def __init__(self, model, sparsity: float = 0.5, clusters: int = 16):
+        self.layers = compressible_layers(model)
+        self.masks, self.centroids = {}, {}
+        for layer in self.layers:
+            kernel = layer.get_weights()[0]
+            # depthwise kernels are tiny and sensitive; cluster them but keep them dense
+            rate = 0.0 if isinstance(layer, tf.keras.layers.DepthwiseConv2D) else sparsity
+            threshold = np.quantile(np.abs(kernel), rate) if rate > 0 else -1.0
+            self.masks[layer.name] = np.abs(kernel) > threshold
+            kept = kernel[self.masks[layer.name]]
+            self.centroids[layer.name] = kmeans_1d(kept, clusters) if clusters else None
+        self.apply(update_centroids=False)
+
+    def apply(self, update_centroids: bool = True):
+        for layer in self.layers:
+            weights = layer.get_weights()
+            mask, centroids = self.masks[layer.name], self.centroids[layer.name]
+            if update_centroids and centroids is not None:
+                kept = weights[0][mask]
+                assign = np.searchsorted((centroids[1:] + centroids[:-1]) / 2, kept)
+                sums = np.bincount(assign, weights=kept, minlength=len(centroids))
+                counts = np.bincount(assign, minlength=len(centroids))
+                centroids = np.sort(np.where(counts > 0, sums / np.maximum(counts, 1), centroids)).astype(np.float32)
+                self.centroids[layer.name] = centroids
+            weights[0] = snap(weights[0], mask, centroids)
+            layer.set_weights(weights)
+
+    def callback(self):
+        compressor = self
+
+        class Reapply(tf.keras.callbacks.Callback):
+            def on_train_batch_end(self, batch, logs=None):
+                compressor.apply()
+
+        return Reapply()
+
+    def sparsity(self) -> float:
+        total = sum(m.size for m in self.masks.values())
+        return 1.0 - sum(int(m.sum()) for m in self.masks.values()) / max(total, 1)
+
+
+# ─────────────────────────────────────────────────────────────
+# Artifact + report
+# ─────────────────────────────────────────────────────────────
+def save_compressed(model, path: str):
+    """Save an uncompiled `.keras` file (no optimizer state) whose members are deflate-compressed."""
+    export = tf.keras.Model.from_config(model.get_config())
+    export.set_weights(model.get_weights())
+    tmp = path + ".tmp"
+    export.save(tmp + ".keras")
+    with zipfile.ZipFile(tmp + ".keras") as src, zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as dst:
+        for info in src.infolist():
+            dst.writestr(info.filename, src.read(info.filename))
+    os.remove(tmp + ".keras")
+    os.replace(tmp, path)
+
+
+# ru_maxrss can carry the parent's high-water mark over fork+exec; VmHWM is per process image
+_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+from emotion_engine.backends import load_predictor
+imported = time.perf_counter()
+load_predictor("keras", sys.argv[1])
+done = time.perf_counter()
+try:
+    rss = next(int(l.split()[1]) for l in open("/proc/self/status") if l.startswith("VmHWM")) / 1024.0
+except (OSError, StopIteration):
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+print(json.dumps({"load_seconds": done - imported, "import_seconds": imported - start, "rss_mb": rss}))
+"""
+
+
+def cold_load(path: str) -> dict:
+    """Load time (incl. warm-up) and peak RSS of a fresh process serving `path`."""
+    out = subprocess.run([sys.executable, "-c", _PROBE, path], cwd=WEBAPP_DIR, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure(path: str, test) -> dict:
+    predictor = load_predictor("keras", path)
+    preds, labels = predict_arrays(predictor, test.images, test.labels, predictor.img_size, batch_size=64)
+    return {
+        "path": path,
+        "size_mb": os.path.getsize(path) / 1e6,
+        "params": predictor.model.count_params(),
+        "weights_mb": sum(w.nbytes for w in predictor.model.get_weights()) / 1e6,
+        "mmacs": estimate_macs(predictor.model) / 1e6,
+        "accuracy": float(np.mean(preds == labels)),
+        **cold_load(path),
+    }
+
+
+def print_report(before: dict, after: dict):
+    print(f"{'':<10} {'size MB':>8} {'params':>10} {'weights MB':>10} {'MMACs':>7} {'load s':>7} {'RSS MB':>7} "
+          f"{'accuracy':>9}")
+    for name, r in (("before", before), ("after", after)):
+        print(f"{name:<10} {r['size_mb']:>8.2f} {r['params']:>10,} {r['weights_mb']:>10.1f} {r['mmacs']:>7.1f} "
+              f"{r['load_seconds']:>7.2f} {r['rss_mb']:>7.0f} {r['accuracy']:>9.4f}")
+    print(f"size {before['size_mb'] / after['size_mb']:.1f}x smaller, accuracy {after['accuracy'] - before['accuracy']:+.4f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=None, help="Keras model to compress (default: auto-discovered)")
+    parser.add_argument("--output", default=None, help="Output path (default: <model>_compressed.keras)")
+    parser.add_argument("--channel-prune", type=float, default=0.25, help="Fraction of expansion channels removed")
+    parser.add_argument("--sparsity", type=float, default=0.5, help="Fraction of each kernel zeroed")
+    parser.add_argument("--clusters", type=int, default=16, help="Shared values per kernel (0 disables clustering)")
+    parser.add_argument("--epochs", type=int, default=2)
+    parser.add_argument("--steps-per-epoch", type=int, default=None, help="Cap fine-tune steps per epoch")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--learning-rate", type=float, default=1e-4)
+    parser.add_argument("--eval-limit", type=int, default=None, help="Score a fixed random subset of the test set")
+    args = parser.parse_args(argv)
+
+    model_path = args.model or find_model_path()
+    output = args.output or os.path.splitext(model_path)[0] + "_compressed.keras"
+    model = tf.keras.models.load_model(model_path)
+    img_size = artifact_img_size(model_path, model)
+
+    start = time.perf_counter()
+    if args.channel_prune > 0:
+        model = prune_channels(model, args.channel_prune)
+    compressor = Compressor(model, args.sparsity, args.clusters)
+    print(f"Pruned to {model.count_params():,} params, {compressor.sparsity():.0%} kernel sparsity")
+
+    if args.epochs > 0:
+        train_ds, val_ds = make_packed_train_val_datasets(img_size=img_size, batch_size=args.batch_size)
+        model.compile(optimizer=tf.keras.optimizers.Adam(args.learning_rate),
+                      loss="sparse_categorical_crossentropy", metrics=["accuracy"])
+        model.fit(train_ds, validation_data=val_ds, epochs=args.epochs, steps_per_epoch=args.steps_per_epoch,
+                  validation_steps=args.steps_per_epoch, callbacks=[compressor.callback()])
+        compressor.apply()
+    print(f"Compression + fine-tune took {(time.perf_counter() - start) / 60:.1f} min")
+
+    save_compressed(model, output)
+    copy_metadata(model_path, output, img_size, channel_prune=args.channel_prune,
+                  sparsity=round(compressor.sparsity(), 4), clusters=args.clusters)
+    print(f"Wrote {output}")
+
+    test = packed_split("test")
+    if args.eval_limit is not None:
+        rows = sample_rows(len(test), args.eval_limit)
+        test = PackedSplit(test.images[rows], test.labels[rows], [test.filenames[i] for i in rows], test.meta)
+    print_report(measure(model_path, test), measure(output, test))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Streaming tf.data input pipeline over model/train/<class>/.
+
+Only file paths and labels are held in memory. Images are read, decoded and resized
+in parallel, normalized on the fly and prefetched, so peak memory is a fixed budget
+(roughly batch size × prefetch depth) instead of the whole dataset as float32.
+The validation split is a deterministic hash of each file's path, so it does not
+change between runs, reorderings, or when new images are added.
+
+`make_packed_train_val_datasets` does the same over the memory-mapped pack from
+`emotion_engine.packed`: batches are gathered straight from the mapped array, so no
+per-image file is opened or decoded during training.
+"""
+
+import os
+import zlib
+
+import numpy as np
+import tensorflow as tf
+
+from ..config import IMG_SIZE
+from ..datasets import list_labeled_images
+from ..packed import packed_split
+
+AUTOTUNE = tf.data.AUTOTUNE
+
+
+def is_validation(path: str, val_fraction: float) -> bool:
+    """Stable split membership from a CRC of the class folder + file name."""
+    key = os.path.join(os.path.basename(os.path.dirname(path)), os.path.basename(path))
+    return zlib.crc32(key.encode()) % 10000 < int(val_fraction * 10000)
+
+
+def split_items(items, val_fraction: float = 0.1):
+    """Split (path, label) pairs into (train, validation) deterministically."""
+    train, val = [], []
+    for item in items:
+        (val if is_validation(item[0], val_fraction) else train).append(item)
+    return train, val
+
+
+def decode_image(path, img_size: int = IMG_SIZE, channels: int = 3):
+    """Read a JPEG/PNG file into a uint8 (img_size, img_size, channels) tensor."""
+    image = tf.io.decode_image(tf.io.read_file(path), channels=channels, expand_animations=False)
+    image = tf.image.resize(image, (img_size, img_size), method="bilinear")
+    return tf.cast(tf.clip_by_value(tf.round(image), 0, 255), tf.uint8)
+
+
+def split_indices(filenames, val_fraction: float = 0.1):
+    """(train, validation) row indices for a packed split, matching `split_items`."""
+    is_val = np.array([is_validation(name, val_fraction) for name in filenames], dtype=bool)
+    return np.flatnonzero(~is_val), np.flatnonzero(is_val)
+
+
+def make_dataset(items, img_size: int = IMG_SIZE, batch_size: int = 32, training: bool = True,
+                 shuffle_buffer: int = 10000, seed: int = 42, channels: int = 3, normalize: bool = True):
+    """Batched (images, labels) dataset streaming from (path, label) pairs.
+
+    Shuffling happens on file paths before decoding, with a bounded buffer, so it
+    never holds decoded images. Set `normalize=False` to get raw uint8 pixels.
+    """
+    paths = [p for p, _ in items]
+    labels = [label for _, label in items]
+    ds = tf.data.Dataset.from_tensor_slices((paths, labels))
+    if training:
+        ds = ds.shuffle(min(shuffle_buffer, max(1, len(items))), seed=seed, reshuffle_each_iteration=True)
+
+    def load(path, label):
+        image = decode_image(path, img_size, channels)
+        if normalize:
+            image = tf.cast(image, tf.float32) / 255.0
+        return image, label
+
+    ds = ds.map(load, num_parallel_calls=AUTOTUNE, deterministic=not training)
+    ds = ds.batch(batch_size, drop_remainder=False)
+    return ds.prefetch(AUTOTUNE)
+
+
+def make_train_val_datasets(train_dir: str, img_size: int = IMG_SIZE, batch_size: int = 32,
+                            val_fraction: float = 0.1, seed: int = 42, **kwargs):
+    """(train_ds, val_ds) over a <train_dir>/<class>/ tree with a deterministic validation split."""
+    train_items, val_items = split_items(list_labeled_images(train_dir), val_fraction)
+    print(f"{len(train_items)} training / {len(val_items)} validation images")
+    train_ds = make_dataset(train_items, img_size, batch_size, training=True, seed=seed, **kwargs)
+    val_ds = make_dataset(val_items, img_size, batch_size, training=False, seed=seed, **kwargs)
+    return train_ds, val_ds
+
+
+def gather_batches(array, labels, indices, batch_size: int = 32, training: bool = True,
+                   shuffle_buffer: int = 10000, seed: int = 42):
+    """Batched (rows, labels) dataset gathered from a (memory-mapped) array by row index.
+
+    Only row indices are shuffled; each batch is one sorted gather from the array.
+    Integer labels come out as int32; other label arrays (e.g. soft targets) keep their dtype.
+    """
+    row_shape = tuple(array.shape[1:])
+    dtype = tf.as_dtype(array.dtype)
+    label_dtype = np.int32 if np.issubdtype(labels.dtype, np.integer) else labels.dtype
+    label_shape = tuple(labels.shape[1:])
+
+    def gather(rows):
+        rows = np.sort(rows)
+        return np.ascontiguousarray(array[rows]), np.asarray(labels[rows], dtype=label_dtype)
+
+    def load(rows):
+        batch, y = tf.numpy_function(gather, [rows], (dtype, tf.as_dtype(label_dtype)))
+        return tf.ensure_shape(batch, (None,) + row_shape), tf.ensure_shape(y, (None,) + label_shape)
+
+    ds = tf.data.Dataset.from_tensor_slices(np.asarray(indices, dtype=np.int64))
+    if training:
+        ds = ds.shuffle(min(shuffle_buffer, max(1, len(indices))), seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size, drop_remainder=False)
+    return ds.map(load, num_parallel_calls=AUTOTUNE, deterministic=not training)
+
+
+def make_packed_dataset(packed, indices, img_size: int = IMG_SIZE, batch_size: int = 32, training: bool = True,
+                        shuffle_buffer: int = 10000, seed: int = 42, channels: int = 3, normalize: bool = True,
+                        labels=None):
+    """Batched (images, labels) dataset over rows `indices` of a memory-mapped PackedSplit.
+
+    Batches are gathered from the mapped array, then resized (and expanded to
+    `channels`) in the graph. `labels` replaces the split's own labels row for row.
+    """
+    row_shape = packed.images.shape[1:]
+
+    def load(batch, y):
+        if batch.shape.rank == 3:
+            batch = batch[..., tf.newaxis]
+        if batch.shape[-1] != channels:
+            batch = tf.image.grayscale_to_rgb(batch) if channels == 3 else tf.image.rgb_to_grayscale(batch)
+        if row_shape[0] != img_size:
+            batch = tf.image.resize(batch, (img_size, img_size), method="bilinear")
+        batch = tf.cast(tf.clip_by_value(tf.round(tf.cast(batch, tf.float32)), 0, 255), tf.uint8)
+        if normalize:
+            batch = tf.cast(batch, tf.float32) / 255.0
+        return batch, y
+
+    labels = packed.labels if labels is None else labels
+    ds = gather_batches(packed.images, labels, indices, batch_size, training, shuffle_buffer, seed)
+    ds = ds.map(load, num_parallel_calls=AUTOTUNE, deterministic=not training)
+    return ds.prefetch(AUTOTUNE)
+
+
+def make_packed_train_val_datasets(img_size: int = IMG_SIZE, batch_size: int = 32, val_fraction: float = 0.1,
+                                   seed: int = 42, packed=None, **kwargs):
+    """(train_ds, val_ds) over the packed model/train split, with the same validation split as the file pipeline."""
+    packed = packed if packed is not None else packed_split("train")
+    train_idx, val_idx = split_indices(packed.filenames, val_fraction)
+    print(f"{len(train_idx)} training / {len(val_idx)} validation images (packed)")
+    train_ds = make_packed_dataset(packed, train_idx, img_size, batch_size, training=True, seed=seed, **kwargs)
+    val_ds = make_packed_dataset(packed, val_idx, img_size, batch_size, training=False, seed=seed, **kwargs)
+    return train_ds, val_ds
@@ -0,0 +1,176 @@
+"""
+Knowledge distillation of the 224×224 MobileNetV2 into a compact student.
+
+The teacher (`mod_my_model01.keras` by default) scores every packed training image
+once; its probabilities are cached next to the bottleneck features, keyed by the
+teacher artifact. The student (the native CNN or a small MobileNetV2) is then trained
+on a mix of the hard labels and the teacher's temperature-softened distribution:
+
+    loss = hard_weight · CE(y, p_s) + (1 − hard_weight) · T² · KL(p_t^(1/T) ‖ p_s^(1/T))
+
+The student is saved as a plain Keras model with a metadata sidecar, so it is a
+drop-in for the teacher (`EMOTION_MODEL_PATH=../model/mod_student48.keras`).
+
+Usage (from the webapp directory):
+    python -m emotion_engine.training.distill --temperature 4 --hard-weight 0.1 --epochs 40
+    python -m emotion_engine.training.distill --arch mobilenet --img-size 96 --alpha 0.35
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from ..backends import load_predictor
+from ..cache import artifact_version
+from ..config import BASE_DIR, EMOTION_LABELS, find_model_path
+from ..metadata import save_metadata
+from ..packed import PackedSplit, packed_split, sample_rows
+from ..preprocessing import resize_batch
+from .data import make_packed_dataset, split_indices
+from .features import FEATURES_DIR
+from .models import estimate_macs
+from .native import ARCHITECTURES, augmenter, build_model, print_report, profile
+
+NUM_CLASSES = len(EMOTION_LABELS)
+EPSILON = 1e-7
+
+
+def teacher_targets(teacher_path: str, packed, batch_size: int = 64) -> np.ndarray:
+    """Teacher probabilities for every packed training image, cached per teacher artifact."""
+    out_dir = os.path.join(FEATURES_DIR, f"teacher-{artifact_version(teacher_path, 'keras')}")
+    probs_path = os.path.join(out_dir, "probs.npy")
+    try:
+        with open(os.path.join(out_dir, "index.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("source_fingerprint") == packed.meta["fingerprint"]:
+            return np.load(probs_path, mmap_mode="r")
+    except (OSError, ValueError):
+        pass
+
+    teacher = load_predictor("keras", teacher_path)
+    start = time.perf_counter()
+    probs = np.empty((len(packed), NUM_CLASSES), dtype=np.float32)
+    for i in range(0, len(packed), batch_size):
+        probs[i : i + batch_size] = teacher.predict_batch(resize_batch(packed.images[i : i + batch_size], teacher.img_size))
+    tmp_dir = out_dir.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, "probs.npy"), probs)
+    with open(os.path.join(tmp_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump({"teacher": os.path.abspath(teacher_path), "count": len(packed),
+                   "source_fingerprint": packed.meta["fingerprint"]}, f)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    print(f"Scored {len(packed)} training images with the teacher in {time.perf_counter() - start:.0f}s")
+    return np.load(probs_path, mmap_mode="r")
+
+
+def _tempered(probs, temperature: float):
+    """softmax(log p / T): the distribution a softmax layer would give at temperature T."""
+    return tf.nn.softmax(tf.math.log(tf.clip_by_value(probs, EPSILON, 1.0)) / temperature, axis=-1)
+
+
+def distillation_loss(temperature: float = 4.0, hard_weight: float = 0.1):
+    """Loss over targets packed as [one-hot label | teacher probabilities]."""
+
+    def loss(targets, student_probs):
+        hard, soft = targets[:, :NUM_CLASSES], targets[:, NUM_CLASSES:]
+        ce = tf.keras.losses.categorical_crossentropy(hard, student_probs)
+        p_t = tf.clip_by_value(_tempered(soft, temperature), EPSILON, 1.0)
+        p_s = tf.clip_by_value(_tempered(student_probs, temperature), EPSILON, 1.0)
+        kl = tf.reduce_sum(p_t * (tf.math.log(p_t) - tf.math.log(p_s)), axis=-1)
+        return hard_weight * ce + (1.0 - hard_weight) * temperature**2 * kl
+
+    return loss
+
+
+def hard_accuracy(targets, student_probs):
+    return tf.cast(tf.equal(tf.argmax(targets[:, :NUM_CLASSES], -1), tf.argmax(student_probs, -1)), tf.float32)
+
+
+def distill(teacher_path: str, arch: str = "cnn", img_size: int = 48, alpha: float = 0.35, epochs: int = 40,
+            batch_size: int = 64, temperature: float = 4.0, hard_weight: float = 0.1, val_fraction: float = 0.1,
+            limit=None, seed: int = 42):
+    """Train a student against cached teacher targets; return (uncompiled student, history)."""
+    tf.keras.utils.set_random_seed(seed)
+    packed = packed_split("train")
+    soft = teacher_targets(teacher_path, packed)
+    targets = np.concatenate([np.eye(NUM_CLASSES, dtype=np.float32)[packed.labels], soft], axis=1)
+
+    train_idx, val_idx = split_indices(packed.filenames, val_fraction)
+    if limit is not None:
+        rows = sample_rows(len(packed), limit)
+        train_idx, val_idx = train_idx[np.isin(train_idx, rows)], val_idx[np.isin(val_idx, rows)]
+    print(f"{len(train_idx)} training / {len(val_idx)} validation images (packed, teacher targets)")
+
+    augment = augmenter(seed)
+    train_ds = make_packed_dataset(packed, train_idx, img_size, batch_size, training=True, seed=seed, labels=targets)
+    train_ds = train_ds.map(lambda x, y: (augment(x, training=True), y), num_parallel_calls=tf.data.AUTOTUNE)
+    val_ds = make_packed_dataset(packed, val_idx, img_size, batch_size, training=False, labels=targets)
+
+    student = build_model(arch, img_size, alpha)
+    student.compile(optimizer="adam", loss=distillation_loss(temperature, hard_weight), metrics=[hard_accuracy])
+    callbacks = [
+        tf.keras.callbacks.EarlyStopping(monitor="val_hard_accuracy", mode="max", patience=6, restore_best_weights=True),
+        tf.keras.callbacks.ReduceLROnPlateau(monitor="val_loss", factor=0.2, patience=3, min_lr=1e-6),
+    ]
+    history = student.fit(train_ds, validation_data=val_ds, epochs=epochs, callbacks=callbacks)
+    # export an uncompiled copy so load_model needs no custom loss or optimizer state; its
+    # weights are overwritten, so do not download ImageNet weights for it
+    exported = build_model(arch, img_size, alpha, weights=None)
+    exported.set_weights(student.get_weights())
+    return exported, history
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teacher", default=None, help="Teacher Keras model (default: auto-discovered)")
+    parser.add_argument("--arch", choices=ARCHITECTURES, default="cnn")
+    parser.add_argument("--img-size", type=int, default=48)
+    parser.add_argument("--alpha", type=float, default=0.35, help="MobileNetV2 width multiplier")
+    parser.add_argument("--temperature", type=float, default=4.0)
+    parser.add_argument("--hard-weight", type=float, default=0.1, help="Weight of the hard-label loss")
+    parser.add_argument("--epochs", type=int, default=40)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--limit", type=int, default=None, help="Train on a fixed random subset of N images")
+    parser.add_argument("--output", default=None, help="Student path (default: model/mod_student<size>.keras)")
+    parser.add_argument("--eval-limit", type=int, default=None, help="Score a fixed random subset of the test set")
+    args = parser.parse_args(argv)
+
+    teacher_path = args.teacher or find_model_path()
+    output = args.output or os.path.join(BASE_DIR, "model", f"mod_student{args.img_size}.keras")
+    start = time.perf_counter()
+    student, history = distill(teacher_path, args.arch, args.img_size, args.alpha, args.epochs, args.batch_size,
+                               args.temperature, args.hard_weight, limit=args.limit)
+    print(f"Distillation took {(time.perf_counter() - start) / 60:.1f} min")
+
+    student.save(output)
+    save_metadata(
+        output, args.img_size,
+        architecture=student.name,
+        teacher=os.path.basename(teacher_path),
+        temperature=args.temperature,
+        hard_weight=args.hard_weight,
+        macs=estimate_macs(student),
+        params=student.count_params(),
+        val_accuracy=float(max(history.history["val_hard_accuracy"])),
+    )
+    print(f"Saved {output}")
+
+    test = packed_split("test")
+    if args.eval_limit is not None:
+        rows = sample_rows(len(test), args.eval_limit)
+        test = PackedSplit(test.images[rows], test.labels[rows], [test.filenames[i] for i in rows], test.meta)
+    report = [profile(output, test), profile(teacher_path, test)]
+    print_report(report)
+    agreement = np.mean(report[0]["predictions"] == report[1]["predictions"])
+    print(f"student agrees with the teacher on {agreement:.1%} of test faces")
+
+
+if __name__ == "__main__":
+    main()
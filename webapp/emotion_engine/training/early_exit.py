@@ -0,0 +1,123 @@
+"""
+Train early-exit heads on a trained MobileNetV2 classifier.
+
+The notebook's classifier head (GlobalAveragePooling → Dense 128 → Dense 64 → softmax)
+is copied onto intermediate inverted-residual blocks. The backbone and the original
+head stay frozen, so the final output is unchanged and only the auxiliary heads learn.
+The result is one multi-output artifact, `[exit_1, ..., exit_k, final]`, with the exit
+blocks and the default thresholds in its metadata sidecar. It is served with
+EMOTION_BACKEND=early_exit (see emotion_engine/early_exit.py).
+
+Usage (from the webapp directory):
+    python -m emotion_engine.training.early_exit --exits block_5_add block_9_add block_12_add --epochs 5
+    python -m emotion_engine.training.early_exit --thresholds 0.9,0.85,0.8 --limit 4000
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from ..config import find_model_path
+from ..early_exit import load_early_exit, parse_thresholds, report
+from ..engine import load_keras_model
+from ..metadata import model_input_size, save_metadata
+from ..packed import packed_split, sample_rows
+from .data import make_packed_dataset, split_indices
+from .models import classifier_head, estimate_macs
+from .native import augmenter
+
+# single-tensor block outputs at 28×28, 14×14 and 14×14 (224 input): the next block never reaches past them
+DEFAULT_EXITS = ("block_5_add", "block_9_add", "block_12_add")
+
+
+def attach_exits(model, exits=DEFAULT_EXITS, head_units=(128, 64), head_dropout=(0.3, 0.2)):
+    """(exits-only training model, full early-exit model) sharing `model`'s now frozen layers."""
+    for layer in model.layers:
+        layer.trainable = False
+    heads = [
+        classifier_head(model.get_layer(block).output, head_units, head_dropout, name=f"exit_{k}")
+        for k, block in enumerate(exits)
+    ]
+    trainer = tf.keras.Model(model.input, heads, name=f"{model.name}_exit_heads")
+    full = tf.keras.Model(model.input, heads + [model.output], name=f"{model.name}_exits")
+    return trainer, full
+
+
+def train_exits(model, exits=DEFAULT_EXITS, epochs: int = 5, batch_size: int = 32, val_fraction: float = 0.1,
+                limit=None, seed: int = 42):
+    """Train the auxiliary heads on the packed training split; return (early-exit model, history)."""
+    tf.keras.utils.set_random_seed(seed)
+    img_size = model_input_size(model)
+    trainer, full = attach_exits(model, exits)
+
+    packed = packed_split("train")
+    train_idx, val_idx = split_indices(packed.filenames, val_fraction)
+    if limit is not None:
+        rows = sample_rows(len(packed), limit)
+        train_idx, val_idx = train_idx[np.isin(train_idx, rows)], val_idx[np.isin(val_idx, rows)]
+    print(f"{len(train_idx)} training / {len(val_idx)} validation images (packed)")
+
+    def per_head(x, y):
+        return x, tuple(y for _ in exits)
+
+    augment = augmenter(seed)
+    train_ds = make_packed_dataset(packed, train_idx, img_size, batch_size, training=True, seed=seed)
+    train_ds = train_ds.map(lambda x, y: per_head(augment(x, training=True), y), num_parallel_calls=tf.data.AUTOTUNE)
+    val_ds = make_packed_dataset(packed, val_idx, img_size, batch_size, training=False).map(per_head)
+
+    trainer.compile(optimizer="adam", loss=["sparse_categorical_crossentropy"] * len(exits),
+                    metrics=[["accuracy"] for _ in exits])
+    callbacks = [
+        tf.keras.callbacks.EarlyStopping(monitor="val_loss", patience=3, restore_best_weights=True),
+        tf.keras.callbacks.ReduceLROnPlateau(monitor="val_loss", factor=0.2, patience=2, min_lr=1e-6),
+    ]
+    history = trainer.fit(train_ds, validation_data=val_ds, epochs=epochs, callbacks=callbacks)
+    return full, history
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=None, help="Trained MobileNetV2 classifier (default: auto-discovered)")
+    parser.add_argument("--exits", nargs="+", default=list(DEFAULT_EXITS), help="Blocks that get an exit head")
+    parser.add_argument("--thresholds", default="0.8", help="Default per-exit thresholds stored in the metadata")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--limit", type=int, default=None, help="Train on a fixed random subset of N images")
+    parser.add_argument("--output", default=None, help="Output path (default: <model>_exits.keras)")
+    parser.add_argument("--eval-limit", type=int, default=None, help="Score a fixed random subset of the test set")
+    args = parser.parse_args(argv)
+
+    source = args.model or find_model_path()
+    output = args.output or os.path.splitext(source)[0] + "_exits.keras"
+    thresholds = parse_thresholds(args.thresholds, len(args.exits))
+    model = load_keras_model(source)
+
+    start = time.perf_counter()
+    full, history = train_exits(model, args.exits, args.epochs, args.batch_size, limit=args.limit)
+    print(f"Training the exit heads took {(time.perf_counter() - start) / 60:.1f} min")
+
+    full.save(output)
+    val_accuracy = [float(max(history.history[f"val_exit_{k}_accuracy"])) for k in range(len(args.exits))]
+    save_metadata(
+        output, model_input_size(full),
+        architecture="early_exit",
+        base=os.path.basename(source),
+        exits=list(args.exits),
+        thresholds=thresholds,
+        macs=estimate_macs(model),
+        exit_val_accuracy=val_accuracy,
+    )
+    print(f"Saved {output}")
+
+    predictor = load_early_exit(output).warmup()
+    test = packed_split("test")
+    rows = sample_rows(len(test), args.eval_limit)
+    report(predictor, test.images[rows], np.asarray(test.labels[rows], dtype=np.int32),
+           [[t] * len(args.exits) for t in (0.6, 0.7, 0.8, 0.9)] + [thresholds])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Cached bottleneck features for fast head training and fine-tune sweeps.
+
+With `fine_tune_at = 120` the bottom of MobileNetV2 is frozen, so its activations
+never change between epochs. This stage runs the frozen part once per training
+image and stores the result as a memory-mapped float16 array under
+
+    model/features/<architecture>-<frozen weights hash>/<layer>/
+
+(`features.npy`, `labels.npy`, `index.json`). The trainable upper layers and the
+GlobalAveragePooling → Dense head are then trained straight from the cache, so an
+epoch only costs the layers that actually learn and head variants are cheap to try.
+
+The cache sits at a single-tensor boundary at or just before the first trainable
+layer, choosing the smallest activation within a few layers (e.g. the output of
+block_12 rather than the 576-channel expansion inside block_13). No augmentation is
+applied, since cached features are fixed per image.
+
+With `--fine-tune-at 155` (whole backbone frozen) the cache holds the pooled
+1280-d vectors and a training step is a plain MLP step, which is the cheap way to
+sweep head architectures before fine-tuning.
+
+Usage (from the webapp directory):
+    python -m emotion_engine.training.features --fine-tune-at 120 --epochs 10
+    python -m emotion_engine.training.features --head 256 --dropout 0.4 --epochs 10   # reuses the cache
+    python -m emotion_engine.training.features --fine-tune-at 155 --head 256,64       # head-only sweep
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from ..config import BASE_DIR, IMG_SIZE
+from ..evaluation import predict_arrays
+from ..metadata import save_metadata
+from ..packed import packed_split, sample_rows
+from ..serving import KerasPredictor
+from .data import AUTOTUNE, gather_batches, make_packed_dataset, split_indices
+from .models import build_mobilenet_classifier
+
+FEATURES_DIR = os.path.join(BASE_DIR, "model", "features")
+CACHE_VERSION = 1
+# how far before the first trainable layer to look for a smaller activation to cache
+CUT_SEARCH_WINDOW = 8
+
+
+def _inputs(layer):
+    inputs = layer.input
+    return inputs if isinstance(inputs, (list, tuple)) else [inputs]
+
+
+def _has_trainable_weights(layer) -> bool:
+    return layer.trainable and bool(layer.trainable_weights)
+
+
+def boundaries(model) -> list:
+    """Indices `i` such that layers[i:] only consume one tensor produced before them: layers[i-1].output."""
+    layers = model.layers
+    producer = {layer.output.name: i for i, layer in enumerate(layers)}
+    # earliest producer index consumed by any layer at or after each index
+    earliest = [None] * len(layers)
+    running = len(layers)
+    for j in range(len(layers) - 1, 0, -1):
+        running = min([running] + [producer[t.name] for t in _inputs(layers[j])])
+        earliest[j] = running
+    return [i for i in range(1, len(layers)) if earliest[i] == i - 1]
+
+
+def choose_cut(model) -> int:
+    """First uncached layer index: the smallest boundary activation just before the first trainable layer."""
+    first_trainable = next(i for i, layer in enumerate(model.layers) if _has_trainable_weights(layer))
+    candidates = [i for i in boundaries(model) if first_trainable - CUT_SEARCH_WINDOW < i <= first_trainable]
+    if not candidates:
+        raise ValueError(f"No single-tensor boundary before layer {first_trainable} ({model.layers[first_trainable].name})")
+
+    def size(i):
+        return int(np.prod(model.layers[i - 1].output.shape[1:]))
+
+    return min(candidates, key=lambda i: (size(i), -i))
+
+
+def split_model(model, cut: int):
+    """(frozen, upper) models sharing `model`'s layers; upper maps the cached tensor to the output."""
+    layers = model.layers
+    cached = layers[cut - 1].output
+    frozen = tf.keras.Model(model.input, cached, name=f"{model.name}_frozen")
+
+    features = tf.keras.Input(cached.shape[1:], name="features")
+    tensors = {cached.name: features}
+    for layer in layers[cut:]:
+        inputs = [tensors[t.name] for t in _inputs(layer)]
+        tensors[layer.output.name] = layer(inputs if isinstance(layer.input, (list, tuple)) else inputs[0])
+    upper = tf.keras.Model(features, tensors[model.output.name], name=f"{model.name}_upper")
+    return frozen, upper
+
+
+def frozen_weights_hash(model, cut: int) -> str:
+    h = hashlib.sha1()
+    for layer in model.layers[:cut]:
+        for w in layer.get_weights():
+            h.update(np.ascontiguousarray(w).tobytes())
+    return h.hexdigest()[:10]
+
+
+def cache_dir(model, cut: int) -> str:
+    key = f"{model.name}-{frozen_weights_hash(model, cut)}"
+    return os.path.join(FEATURES_DIR, key, model.layers[cut - 1].name)
+
+
+def _read_index(path: str):
+    try:
+        with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def extract_features(frozen, packed, rows, out_dir: str, img_size: int, batch_size: int = 64):
+    """Run `frozen` once over `rows` of the packed split and write float16 features (written atomically)."""
+    count = len(rows)
+    tmp_dir = out_dir.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    shape = (count,) + tuple(frozen.output.shape[1:])
+    features = np.lib.format.open_memmap(os.path.join(tmp_dir, "features.npy"), mode="w+", dtype=np.float16, shape=shape)
+    ds = make_packed_dataset(packed, rows, img_size, batch_size, training=False)
+    # a traced call keeps peak memory to one graph's activations (eager calls hold several GB)
+    run = tf.function(lambda x: frozen(x, training=False))
+    start, row = time.perf_counter(), 0
+    for batch, _ in ds:
+        out = run(batch).numpy()
+        features[row : row + len(out)] = out
+        row += len(out)
+    features.flush()
+    del features
+    np.save(os.path.join(tmp_dir, "labels.npy"), np.asarray(packed.labels[rows], dtype=np.uint8))
+
+    meta = {
+        "version": CACHE_VERSION,
+        "model": frozen.name,
+        "layer": frozen.output.name,
+        "img_size": img_size,
+        "count": count,
+        "source_fingerprint": packed.meta["fingerprint"],
+        "seconds": time.perf_counter() - start,
+        "filenames": [packed.filenames[i] for i in rows],
+    }
+    with open(os.path.join(tmp_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    print(f"Cached {count} feature maps {shape[1:]} in {meta['seconds']:.0f}s -> {out_dir}")
+
+
+def load_features(out_dir: str):
+    """(features memmap, labels memmap, index) of a feature cache."""
+    meta = _read_index(out_dir)
+    if meta is None:
+        raise FileNotFoundError(f"No feature cache at {out_dir}")
+    features = np.load(os.path.join(out_dir, "features.npy"), mmap_mode="r")
+    labels = np.load(os.path.join(out_dir, "labels.npy"), mmap_mode="r")
+    return features, labels, meta
+
+
+def ensure_features(model, cut: int, packed, img_size: int, limit=None):
+    """Open the cache for (model, layer), extracting it first if missing or stale."""
+    out_dir = cache_dir(model, cut)
+    meta = _read_index(out_dir)
+    rows = sample_rows(len(packed), limit)
+    if (meta is None or meta.get("version") != CACHE_VERSION or meta.get("count") != len(rows)
+            or meta.get("source_fingerprint") != packed.meta["fingerprint"]):
+        frozen, _ = split_model(model, cut)
+        extract_features(frozen, packed, rows, out_dir, img_size)
+    return load_features(out_dir)
+
+
+def feature_dataset(features, labels, indices, batch_size: int = 64, training: bool = True, seed: int = 42):
+    """Batched float32 (features, labels) from the memory-mapped cache."""
+    ds = gather_batches(features, labels, indices, batch_size, training, seed=seed)
+    ds = ds.map(lambda x, y: (tf.cast(x, tf.float32), y), num_parallel_calls=AUTOTUNE)
+    return ds.prefetch(AUTOTUNE)
+
+
+def train_from_cache(model, cut: int, epochs: int = 10, batch_size: int = 64, val_fraction: float = 0.1,
+                     limit=None, seed: int = 42, img_size: int = IMG_SIZE):
+    """Fit the layers above `cut` on cached features; `model` shares them and is trained in place."""
+    packed = packed_split("train")
+    features, labels, meta = ensure_features(model, cut, packed, img_size, limit)
+    train_idx, val_idx = split_indices(meta["filenames"], val_fraction)
+    print(f"{len(train_idx)} training / {len(val_idx)} validation feature maps from cache")
+
+    _, upper = split_model(model, cut)
+    upper.compile(loss="sparse_categorical_crossentropy", optimizer="adam", metrics=["accuracy"])
+    callbacks = [
+        tf.keras.callbacks.EarlyStopping(monitor="val_loss", patience=3, restore_best_weights=True),
+        tf.keras.callbacks.ReduceLROnPlateau(monitor="val_loss", factor=0.2, patience=2, min_lr=1e-6),
+    ]
+    return upper.fit(
+        feature_dataset(features, labels, train_idx, batch_size, training=True, seed=seed),
+        validation_data=feature_dataset(features, labels, val_idx, batch_size, training=False),
+        epochs=epochs,
+        callbacks=callbacks,
+    )
+
+
+def _floats(text: str):
+    return tuple(float(v) for v in text.split(",") if v)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--img-size", type=int, default=IMG_SIZE)
+    parser.add_argument("--alpha", type=float, default=1.0)
+    parser.add_argument("--fine-tune-at", type=int, default=120)
+    parser.add_argument("--head", default="128,64", help="Dense units of the head, comma separated")
+    parser.add_argument("--dropout", default="0.3,0.2", help="Dropout after each Dense layer, comma separated")
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--limit", type=int, default=None, help="Cache/train on a fixed random subset of N images")
+    parser.add_argument("--weights", default="imagenet", help="Backbone weights ('imagenet' or 'none')")
+    parser.add_argument("--output", default=None, help="Model path (default: model/mod_cached_<head>.keras)")
+    parser.add_argument("--eval-limit", type=int, default=None, help="Score a fixed random subset of the test set")
+    args = parser.parse_args(argv)
+
+    tf.keras.utils.set_random_seed(42)
+    head = tuple(int(v) for v in _floats(args.head))
+    weights = None if args.weights == "none" else args.weights
+    model = build_mobilenet_classifier(args.img_size, args.alpha, weights, args.fine_tune_at,
+                                       head_units=head, head_dropout=_floats(args.dropout))
+    cut = choose_cut(model)
+    print(f"Caching {model.layers[cut - 1].name} output {tuple(model.layers[cut - 1].output.shape[1:])}; "
+          f"training {len(model.layers) - cut} layers from the cache")
+
+    start = time.perf_counter()
+    history = train_from_cache(model, cut, args.epochs, args.batch_size, limit=args.limit, img_size=args.img_size)
+    print(f"Training took {time.perf_counter() - start:.0f}s")
+
+    output = args.output or os.path.join(BASE_DIR, "model", f"mod_cached_{'-'.join(map(str, head))}.keras")
+    model.save(output)
+    save_metadata(output, args.img_size, architecture=model.name, fine_tune_at=args.fine_tune_at,
+                  cached_layer=model.layers[cut - 1].name, head=list(head),
+                  val_accuracy=float(max(history.history["val_accuracy"])))
+    print(f"Saved {output}")
+
+    test = packed_split("test")
+    rows = sample_rows(len(test), args.eval_limit)
+    preds, labels = predict_arrays(KerasPredictor(model, args.img_size).warmup(), test.images[rows],
+                                   test.labels[rows], args.img_size, batch_size=64)
+    print(f"test accuracy on {len(rows)} images: {np.mean(preds == labels):.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Model architectures for training, with a rough per-face cost estimate.
+
+`build_mobilenet_classifier` is the transfer-learning model from face.ipynb
+(MobileNetV2 + a small dense head); with a reduced `img_size` and `alpha` it is also
+the "small MobileNetV2" variant. `build_native_cnn` is a compact depthwise-separable
+CNN that works directly on 48×48 FER faces. Every model takes (H, W, 3) input in
+[0, 1], the contract shared by all predictors.
+"""
+
+import numpy as np
+
+from ..config import EMOTION_LABELS, IMG_SIZE
+
+# ITU-R BT.601 luma weights, the same as cv2.COLOR_RGB2GRAY
+LUMA = (0.299, 0.587, 0.114)
+
+
+def classifier_head(x, units=(128, 64), dropout=(0.3, 0.2), num_classes: int = len(EMOTION_LABELS), name: str = None):
+    """GlobalAveragePooling → Dense/Dropout stack → softmax, as in face.ipynb.
+
+    With `name`, the layers are named `<name>_pool`, `<name>_dense<i>`, ... and the
+    softmax layer (the head's output) is called `name`.
+    """
+    from tensorflow.keras import layers
+
+    def named(suffix):
+        return f"{name}_{suffix}" if name else None
+
+    x = layers.GlobalAveragePooling2D(name=named("pool"))(x)
+    for i, (n, rate) in enumerate(zip(units, dropout)):
+        x = layers.Dense(n, activation="relu", name=named(f"dense{i}"))(x)
+        x = layers.Dropout(rate, name=named(f"dropout{i}"))(x)
+    return layers.Dense(num_classes, activation="softmax", name=name)(x)
+
+
+def build_mobilenet_classifier(img_size: int = IMG_SIZE, alpha: float = 1.0, weights="imagenet",
+                               fine_tune_at: int = 120, num_classes: int = len(EMOTION_LABELS),
+                               head_units=(128, 64), head_dropout=(0.3, 0.2)):
+    """MobileNetV2 backbone (layers before `fine_tune_at` frozen) + the notebook's dense head."""
+    from tensorflow import keras
+
+    base_model = keras.applications.MobileNetV2(
+        input_shape=(img_size, img_size, 3), include_top=False, weights=weights, alpha=alpha
+    )
+    base_model.trainable = True
+    for layer in base_model.layers[:fine_tune_at]:
+        layer.trainable = False
+
+    outputs = classifier_head(base_model.output, head_units, head_dropout, num_classes)
+    return keras.Model(base_model.input, outputs, name=f"mobilenetv2_{alpha:g}_{img_size}")
+
+
+def build_native_cnn(img_size: int = 48, widths=(32, 64, 128, 256), num_classes: int = len(EMOTION_LABELS)):
+    """Compact CNN for native-resolution grayscale faces.
+
+    A frozen 1×1 convolution turns the RGB input into luma, so the network itself is
+    grayscale while the serving contract (uint8 RGB batches) stays unchanged.
+    """
+    from tensorflow import keras
+    from tensorflow.keras import layers
+
+    inputs = keras.Input((img_size, img_size, 3))
+    to_gray = layers.Conv2D(1, 1, use_bias=False, trainable=False, name="to_gray")
+    x = to_gray(inputs)
+    to_gray.set_weights([np.array(LUMA, dtype=np.float32).reshape(1, 1, 3, 1)])
+
+    x = layers.Conv2D(widths[0], 3, padding="same", use_bias=False)(x)
+    x = layers.BatchNormalization()(x)
+    x = layers.ReLU()(x)
+    for i, width in enumerate(widths):
+        for _ in range(2):
+            x = layers.SeparableConv2D(width, 3, padding="same", use_bias=False)(x)
+            x = layers.BatchNormalization()(x)
+            x = layers.ReLU()(x)
+        if i < len(widths) - 1:
+            x = layers.MaxPooling2D()(x)
+            x = layers.Dropout(0.1 * (i + 1))(x)
+
+    x = layers.GlobalAveragePooling2D()(x)
+    x = layers.Dense(128, activation="relu")(x)
+    x = layers.Dropout(0.4)(x)
+    outputs = layers.Dense(num_classes, activation="softmax")(x)
+    return keras.Model(inputs, outputs, name=f"native_cnn_{img_size}")
+
+
+def _spatial(shape):
+    return int(np.prod([d for d in shape[1:-1]])) if len(shape) > 2 else 1
+
+
+def estimate_macs(model) -> int:
+    """Multiply-accumulates per image of the convolution and dense layers (nested models included)."""
+    from tensorflow import keras
+    from tensorflow.keras import layers
+
+    total = 0
+    for layer in model.layers:
+        if isinstance(layer, keras.Model):
+            total += estimate_macs(layer)
+            continue
+        if not isinstance(layer, (layers.Conv2D, layers.DepthwiseConv2D, layers.SeparableConv2D, layers.Dense)):
+            continue
+        in_shape, out_shape = layer.input.shape, layer.output.shape
+        cin, cout = in_shape[-1], out_shape[-1]
+        positions = _spatial(out_shape)
+        if isinstance(layer, layers.Dense):
+            total += _spatial(in_shape) * cin * cout
+            continue
+        kh, kw = layer.kernel_size
+        if isinstance(layer, layers.SeparableConv2D):
+            mult = layer.depth_multiplier
+            total += positions * (kh * kw * cin * mult + cin * mult * cout)
+        elif isinstance(layer, layers.DepthwiseConv2D):
+            total += positions * kh * kw * cin * layer.depth_multiplier
+        else:
+            total += positions * kh * kw * (cin // layer.groups) * cout
+    return int(total)
@@ -0,0 +1,143 @@
+"""
+Train a native-resolution emotion model and report its accuracy/latency trade-off.
+
+FER faces are 48×48 grayscale; upscaling them to 224×224×3 for MobileNetV2 pushes
+~65× more pixels (and ~300 MMACs) through the network per face. This trains either a
+compact CNN at 48×48 or MobileNetV2 with a reduced input size and width multiplier,
+from the packed training split, and saves it with a metadata sidecar so every
+backend serves it at its own input size.
+
+Usage (from the webapp directory):
+    python -m emotion_engine.training.native --arch cnn --img-size 48
+    python -m emotion_engine.training.native --arch mobilenet --img-size 96 --alpha 0.35
+    python -m emotion_engine.training.native --compare ../model/mod_cnn48.keras ../model/mod_my_model01.keras
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from ..backends import load_predictor
+from ..config import BASE_DIR, find_model_path
+from ..evaluation import predict_arrays
+from ..latency import percentiles, time_single_images
+from ..metadata import save_metadata
+from ..packed import packed_split
+from ..preprocessing import resize_batch
+from .data import make_packed_train_val_datasets
+from .models import build_mobilenet_classifier, build_native_cnn, estimate_macs
+
+ARCHITECTURES = ("cnn", "mobilenet")
+
+
+def augmenter(seed: int = 42):
+    """Light geometric augmentation applied to normalized training batches."""
+    from tensorflow.keras import layers
+
+    return tf.keras.Sequential([
+        layers.RandomFlip("horizontal", seed=seed),
+        layers.RandomRotation(0.05, seed=seed),
+        layers.RandomTranslation(0.08, 0.08, seed=seed),
+        layers.RandomZoom(0.1, seed=seed),
+    ])
+
+
+def build_model(arch: str, img_size: int, alpha: float = 1.0, fine_tune_at: int = 120, weights="imagenet"):
+    if arch == "cnn":
+        return build_native_cnn(img_size)
+    return build_mobilenet_classifier(img_size, alpha, weights=weights, fine_tune_at=fine_tune_at)
+
+
+def train(arch: str, img_size: int, alpha: float, epochs: int, batch_size: int, output: str,
+          fine_tune_at: int = 120, learning_rate: float = 1e-3, seed: int = 42):
+    """Train from the packed split, save the model + metadata sidecar, return the output path."""
+    tf.keras.utils.set_random_seed(seed)
+    train_ds, val_ds = make_packed_train_val_datasets(img_size=img_size, batch_size=batch_size, seed=seed)
+    augment = augmenter(seed)
+    train_ds = train_ds.map(lambda x, y: (augment(x, training=True), y), num_parallel_calls=tf.data.AUTOTUNE)
+
+    model = build_model(arch, img_size, alpha, fine_tune_at)
+    model.compile(loss="sparse_categorical_crossentropy", optimizer=tf.keras.optimizers.Adam(learning_rate),
+                  metrics=["accuracy"])
+    callbacks = [
+        tf.keras.callbacks.EarlyStopping(monitor="val_loss", patience=5, restore_best_weights=True),
+        tf.keras.callbacks.ReduceLROnPlateau(monitor="val_loss", factor=0.2, patience=2, min_lr=1e-6),
+    ]
+    history = model.fit(train_ds, validation_data=val_ds, epochs=epochs, callbacks=callbacks)
+
+    model.save(output)
+    save_metadata(
+        output, img_size,
+        architecture=model.name,
+        alpha=alpha if arch == "mobilenet" else None,
+        macs=estimate_macs(model),
+        params=model.count_params(),
+        epochs=len(history.history["loss"]),
+        val_accuracy=float(max(history.history["val_accuracy"])),
+    )
+    print(f"Saved {output}")
+    return output
+
+
+def profile(path: str, test, latency_samples: int = 200) -> dict:
+    """Test accuracy, single-face latency and per-face MACs of one Keras artifact."""
+    predictor = load_predictor("keras", path)
+    img_size = predictor.img_size
+    preds, labels = predict_arrays(predictor, test.images, test.labels, img_size, batch_size=64)
+    singles = [resize_batch(test.images[i : i + 1], img_size) for i in range(min(latency_samples, len(test)))]
+    return {
+        "path": path,
+        "img_size": img_size,
+        "mmacs": estimate_macs(predictor.model) / 1e6,
+        "params": predictor.model.count_params(),
+        "size_mb": os.path.getsize(path) / 1e6,
+        "accuracy": float(np.mean(preds == labels)),
+        "predictions": preds,
+        "latency_ms": percentiles(time_single_images(predictor, singles)),
+    }
+
+
+def print_report(rows: list):
+    print(f"{'model':<28} {'input':>6} {'MMACs':>8} {'params':>9} {'MB':>6} {'accuracy':>9} {'p50 ms':>7} {'p95 ms':>7}")
+    for r in rows:
+        print(f"{os.path.basename(r['path']):<28} {r['img_size']:>6} {r['mmacs']:>8.1f} {r['params']:>9,} "
+              f"{r['size_mb']:>6.1f} {r['accuracy']:>9.4f} {r['latency_ms']['p50']:>7.2f} {r['latency_ms']['p95']:>7.2f}")
+    if len(rows) > 1:
+        ref, new = rows[-1], rows[0]
+        print(f"{os.path.basename(new['path'])} vs {os.path.basename(ref['path'])}: "
+              f"{ref['mmacs'] / max(new['mmacs'], 1e-9):.1f}x fewer MACs, "
+              f"{ref['latency_ms']['p50'] / max(new['latency_ms']['p50'], 1e-9):.1f}x p50 speed-up, "
+              f"accuracy {new['accuracy'] - ref['accuracy']:+.4f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--arch", choices=ARCHITECTURES, default="cnn")
+    parser.add_argument("--img-size", type=int, default=48)
+    parser.add_argument("--alpha", type=float, default=0.35, help="MobileNetV2 width multiplier")
+    parser.add_argument("--fine-tune-at", type=int, default=120, help="MobileNetV2 layers kept frozen")
+    parser.add_argument("--epochs", type=int, default=40)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--output", default=None, help="Model path (default: model/mod_<arch><size>.keras)")
+    parser.add_argument("--reference", default=None, help="Model to compare against (default: auto-discovered)")
+    parser.add_argument("--compare", nargs="+", default=None, help="Only report on these existing models")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        paths = args.compare
+    else:
+        output = args.output or os.path.join(BASE_DIR, "model", f"mod_{args.arch}{args.img_size}.keras")
+        start = time.perf_counter()
+        train(args.arch, args.img_size, args.alpha, args.epochs, args.batch_size, output, args.fine_tune_at)
+        print(f"Training took {(time.perf_counter() - start) / 60:.1f} min")
+        reference = args.reference or find_model_path()
+        paths = [output] + ([reference] if os.path.exists(reference) else [])
+
+    print_report([profile(path, packed_split("test")) for path in paths])
+
+
+if __name__ == "__main__":
+    main()
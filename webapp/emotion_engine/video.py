@@ -0,0 +1,281 @@
+"""
+Video file analysis: a per-second emotion timeline for every tracked face.
+
+    cv2.VideoCapture ──► sampled frames ──► detection pool ──► tracker ──► crop batches ──► timeline
+     (grab() skips              (N threads, in order,        (IoU ids)    (one forward
+      unsampled frames)          ≤ 2·N frames in flight)                   pass each)
+
+Frames are streamed from the file and only `sample_fps` frames per second of video are
+decoded and analyzed; the rest are skipped with `grab()`. Haar detection releases the
+GIL, so a thread pool spreads it across cores. Detections come back in frame order and
+are linked into tracks by IoU. Face crops are classified in fixed-size batches. Each
+face's probabilities are averaged per track and per second of video. Memory stays
+bounded by the frames in flight, one crop batch and the (small) timeline, whatever the
+length of the recording.
+
+Usage (from the webapp directory):
+    python -m emotion_engine.video clip.mp4 --fps 4 --workers 4 --output timeline.csv
+"""
+
+import argparse
+import csv
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+from .config import EMOTION_LABELS
+from .detection import FaceDetector
+from .preprocessing import crop_faces, resize_batch
+from .tracking import FaceTracker
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm", ".m4v")
+# Frames analyzed per second of video
+VIDEO_SAMPLE_FPS = float(os.environ.get("EMOTION_VIDEO_SAMPLE_FPS", "4"))
+VIDEO_WORKERS = int(os.environ.get("EMOTION_VIDEO_WORKERS", str(os.cpu_count() or 1)))
+
+
+@dataclass
+class VideoInfo:
+    fps: float
+    frame_count: int
+    width: int
+    height: int
+
+    @property
+    def duration(self) -> float:
+        return self.frame_count / self.fps if self.fps else 0.0
+
+
+def _open(path: str):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video {path}")
+    return cap
+
+
+def _fps(cap) -> float:
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    return fps if fps and math.isfinite(fps) and fps > 0 else 30.0
+
+
+def probe(path: str) -> VideoInfo:
+    cap = _open(path)
+    try:
+        return VideoInfo(_fps(cap), max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT))),
+                         int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    finally:
+        cap.release()
+
+
+def sampled_frames(path: str, sample_fps: float = VIDEO_SAMPLE_FPS):
+    """Yield (frame index, timestamp in seconds, BGR frame) for `sample_fps` frames per second of video."""
+    cap = _open(path)
+    try:
+        fps = _fps(cap)
+        step = max(fps / sample_fps, 1.0) if sample_fps > 0 else 1.0
+        index, next_sample = 0, 0.0
+        while True:
+            if index + 1e-6 >= next_sample:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                yield index, index / fps, frame
+                next_sample += step
+            elif not cap.grab():  # advance without decoding into a BGR image
+                break
+            index += 1
+    finally:
+        cap.release()
+
+
+# ─────────────────────────────────────────────────────────────
+# Detection workers (threads: detectMultiScale releases the GIL)
+# ─────────────────────────────────────────────────────────────
+_local = threading.local()
+
+
+def _detect_frame(frame_bgr: np.ndarray, img_size: int):
+    """(gray frame, boxes, resized uint8 RGB crops or None) for one frame."""
+    detector = getattr(_local, "detector", None)
+    if detector is None:
+        detector = _local.detector = FaceDetector()
+    gray = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+    boxes = [tuple(int(v) for v in b) for b in detector.detect(gray)]
+    if not boxes:
+        return gray, boxes, None
+    rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+    return gray, boxes, resize_batch(crop_faces(rgb, boxes), img_size)
+
+
+# ─────────────────────────────────────────────────────────────
+# Timeline
+# ─────────────────────────────────────────────────────────────
+class Timeline:
+    """Mean class probabilities per (track, whole second of video)."""
+
+    def __init__(self, labels=EMOTION_LABELS):
+        self.labels = list(labels)
+        self._sums = {}
+
+    def add(self, track_id: int, timestamp: float, probs: np.ndarray):
+        key = (track_id, int(timestamp))
+        total, count = self._sums.get(key, (0.0, 0))
+        self._sums[key] = (total + np.asarray(probs, dtype=np.float64), count + 1)
+
+    @property
+    def tracks(self) -> list:
+        return sorted({track for track, _ in self._sums})
+
+    def rows(self, track_id: int = None) -> list:
+        """One dict per (track, second): dominant emotion, its mean confidence, samples and all probabilities."""
+        rows = []
+        for (track, second), (total, count) in sorted(self._sums.items()):
+            if track_id is not None and track != track_id:
+                continue
+            mean = total / count
+            idx = int(np.argmax(mean))
+            rows.append({
+                "track": track,
+                "second": second,
+                "emotion": self.labels[idx],
+                "confidence": float(mean[idx]),
+                "samples": count,
+                "probabilities": {label: float(p) for label, p in zip(self.labels, mean)},
+            })
+        return rows
+
+    def write_csv(self, f):
+        writer = csv.writer(f)
+        writer.writerow(["track", "second", "emotion", "confidence", "samples"] + [f"p_{l}" for l in self.labels])
+        for r in self.rows():
+            writer.writerow([r["track"], r["second"], r["emotion"], f"{r['confidence']:.4f}", r["samples"]]
+                            + [f"{r['probabilities'][l]:.4f}" for l in self.labels])
+
+
+@dataclass
+class VideoProgress:
+    frames: int
+    faces: int
+    video_seconds: float
+    duration: float
+    elapsed: float
+
+    @property
+    def fraction(self) -> float:
+        return min(1.0, self.video_seconds / self.duration) if self.duration else 0.0
+
+    @property
+    def speed(self) -> float:
+        """Seconds of video analyzed per wall-clock second (above 1 is faster than real time)."""
+        return self.video_seconds / self.elapsed if self.elapsed else 0.0
+
+
+# ─────────────────────────────────────────────────────────────
+# Driver
+# ─────────────────────────────────────────────────────────────
+def analyze_video(engine, path: str, sample_fps: float = VIDEO_SAMPLE_FPS, workers: int = VIDEO_WORKERS,
+                  batch_size: int = 32, progress=None, progress_every: float = 0.5):
+    """Run the whole file through detection, tracking and batched classification.
+
+    `engine` is an EmotionEngine (or anything with `img_size` and `predict_batch`).
+    `progress(VideoProgress)` is called at most every `progress_every` seconds and once at
+    the end. Returns (Timeline, final VideoProgress).
+    """
+    info = probe(path)
+    # tracks survive about one second without a detection; sampled frames are far apart, so match loosely
+    tracker = FaceTracker(None, match_iou=0.1, smoothing=1.0, max_misses=max(1, int(round(sample_fps))))
+    timeline = Timeline(getattr(engine, "labels", EMOTION_LABELS))
+    pending = []  # (track id, timestamp, crop) awaiting a forward pass
+    frames = faces = 0
+    last_timestamp = 0.0
+    start = last_report = time.perf_counter()
+
+    def classify():
+        if pending:
+            probs = engine.predict_batch(np.stack([crop for _, _, crop in pending]))
+            for (track_id, timestamp, _), p in zip(pending, probs):
+                timeline.add(track_id, timestamp, p)
+            pending.clear()
+
+    def consume(timestamp, future):
+        nonlocal frames, faces, last_timestamp
+        gray, boxes, crops = future.result()
+        ids = tracker.observe(gray, boxes)
+        if boxes:
+            pending.extend((track_id, timestamp, crop) for track_id, crop in zip(ids, crops))
+            faces += len(boxes)
+        frames += 1
+        last_timestamp = timestamp
+        if len(pending) >= batch_size:
+            classify()
+
+    def report(final: bool = False):
+        seen = info.duration if final and info.duration else last_timestamp
+        state = VideoProgress(frames, faces, seen, info.duration, time.perf_counter() - start)
+        if progress is not None:
+            progress(state)
+        return state
+
+    in_flight = deque()
+    with ThreadPoolExecutor(max(1, workers), thread_name_prefix="video-detect") as pool:
+        for _, timestamp, frame in sampled_frames(path, sample_fps):
+            in_flight.append((timestamp, pool.submit(_detect_frame, frame, engine.img_size)))
+            while len(in_flight) >= 2 * max(1, workers):
+                consume(*in_flight.popleft())
+            now = time.perf_counter()
+            if now - last_report >= progress_every:
+                report()
+                last_report = now
+        while in_flight:
+            consume(*in_flight.popleft())
+    classify()
+    return timeline, report(final=True)
+
+
+def main(argv=None):
+    from .backends import load_predictor
+    from .config import BACKEND
+    from .engine import EmotionEngine
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video", help="Video file")
+    parser.add_argument("--output", default=None, help="Timeline CSV (default: print a summary only)")
+    parser.add_argument("--fps", type=float, default=VIDEO_SAMPLE_FPS, help="Frames analyzed per second of video")
+    parser.add_argument("--workers", type=int, default=VIDEO_WORKERS, help="Detection threads")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--backend", default=BACKEND)
+    parser.add_argument("--model", default=None, help="Model artifact (default: auto-discovered)")
+    args = parser.parse_args(argv)
+
+    engine = EmotionEngine(load_predictor(args.backend, args.model))
+    info = probe(args.video)
+    print(f"{args.video}: {info.width}x{info.height}, {info.fps:.1f} fps, {info.duration:.1f}s", file=sys.stderr)
+
+    def show(p: VideoProgress):
+        print(f"\r{p.fraction:6.1%}  {p.frames} frames · {p.faces} faces · {p.speed:.1f}x real time",
+              end="", file=sys.stderr)
+
+    timeline, final = analyze_video(engine, args.video, args.fps, args.workers, args.batch_size, progress=show)
+    print(file=sys.stderr)
+    for track in timeline.tracks:
+        rows = timeline.rows(track)
+        dominant = max(set(r["emotion"] for r in rows), key=[r["emotion"] for r in rows].count)
+        print(f"track {track}: seconds {rows[0]['second']}–{rows[-1]['second']}, mostly {dominant}")
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            timeline.write_csv(f)
+    print(f"Analyzed {final.video_seconds:.1f}s of video ({final.frames} frames, {final.faces} faces, "
+          f"{len(timeline.tracks)} tracks) in {final.elapsed:.1f}s: {final.speed:.1f}x real time"
+          + (f" -> {args.output}" if args.output else ""))
+
+
+if __name__ == "__main__":
+    main()
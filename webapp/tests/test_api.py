@@ -0,0 +1,193 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import cv2
+import numpy as np
+import pytest
+
+from emotion_engine.api import HttpError, InferenceServer, decode_image, multipart_images
+from emotion_engine.config import EMOTION_LABELS
+
+BOUNDARY = "xyz"
+MULTIPART = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+def png_bytes(size: int = 32) -> bytes:
+    ok, buf = cv2.imencode(".png", np.full((size, size, 3), 128, dtype=np.uint8))
+    assert ok
+    return buf.tobytes()
+
+
+def multipart(*parts) -> bytes:
+    """`parts` are (headers, payload) pairs."""
+    out = b""
+    for headers, payload in parts:
+        out += f"--{BOUNDARY}\r\n{headers}\r\n\r\n".encode() + payload + b"\r\n"
+    return out + f"--{BOUNDARY}--\r\n".encode()
+
+
+def file_part(name: str, payload: bytes, content_type: str = "image/png"):
+    return f'Content-Disposition: form-data; name="{name}"; filename="{name}.png"\r\nContent-Type: {content_type}', payload
+
+
+class FakeEngine:
+    """One face covering the whole image, uniform probabilities."""
+
+    img_size = 8
+    labels = EMOTION_LABELS
+
+    def detect(self, frame):
+        return np.array([[0, 0, frame.shape[1], frame.shape[0]]])
+
+    def predict_crops(self, crops):
+        return np.full((len(crops), len(self.labels)), 1.0 / len(self.labels), dtype=np.float32)
+
+
+# ─────────────────────────────────────────────────────────────
+# Multipart / image decoding
+# ─────────────────────────────────────────────────────────────
+def test_multipart_keeps_file_parts_in_order():
+    a, b = png_bytes(16), png_bytes(24)
+    body = multipart(file_part("a", a), file_part("b", b))
+    assert multipart_images(MULTIPART, body) == [a, b]
+
+
+def test_multipart_skips_plain_form_fields():
+    body = multipart(('Content-Disposition: form-data; name="note"', b"hello"), file_part("a", png_bytes()))
+    assert len(multipart_images(MULTIPART, body)) == 1
+
+
+def test_multipart_accepts_image_part_without_filename():
+    body = multipart(('Content-Disposition: form-data; name="a"\r\nContent-Type: image/png', png_bytes()))
+    assert len(multipart_images(MULTIPART, body)) == 1
+
+
+def test_multipart_rejects_empty_file_part():
+    body = multipart(file_part("a", png_bytes()), file_part("empty", b""))
+    with pytest.raises(HttpError) as e:
+        multipart_images(MULTIPART, body)
+    assert e.value.status == HTTPStatus.BAD_REQUEST
+
+
+def test_decode_image_rejects_empty_and_garbage():
+    with pytest.raises(HttpError) as e:
+        decode_image(b"")
+    assert e.value.status == HTTPStatus.BAD_REQUEST
+    with pytest.raises(HttpError) as e:
+        decode_image(b"not an image")
+    assert e.value.status == HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+
+
+# ─────────────────────────────────────────────────────────────
+# Request parsing
+# ─────────────────────────────────────────────────────────────
+def read(raw: bytes, limit: int = 2 ** 16, max_body_mb: float = 1.0):
+    async def go():
+        reader = asyncio.StreamReader(limit=limit)
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await InferenceServer(engine=FakeEngine(), max_body_mb=max_body_mb).read_request(reader)
+
+    return asyncio.run(go())
+
+
+def read_error(raw: bytes, **kwargs) -> HTTPStatus:
+    with pytest.raises(HttpError) as e:
+        read(raw, **kwargs)
+    return e.value.status
+
+
+def test_read_request_with_body():
+    request = read(b"POST /v1/predict?x=1 HTTP/1.1\r\nContent-Length: 3\r\nConnection: close\r\n\r\nabc")
+    assert (request.method, request.path, request.body, request.keep_alive) == ("POST", "/v1/predict", b"abc", False)
+
+
+def test_read_request_none_on_closed_connection():
+    assert read(b"") is None
+
+
+@pytest.mark.parametrize("length", ["-5", "+5", "1_0", "abc", " "])
+def test_invalid_content_length_is_400(length):
+    assert read_error(f"POST / HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode()) == HTTPStatus.BAD_REQUEST
+
+
+def test_oversized_body_is_413():
+    raw = f"POST / HTTP/1.1\r\nContent-Length: {2 * 1024 * 1024}\r\n\r\n".encode()
+    assert read_error(raw, max_body_mb=1.0) == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+
+def test_header_over_stream_limit_is_431():
+    raw = b"GET / HTTP/1.1\r\nX-Big: " + b"a" * 2048 + b"\r\n\r\n"
+    assert read_error(raw, limit=1024) == HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE
+
+
+def test_request_line_over_stream_limit_is_414():
+    assert read_error(b"GET /" + b"a" * 2048 + b" HTTP/1.1\r\n\r\n", limit=1024) == HTTPStatus.REQUEST_URI_TOO_LONG
+
+
+def test_too_many_headers_is_431():
+    raw = b"GET / HTTP/1.1\r\n" + b"".join(b"X-%d: 1\r\n" % i for i in range(200)) + b"\r\n"
+    assert read_error(raw) == HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE
+
+
+def test_slow_headers_time_out_with_408(monkeypatch):
+    monkeypatch.setattr("emotion_engine.api.REQUEST_READ_TIMEOUT", 0.05)
+
+    async def go():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"GET /healthz HTTP/1.1\r\nHost: x\r\n")  # never finishes the headers
+        return await InferenceServer(engine=FakeEngine()).read_request(reader)
+
+    with pytest.raises(HttpError) as e:
+        asyncio.run(go())
+    assert e.value.status == HTTPStatus.REQUEST_TIMEOUT
+
+
+# ─────────────────────────────────────────────────────────────
+# End to end over a socket
+# ─────────────────────────────────────────────────────────────
+def exchange(raw: bytes):
+    """Send `raw` to a server with a fake engine; return (status, JSON body) of the first response."""
+
+    async def go():
+        server = InferenceServer(engine=FakeEngine(), max_concurrency=2)
+        server._slots = asyncio.Semaphore(server.max_concurrency)
+        listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(raw)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), 5.0)
+            writer.close()
+        finally:
+            listener.close()
+            server._executor.shutdown(wait=False)
+        head, _, body = response.partition(b"\r\n\r\n")
+        return int(head.split()[1]), json.loads(body)
+
+    return asyncio.run(go())
+
+
+def post(path: str, content_type: str, body: bytes):
+    head = f"POST {path} HTTP/1.1\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+    return exchange(head.encode() + body)
+
+
+def test_predict_batch_ignores_form_fields():
+    body = multipart(('Content-Disposition: form-data; name="note"', b"hi"), file_part("a", png_bytes()))
+    status, payload = post("/v1/predict/batch", MULTIPART, body)
+    assert status == 200
+    assert len(payload["images"]) == 1 and len(payload["images"][0]["faces"]) == 1
+
+
+def test_predict_batch_empty_part_is_400_without_opencv_text():
+    status, payload = post("/v1/predict/batch", MULTIPART, multipart(file_part("a", b"")))
+    assert status == 400
+    assert "cv2" not in payload["error"] and "Assertion" not in payload["error"]
+
+
+def test_negative_content_length_gets_a_response():
+    status, payload = exchange(b"POST /v1/predict HTTP/1.1\r\nContent-Length: -5\r\n\r\n")
+    assert status == 400 and payload["error"] == "Invalid Content-Length"
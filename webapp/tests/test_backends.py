@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+from emotion_engine import backends
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    """A directory holding the discovered Keras model; EMOTION_MODEL_PATH unset."""
+    keras_path = tmp_path / "model.keras"
+    keras_path.write_bytes(b"")
+    monkeypatch.delenv("EMOTION_MODEL_PATH", raising=False)
+    monkeypatch.setattr(backends, "find_model_path", lambda: os.environ.get("EMOTION_MODEL_PATH", str(keras_path)))
+    return tmp_path
+
+
+def test_keras_loads_the_discovered_model(model_dir):
+    assert backends.default_artifact("keras") == str(model_dir / "model.keras")
+
+
+def test_tflite_prefers_the_first_existing_export(model_dir):
+    (model_dir / "model_int8.tflite").write_bytes(b"")
+    assert backends.default_artifact("tflite") == str(model_dir / "model_int8.tflite")
+    (model_dir / "model_float16.tflite").write_bytes(b"")
+    assert backends.default_artifact("tflite") == str(model_dir / "model_float16.tflite")
+
+
+def test_onnxruntime_loads_the_onnx_export(model_dir):
+    (model_dir / "model.onnx").write_bytes(b"")
+    assert backends.default_artifact("onnxruntime") == str(model_dir / "model.onnx")
+
+
+def test_missing_export_is_a_clear_error(model_dir):
+    with pytest.raises(FileNotFoundError, match="model.onnx"):
+        backends.default_artifact("onnxruntime")
+    with pytest.raises(FileNotFoundError, match="model_float16.tflite"):
+        backends.load_predictor("tflite")
+
+
+def test_explicit_model_path_wins(model_dir, monkeypatch):
+    monkeypatch.setenv("EMOTION_MODEL_PATH", os.path.join("elsewhere", "model.keras"))
+    assert backends.default_artifact("onnxruntime") == os.path.join("elsewhere", "model.keras")
@@ -0,0 +1,135 @@
+import csv
+import json
+import types
+
+import cv2
+import numpy as np
+import pytest
+
+from emotion_engine import backends, batch
+from emotion_engine.config import EMOTION_LABELS
+
+
+class EchoPredictor:
+    """One-hot probabilities picked by each crop's first pixel value."""
+
+    img_size = 8
+
+    def predict_batch(self, crops):
+        return np.eye(len(EMOTION_LABELS), dtype=np.float32)[crops[:, 0, 0, 0] % len(EMOTION_LABELS)]
+
+    def warmup(self, batch_size=1):
+        return self
+
+
+class ListWriter:
+    def __init__(self):
+        self.rows = []
+
+    def write(self, row):
+        self.rows.append(row)
+
+
+@pytest.fixture
+def echo_backend(monkeypatch):
+    monkeypatch.setitem(backends.BACKENDS, "echo", lambda path, img_size: EchoPredictor())
+
+
+@pytest.fixture
+def image_dir(tmp_path):
+    """Ten images in class folders, plus one file that does not decode."""
+    root = tmp_path / "images"
+    for i in range(10):
+        folder = root / str(i % 3)
+        folder.mkdir(parents=True, exist_ok=True)
+        cv2.imwrite(str(folder / f"img{i:02d}.png"), np.full((16, 16, 3), i, dtype=np.uint8))
+    (root / "1" / "broken.jpg").write_bytes(b"not an image")
+    return root
+
+
+def crop(value):
+    return np.full((8, 8, 3), value, dtype=np.uint8)
+
+
+# ─────────────────────────────────────────────────────────────
+# BatchClassifier
+# ─────────────────────────────────────────────────────────────
+def test_rows_are_written_in_input_order_once_images_complete():
+    writer = ListWriter()
+    classifier = batch.BatchClassifier(EchoPredictor(), writer, batch_size=3)
+    classifier.add("a.png", [(0, 0, 8, 8), (8, 0, 8, 8)], [crop(1), crop(2)], None)
+    classifier.add("b.png", [], None, "decode failed")  # complete, but waits for a.png
+    assert writer.rows == [] and classifier.images_done == 0
+    classifier.add("c.png", [(0, 0, 8, 8)], [crop(3)], None)  # fills the batch
+    assert [(r["path"], r["face"]) for r in writer.rows] == [("a.png", 0), ("a.png", 1), ("b.png", None), ("c.png", 0)]
+    assert [r["emotion"] for r in writer.rows] == [EMOTION_LABELS[1], EMOTION_LABELS[2], None, EMOTION_LABELS[3]]
+    assert writer.rows[2]["error"] == "decode failed"
+    assert (classifier.images_done, classifier.faces_done) == (3, 3)
+
+
+def test_run_flushes_a_partial_batch():
+    writer = ListWriter()
+    classifier = batch.BatchClassifier(EchoPredictor(), writer, batch_size=64)
+    classifier.add("a.png", [(0, 0, 8, 8)], [crop(4)], None)
+    assert writer.rows == []
+    classifier.run()
+    assert [r["emotion"] for r in writer.rows] == [EMOTION_LABELS[4]]
+
+
+# ─────────────────────────────────────────────────────────────
+# CLI: checkpoints and --resume
+# ─────────────────────────────────────────────────────────────
+def run_cli(image_dir, output, *extra):
+    batch.main([str(image_dir), "--output", str(output), "--backend", "echo", "--model", "unused.keras",
+                "--faces", "whole", "--workers", "1", "--batch-size", "2", *extra])
+
+
+def test_cli_writes_one_row_per_image(echo_backend, image_dir, tmp_path):
+    output = tmp_path / "out.csv"
+    run_cli(image_dir, output)
+    with open(output, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 11
+    assert [r["path"] for r in rows] == list(batch.iter_image_paths(str(image_dir)))
+    broken = next(r for r in rows if r["path"].endswith("broken.jpg"))
+    assert broken["error"] and not broken["emotion"]
+    assert json.loads((tmp_path / "out.csv.checkpoint").read_text()) == {"done": 11, "output_bytes": output.stat().st_size}
+
+
+def test_resume_after_interrupt_matches_a_full_run(echo_backend, image_dir, tmp_path, monkeypatch):
+    full, partial = tmp_path / "full.csv", tmp_path / "partial.csv"
+    run_cli(image_dir, full)
+
+    # every loop iteration looks 10 s later, so a checkpoint is saved after each image
+    clock = iter(range(0, 10 ** 6, 10))
+    monkeypatch.setattr(batch, "time", types.SimpleNamespace(perf_counter=lambda: next(clock)))
+    add, calls = batch.BatchClassifier.add, []
+
+    def interrupted_add(self, *args):
+        calls.append(args[0])
+        if len(calls) > 7:
+            raise KeyboardInterrupt
+        add(self, *args)
+
+    monkeypatch.setattr(batch.BatchClassifier, "add", interrupted_add)
+    with pytest.raises(KeyboardInterrupt):
+        run_cli(image_dir, partial)
+    state = json.loads((tmp_path / "partial.csv.checkpoint").read_text())
+    assert 0 < state["done"] < 11
+    assert partial.read_bytes().startswith(full.read_bytes()[: state["output_bytes"]])
+
+    monkeypatch.undo()
+    monkeypatch.setitem(backends.BACKENDS, "echo", lambda path, img_size: EchoPredictor())
+    run_cli(image_dir, partial, "--resume")
+    assert partial.read_bytes() == full.read_bytes()
+
+
+def test_resume_drops_rows_written_after_the_checkpoint(echo_backend, image_dir, tmp_path):
+    full, partial = tmp_path / "full.csv", tmp_path / "partial.csv"
+    run_cli(image_dir, full)
+    lines = full.read_bytes().splitlines(keepends=True)
+    boundary = sum(len(line) for line in lines[:5])  # header + 4 images
+    partial.write_bytes(b"".join(lines[:7]) + b"half a ro")
+    batch.save_checkpoint(str(partial) + ".checkpoint", 4, boundary)
+    run_cli(image_dir, partial, "--resume")
+    assert partial.read_bytes() == full.read_bytes()
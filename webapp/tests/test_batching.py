@@ -0,0 +1,124 @@
+import threading
+
+import numpy as np
+import pytest
+
+from emotion_engine.batching import MicroBatcher
+
+TIMEOUT = 5.0
+
+
+class GatedPredictor:
+    """Echo each face's first pixel as its probabilities; `hold()` blocks the next forward passes."""
+
+    img_size = 4
+
+    def __init__(self):
+        self.batch_sizes = []
+        self.entered = threading.Event()
+        self._gate = threading.Event()
+        self._gate.set()
+        self.fail = False
+
+    def hold(self):
+        self._gate.clear()
+        self.entered.clear()
+
+    def release(self):
+        self._gate.set()
+
+    def predict_batch(self, batch):
+        self.entered.set()
+        assert self._gate.wait(TIMEOUT)
+        self.batch_sizes.append(len(batch))
+        if self.fail:
+            raise ValueError("model failed")
+        return batch[:, 0, 0, :].astype(np.float32)
+
+    def warmup(self, batch_size=1):
+        return self
+
+
+def faces(*values) -> np.ndarray:
+    return np.stack([np.full((4, 4, 3), v, dtype=np.uint8) for v in values])
+
+
+@pytest.fixture
+def predictor():
+    return GatedPredictor()
+
+
+@pytest.fixture
+def batcher(predictor):
+    batcher = MicroBatcher(predictor, max_batch=4, max_wait_ms=0)
+    yield batcher
+    predictor.release()
+    batcher.close()
+
+
+def queue_behind_a_running_batch(batcher, predictor, *batches):
+    """Block the batching thread in a forward pass, queue `batches`, then let it go."""
+    predictor.hold()
+    first = batcher.submit(faces(0))
+    assert predictor.entered.wait(TIMEOUT)
+    futures = [batcher.submit(b) for b in batches]
+    predictor.release()
+    first.result(TIMEOUT)
+    return [f.result(TIMEOUT) for f in futures]
+
+
+def test_single_caller_gets_its_rows(batcher):
+    np.testing.assert_array_equal(batcher.predict_batch(faces(1, 2))[:, 0], [1, 2])
+
+
+def test_queued_requests_share_one_forward_pass(batcher, predictor):
+    results = queue_behind_a_running_batch(batcher, predictor, faces(1), faces(2, 3), faces(4))
+    assert predictor.batch_sizes == [1, 4]
+    assert [r[:, 0].tolist() for r in results] == [[1], [2, 3], [4]]
+
+
+def test_batches_never_exceed_max_batch(batcher, predictor):
+    results = queue_behind_a_running_batch(batcher, predictor, faces(1, 2, 3), faces(4, 5), faces(6, 7))
+    assert predictor.batch_sizes == [1, 3, 4]
+    assert [r[:, 0].tolist() for r in results] == [[1, 2, 3], [4, 5], [6, 7]]
+
+
+def test_concurrent_callers_get_their_own_results(batcher):
+    results = {}
+
+    def client(value):
+        results[value] = [batcher.predict_batch(faces(value))[0, 0] for _ in range(20)]
+
+    threads = [threading.Thread(target=client, args=(v,)) for v in range(1, 9)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(TIMEOUT)
+    assert results == {v: [v] * 20 for v in range(1, 9)}
+
+
+def test_errors_reach_every_caller_of_the_batch(batcher, predictor):
+    predictor.hold()
+    first = batcher.submit(faces(0))
+    assert predictor.entered.wait(TIMEOUT)
+    predictor.fail = True
+    futures = [batcher.submit(faces(1)), batcher.submit(faces(2))]
+    predictor.release()
+    for future in [first] + futures:
+        with pytest.raises(ValueError, match="model failed"):
+            future.result(TIMEOUT)
+    predictor.fail = False
+    # the batching thread survives a failed batch
+    assert batcher.predict_batch(faces(3))[0, 0] == 3
+
+
+def test_submit_after_close_fails(batcher):
+    batcher.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.predict_batch(faces(1))
+
+
+def test_stats_count_faces_and_batches(batcher, predictor):
+    queue_behind_a_running_batch(batcher, predictor, faces(1), faces(2))
+    stats = batcher.stats()
+    assert (stats["batches"], stats["faces"], stats["batch_size_max"]) == (2, 3, 2)
@@ -0,0 +1,84 @@
+import os
+import threading
+
+import numpy as np
+
+from emotion_engine.cache import PredictionCache, approx_size, artifact_version, content_key
+
+
+def test_content_key_depends_on_bytes_and_model_version():
+    key = content_key(b"image", "v1")
+    assert key == content_key(b"image", "v1")
+    assert key != content_key(b"image", "v2")
+    assert key != content_key(b"other", "v1")
+
+
+def test_artifact_version_changes_with_the_file(tmp_path):
+    path = tmp_path / "model.keras"
+    path.write_bytes(b"weights")
+    version = artifact_version(str(path), "keras")
+    assert version == artifact_version(str(path), "keras")
+    assert version != artifact_version(str(path), "tflite")
+    path.write_bytes(b"new weights")
+    os.utime(path, ns=(0, 10 ** 9))
+    assert artifact_version(str(path), "keras") != version
+
+
+def test_approx_size_counts_arrays_and_bytes_in_containers():
+    value = {"overlay": b"x" * 100, "probabilities": np.zeros((2, 7), np.float32), "faces": [b"ab"]}
+    assert approx_size(value) == 100 + 56 + 2
+
+
+def test_lru_evicts_least_recently_used():
+    cache = PredictionCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the oldest
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_is_enforced():
+    cache = PredictionCache(max_entries=100, max_bytes=250)
+    for key in "abc":
+        cache.put(key, b"x" * 100)
+    assert len(cache) == 2 and cache.stats()["bytes"] == 200
+    assert cache.get("a") is None
+
+
+def test_replacing_a_key_updates_its_size():
+    cache = PredictionCache(max_bytes=1000)
+    cache.put("a", b"x" * 600)
+    cache.put("a", b"x" * 10)
+    cache.put("b", b"x" * 600)
+    assert cache.stats()["bytes"] == 610 and len(cache) == 2
+
+
+def test_hit_rate_and_clear():
+    cache = PredictionCache()
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("missing")
+    assert cache.stats()["hit_rate"] == 0.5
+    cache.clear()
+    assert len(cache) == 0 and cache.stats()["bytes"] == 0
+
+
+def test_concurrent_puts_stay_within_bounds():
+    cache = PredictionCache(max_entries=16, max_bytes=16 * 100)
+
+    def worker(n):
+        for i in range(500):
+            cache.put(f"{n}-{i}", b"x" * 100)
+            cache.get(f"{n}-{i // 2}")
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = cache.stats()
+    assert len(cache) <= 16 and stats["bytes"] == 100 * len(cache)
+    assert stats["evictions"] == 8 * 500 - len(cache)
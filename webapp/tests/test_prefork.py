@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+keras = tf.keras
+
+from emotion_engine import prefork  # noqa: E402
+from emotion_engine.cascade import CascadePredictor  # noqa: E402
+from emotion_engine.serving import KerasPredictor  # noqa: E402
+
+SIZE = 16
+
+
+def small_model():
+    inputs = keras.Input((SIZE, SIZE, 3))
+    x = keras.layers.Conv2D(4, 3, activation="relu")(inputs)
+    x = keras.layers.BatchNormalization()(x)
+    x = keras.layers.GlobalAveragePooling2D()(x)
+    outputs = keras.layers.Dense(7, activation="softmax")(x)
+    return keras.Model(inputs, outputs)
+
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory):
+    root = tmp_path_factory.mktemp("prefork")
+    model = small_model()
+    # non-trivial BatchNorm statistics, so a wrong weight order changes the output
+    model.set_weights([np.random.RandomState(i).uniform(0.5, 1.5, w.shape).astype(w.dtype)
+                       for i, w in enumerate(model.get_weights())])
+    path = str(root / "small.keras")
+    model.save(path)
+    out_dir = str(root / "shared")
+    prefork._export(path, out_dir)
+    return path, model, prefork.SharedWeights(out_dir)
+
+
+def batch(n: int = 3) -> np.ndarray:
+    return np.random.RandomState(0).randint(0, 256, (n, SIZE, SIZE, 3)).astype(np.uint8)
+
+
+def test_shared_model_matches_the_original(exported):
+    _, model, shared = exported
+    x = batch().astype(np.float32) / 255.0
+    np.testing.assert_allclose(shared.build_model()(x).numpy(), model(x, training=False).numpy(), rtol=1e-5, atol=1e-6)
+
+
+def test_shared_model_variables_hold_no_copy(exported):
+    _, _, shared = exported
+    model = shared.build_model()
+    assert all(v._value is None for v in model.model.weights)
+    # the forward pass must not initialise them either
+    model(batch().astype(np.float32))
+    assert all(v._value is None for v in model.model.weights)
+
+
+@pytest.mark.parametrize("mode", ["compiled", "predict"])
+def test_keras_predictor_on_shared_model(exported, mode):
+    _, model, shared = exported
+    expected = model(batch().astype(np.float32) / 255.0, training=False).numpy()
+    predictor = KerasPredictor(shared.build_model(), shared.img_size, mode=mode).warmup()
+    np.testing.assert_allclose(predictor.predict_batch(batch()), expected, rtol=1e-5, atol=1e-6)
+
+
+def test_shared_engine_honours_cascade_model(exported, monkeypatch):
+    path, _, shared = exported
+    monkeypatch.setattr("emotion_engine.batching.MICROBATCH", False)
+    monkeypatch.setattr("emotion_engine.cascade.CASCADE_MODEL", path)
+    engine = prefork.shared_engine(shared)
+    assert isinstance(engine.predictor, CascadePredictor)
+    assert isinstance(engine.predictor.full.model, prefork.SharedModel)
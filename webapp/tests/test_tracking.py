@@ -0,0 +1,89 @@
+import cv2
+import numpy as np
+import pytest
+
+from emotion_engine.tracking import FaceTracker, iou
+
+# smooth texture, so it survives the downscale to the template width
+PATCH = cv2.resize(np.random.RandomState(0).randint(0, 256, (6, 6)).astype(np.uint8), (60, 60),
+                   interpolation=cv2.INTER_CUBIC)
+
+
+class ScriptedDetector:
+    """Return the queued boxes on each call (the last entry repeats) and count calls."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def detect(self, gray):
+        self.calls += 1
+        return self.results.pop(0) if len(self.results) > 1 else self.results[0]
+
+
+def frame(x: int = None, y: int = 50) -> np.ndarray:
+    """Flat frame with a textured 60x60 "face" at (x, y); no face when x is None."""
+    gray = np.full((240, 320), 128, dtype=np.uint8)
+    if x is not None:
+        gray[y : y + 60, x : x + 60] = PATCH
+    return gray
+
+
+def test_iou():
+    assert iou((0, 0, 10, 10), (0, 0, 10, 10)) == 1.0
+    assert iou((0, 0, 10, 10), (20, 20, 10, 10)) == 0.0
+    assert iou((0, 0, 10, 10), (5, 0, 10, 10)) == pytest.approx(50 / 150)
+    assert iou((0, 0, 0, 0), (0, 0, 0, 0)) == 0.0
+
+
+def test_detector_runs_every_n_frames_and_templates_follow_in_between():
+    detector = ScriptedDetector([(40, 50, 60, 60)], [(55, 50, 60, 60)])
+    tracker = FaceTracker(detector, detect_every=5, smoothing=1.0)
+    for i in range(10):
+        tracks = tracker.update(frame(40 + 3 * i))
+        assert len(tracks) == 1
+        if not tracker.last_detected:
+            assert abs(tracks[0].box[0] - (40 + 3 * i)) <= 2 and tracks[0].score > 0.9
+    assert detector.calls == 2 and tracker.detection_rate == pytest.approx(0.2)
+
+
+def test_lost_track_forces_detection_on_the_next_frame():
+    detector = ScriptedDetector([(40, 50, 60, 60)], [])
+    tracker = FaceTracker(detector, detect_every=100)
+    tracker.update(frame(40))
+    tracker.update(frame(None))  # the face disappears: template score collapses
+    assert not tracker.last_detected and tracker.tracks[0].score < tracker.min_score
+    tracker.update(frame(None))
+    assert tracker.last_detected and detector.calls == 2
+
+
+def test_ids_are_stable_across_redetections_and_tracks_expire():
+    tracker = FaceTracker(ScriptedDetector([]), max_misses=1, smoothing=1.0)
+    a, b = (40, 50, 60, 60), (200, 100, 60, 60)
+    first = tracker.observe(frame(), [a, b])
+    assert first == [1, 2]
+    # moved a little, listed in the other order: ids follow the boxes
+    assert tracker.observe(frame(), [(205, 100, 60, 60), (44, 52, 60, 60)]) == [2, 1]
+    assert tracker.tracks[0].box == (44, 52, 60, 60)
+    # track 2 misses one detection and survives, then misses a second and is dropped
+    assert tracker.observe(frame(), [(44, 52, 60, 60)]) == [1]
+    assert [t.track_id for t in tracker.tracks] == [1, 2]
+    assert tracker.observe(frame(), [(44, 52, 60, 60), (10, 150, 60, 60)]) == [1, 3]
+    assert [t.track_id for t in tracker.tracks] == [1, 3]
+
+
+def test_smoothing_blends_old_and_new_boxes():
+    tracker = FaceTracker(ScriptedDetector([]), smoothing=0.5)
+    tracker.observe(frame(), [(40, 50, 60, 60)])
+    tracker.observe(frame(), [(50, 50, 60, 60)])
+    assert tracker.tracks[0].box == (45, 50, 60, 60)
+
+
+def test_reset_forces_a_fresh_detection():
+    detector = ScriptedDetector([(40, 50, 60, 60)])
+    tracker = FaceTracker(detector, detect_every=100)
+    tracker.update(frame(40))
+    tracker.reset()
+    assert tracker.tracks == []
+    tracker.update(frame(40))
+    assert tracker.last_detected and detector.calls == 2
@@ -4,9 +4,13 @@ Real-time facial emotion detection using deep learning.
 Position your face in front of the camera for live emotion analysis.
 """
 
+import io
 import os
+import tempfile
 import time
 import sys
+import json
+import logging
 import platform
 
 # Import streamlit first so we can show errors
@@ -23,10 +27,34 @@ except ImportError as e:
     st.stop()
 
 import numpy as np
-import tensorflow as tf
-from tensorflow import keras
 from PIL import Image
 
+from emotion_engine import (
+    BACKEND,
+    BASE_DIR,
+    EMOTION_LABELS,
+    MODEL_CANDIDATES,
+    artifact_version,
+    content_key,
+    EmotionEngine,
+    FaceDetector,
+    AdaptiveScheduler,
+    FaceTracker,
+    LiveAnalyzer,
+    LivePipeline,
+    PredictionCache,
+    decode_prediction,
+    load_predictor,
+    main_face,
+)
+from emotion_engine.backends import artifact_candidates, default_artifact
+from emotion_engine.batching import MICROBATCH, MicroBatcher
+from emotion_engine.cascade import CASCADE_CONFIDENCE, CASCADE_MARGIN, CASCADE_MODEL, load_cascade
+from emotion_engine.display import DISPLAY_FPS, DISPLAY_JPEG_QUALITY, DISPLAY_WIDTH, FramePublisher, scale_box
+from emotion_engine.video import VIDEO_EXTENSIONS, VIDEO_SAMPLE_FPS, VIDEO_WORKERS, analyze_video
+
+logger = logging.getLogger(__name__)
+
 # ─────────────────────────────────────────────────────────────
 # Page configuration
 # ─────────────────────────────────────────────────────────────
@@ -691,8 +719,6 @@ st.markdown(
 # ─────────────────────────────────────────────────────────────
 # Emotion configuration
 # ─────────────────────────────────────────────────────────────
-EMOTION_LABELS = ["Angry", "Disgust", "Fear", "Happy", "Neutral", "Sad", "Surprise"]
-
 EMOTION_EMOJIS = {
     "Angry": "😠",
     "Disgust": "🤢",
@@ -723,32 +749,20 @@ EMOTION_DESCRIPTIONS = {
     "Surprise": "Raised brows and open eyes indicate surprise or shock.",
 }
 
-IMG_SIZE = 224
-
 # ─────────────────────────────────────────────────────────────
 # Model loading
 # ─────────────────────────────────────────────────────────────
-# Get the base directory (parent of webapp directory)
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-WEBAPP_DIR = os.path.dirname(os.path.abspath(__file__))
-
-MODEL_PATH = None
-candidates = [
-    os.path.join(BASE_DIR, "model", "mod_my_model01.keras"),  # model/mod_my_model01.keras from root
-    os.path.join(BASE_DIR, "mod_my_model01.keras"),  # mod_my_model01.keras in root
-    os.path.join(WEBAPP_DIR, "mod_my_model01.keras"),  # webapp/mod_my_model01.keras
-    "mod_my_model01.keras",  # current working directory
-    "../mod_my_model01.keras",  # parent directory (relative)
-    "../model/mod_my_model01.keras",  # model directory (relative)
-]
-
-for candidate in candidates:
-    if os.path.exists(candidate):
-        MODEL_PATH = candidate
-        break
-
-if MODEL_PATH is None:
-    MODEL_PATH = os.path.join(BASE_DIR, "model", "mod_my_model01.keras")  # Default to model directory
+candidates = MODEL_CANDIDATES
+try:
+    MODEL_PATH = default_artifact(BACKEND)
+except FileNotFoundError:
+    # no export for this backend yet: load_model() lists where it was looked for
+    candidates = artifact_candidates(BACKEND)
+    MODEL_PATH = candidates[0]
+MODEL_VERSION = artifact_version(MODEL_PATH, BACKEND)
+if CASCADE_MODEL:
+    # escalated crops still come from the full model, but the rest do not: key the cache on both
+    MODEL_VERSION += "+" + artifact_version(CASCADE_MODEL, f"cascade:{CASCADE_CONFIDENCE}:{CASCADE_MARGIN}")
 
 
 @st.cache_resource
@@ -764,11 +778,13 @@ def load_model():
             st.info(f"Script directory: {os.path.dirname(os.path.abspath(__file__))}")
             st.info(f"Base directory: {BASE_DIR}")
             return None
-        model = keras.models.load_model(MODEL_PATH)
-        return model
+        # backend chosen by EMOTION_BACKEND; predictors are warmed up here so the first frame is not slow
+        if CASCADE_MODEL:
+            return load_cascade(MODEL_PATH, CASCADE_MODEL)
+        return load_predictor(BACKEND, MODEL_PATH)
     except Exception as e:
         st.error(f"Error loading model: {e}")
-        st.info(f"Tried model path: {MODEL_PATH}")
+        st.info(f"Tried model path: {MODEL_PATH} (backend: {BACKEND})")
         st.info("Searched in the following locations:")
         for i, candidate in enumerate(candidates, 1):
             exists = "✓" if os.path.exists(candidate) else "✗"
@@ -779,57 +795,110 @@ def load_model():
         return None
 
 
+def predictor_caption() -> str:
+    """Micro-batching and adaptive-compute summary (cascade, early exit), else an empty string."""
+    engine = load_engine()
+    predictor = engine.predictor if engine is not None else None
+    return f" · {predictor.summary()}" if hasattr(predictor, "summary") else ""
+
+
 # ─────────────────────────────────────────────────────────────
 # Image / prediction utilities
 # ─────────────────────────────────────────────────────────────
-def preprocess_image(image: Image.Image, img_size: int = IMG_SIZE) -> np.ndarray:
-    """Resize and normalize a face image for model prediction."""
-    arr = np.array(image)
-
-    if len(arr.shape) == 2:
-        arr = cv2.cvtColor(arr, cv2.COLOR_GRAY2RGB)
-    elif arr.shape[2] == 4:
-        arr = cv2.cvtColor(arr, cv2.COLOR_RGBA2RGB)
-
-    arr_resized = cv2.resize(arr, (img_size, img_size))
-    arr_norm = arr_resized.astype(np.float32) / 255.0
-    arr_batch = np.expand_dims(arr_norm, axis=0)
-    return arr_batch
+@st.cache_resource
+def load_engine():
+    """Wrap the cached predictor in a headless EmotionEngine shared across sessions."""
+    predictor = load_model()
+    if predictor is None:
+        return None
+    if MICROBATCH:
+        # one batching thread serves every session, so concurrent users share forward passes
+        predictor = MicroBatcher(predictor)
+    # shared by every session and the live pipeline threads; FaceDetector keeps a cascade per thread
+    return EmotionEngine(predictor, detector=FaceDetector())
 
 
-def detect_face_pil(image: Image.Image):
+def detect_face_pil(image: Image.Image, detector: FaceDetector = None):
     """Detect faces in a PIL image; return bounding boxes and underlying array."""
-    cascade = cv2.CascadeClassifier(
-        cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-    )
     arr = np.array(image)
-
-    if len(arr.shape) == 3:
-        gray = cv2.cvtColor(arr, cv2.COLOR_RGB2GRAY)
-    else:
-        gray = arr
-
-    faces = cascade.detectMultiScale(gray, 1.1, 4)
+    faces = (detector or FaceDetector()).detect_rgb(arr)
     return faces, arr
 
 
-def predict_emotion(model, face_image: Image.Image):
-    """Predict the dominant emotion for a cropped face."""
-    batch = preprocess_image(face_image)
-    preds = model.predict(batch, verbose=0)[0]
-    idx = int(np.argmax(preds))
-    main_emotion = EMOTION_LABELS[idx]
-    confidence = float(preds[idx])
-    all_predictions = {EMOTION_LABELS[i]: float(preds[i]) for i in range(len(EMOTION_LABELS))}
-    return main_emotion, confidence, all_predictions
+@st.cache_resource
+def get_prediction_cache():
+    """Process-wide analysis cache shared by all sessions."""
+    return PredictionCache(max_entries=256)
+
+
+def analyze_upload(engine: EmotionEngine, data: bytes):
+    """Return (cache key, entry) for uploaded image bytes, detecting faces only on a cache miss."""
+    cache = get_prediction_cache()
+    key = content_key(data, MODEL_VERSION)
+    entry = cache.get(key)
+    if entry is None:
+        image = Image.open(io.BytesIO(data)).convert("RGB")
+        faces, arr = detect_face_pil(image, engine.detector)
+        # show faces overlay
+        img_draw = arr.copy()
+        for (x, y, w, h) in faces:
+            cv2.rectangle(img_draw, (x, y), (x + w, y + h), (99, 102, 241), 2)
+        _, overlay = cv2.imencode(".jpg", cv2.cvtColor(img_draw, cv2.COLOR_RGB2BGR))
+        entry = {"faces": faces, "overlay": overlay.tobytes(), "probabilities": None}
+        cache.put(key, entry)
+    return key, entry
+
+
+def classify_upload(engine: EmotionEngine, key: str, entry: dict, data: bytes) -> np.ndarray:
+    """Per-face probabilities for a cached upload, running the model only the first time."""
+    if entry["probabilities"] is None:
+        arr = np.array(Image.open(io.BytesIO(data)).convert("RGB"))
+        probabilities = np.stack([p.probabilities for p in engine.classify(arr, entry["faces"])])
+        entry = dict(entry, probabilities=probabilities)
+        get_prediction_cache().put(key, entry)
+    return entry["probabilities"]
+
+
+def hex_to_rgb(color_hex: str) -> tuple:
+    return tuple(int(color_hex[i : i + 2], 16) for i in (1, 3, 5))
+
+
+def draw_face_overlay(frame_rgb, box, prediction=None, channels="RGB"):
+    """Draw a face box and, once classified, its emotion label onto an RGB (or BGR) frame."""
+    x, y, w, h = box
+    emotion = prediction.emotion if prediction else None
+    color_rgb = hex_to_rgb(EMOTION_COLORS.get(emotion, "#6366f1"))
+    if channels == "BGR":
+        color_rgb = color_rgb[::-1]
+    cv2.rectangle(frame_rgb, (x, y), (x + w, y + h), color_rgb, 2)
+    if prediction:
+        label = f"{EMOTION_EMOJIS.get(emotion, '😊')} {emotion} ({prediction.confidence:.0%})"
+        font = cv2.FONT_HERSHEY_SIMPLEX
+        (tw, th), baseline = cv2.getTextSize(label, font, 0.6, 2)
+        cv2.rectangle(
+            frame_rgb,
+            (x, y - th - 10),
+            (x + tw, y),
+            color_rgb,
+            -1,
+        )
+        cv2.putText(
+            frame_rgb,
+            label,
+            (x, y - 5),
+            font,
+            0.6,
+            (255, 255, 255),
+            2,
+        )
 
 
 # ─────────────────────────────────────────────────────────────
 # UI helpers
 # ─────────────────────────────────────────────────────────────
-def show_hero_section():
+def show_hero_section(img_size: int):
     st.markdown(
-        '<div class="main-block"><div class="hero-section"><div class="hero-layout"><div class="hero-left"><div class="hero-pill"><span class="hero-pill-dot"></span>REAL-TIME DEEP LEARNING</div><div class="hero-title">AI Emotion Recognition</div><div class="hero-subtitle">Real-time facial emotion detection powered by a deep convolutional neural network. Position your face in front of the camera and watch the model infer your dominant emotion frame by frame.</div><div class="hero-badges"><span class="hero-badge"><span class="hero-badge-icon">🧠</span> TensorFlow · Keras</span><span class="hero-badge"><span class="hero-badge-icon">📷</span> OpenCV · Haar Cascade</span><span class="hero-badge"><span class="hero-badge-icon">🌐</span> Streamlit UI</span></div></div><div class="hero-right"><div class="hero-right-card"><div class="hero-right-label">Session overview</div><div class="hero-stat-grid"><div class="hero-stat"><span>Classes</span><span>7 emotions</span></div><div class="hero-stat"><span>Input size</span><span>224 × 224</span></div><div class="hero-stat"><span>Mode</span><span>Live webcam</span></div></div><div class="hero-caption">The model processes each frame, extracts facial features, and outputs a probability distribution across all emotion classes in real time.</div></div></div></div></div></div>',
+        f'<div class="main-block"><div class="hero-section"><div class="hero-layout"><div class="hero-left"><div class="hero-pill"><span class="hero-pill-dot"></span>REAL-TIME DEEP LEARNING</div><div class="hero-title">AI Emotion Recognition</div><div class="hero-subtitle">Real-time facial emotion detection powered by a deep convolutional neural network. Position your face in front of the camera and watch the model infer your dominant emotion frame by frame.</div><div class="hero-badges"><span class="hero-badge"><span class="hero-badge-icon">🧠</span> TensorFlow · Keras</span><span class="hero-badge"><span class="hero-badge-icon">📷</span> OpenCV · Haar Cascade</span><span class="hero-badge"><span class="hero-badge-icon">🌐</span> Streamlit UI</span></div></div><div class="hero-right"><div class="hero-right-card"><div class="hero-right-label">Session overview</div><div class="hero-stat-grid"><div class="hero-stat"><span>Classes</span><span>7 emotions</span></div><div class="hero-stat"><span>Input size</span><span>{img_size} × {img_size}</span></div><div class="hero-stat"><span>Mode</span><span>Live webcam</span></div></div><div class="hero-caption">The model processes each frame, extracts facial features, and outputs a probability distribution across all emotion classes in real time.</div></div></div></div></div></div>',
         unsafe_allow_html=True,
     )
 
@@ -888,37 +957,135 @@ def show_prediction_result(emotion, confidence, all_predictions):
     )
 
 
+def analyze_video_upload(engine: EmotionEngine, file, sample_fps: float) -> dict:
+    """Per-second timeline of an uploaded video, computed once per file, model and sampling rate."""
+    cache = get_prediction_cache()
+    data = file.getvalue()
+    key = content_key(data, f"{MODEL_VERSION}:video:{sample_fps:g}")
+    entry = cache.get(key)
+    if entry is not None:
+        return entry
+
+    progress_bar = st.progress(0.0, text="Analyzing video…")
+
+    def on_progress(p):
+        progress_bar.progress(
+            p.fraction,
+            text=f"{p.video_seconds:.0f}/{p.duration:.0f}s · {p.faces} faces · {p.speed:.1f}x real time",
+        )
+
+    # VideoCapture reads from a path, so the upload is spooled to a temporary file
+    suffix = os.path.splitext(file.name)[1].lower()
+    with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+        tmp.write(data)
+        tmp.flush()
+        timeline, final = analyze_video(engine, tmp.name, sample_fps, VIDEO_WORKERS, progress=on_progress)
+    progress_bar.empty()
+
+    csv_buffer = io.StringIO()
+    timeline.write_csv(csv_buffer)
+    entry = {
+        "rows": timeline.rows(),
+        "tracks": timeline.tracks,
+        "csv": csv_buffer.getvalue().encode("utf-8"),
+        "summary": (
+            f"Analyzed {final.video_seconds:.0f}s of video ({final.frames} frames, {final.faces} faces) "
+            f"in {final.elapsed:.1f}s · {final.speed:.1f}x real time"
+        ),
+    }
+    cache.put(key, entry)
+    return entry
+
+
+def show_video_timeline(entry: dict):
+    """One probability chart and per-second table for every tracked face."""
+    import pandas as pd
+
+    st.caption(entry["summary"])
+    if not entry["tracks"]:
+        st.error("No face detected in the sampled frames.")
+        return
+    track_tabs = st.tabs([f"Face {track}" for track in entry["tracks"]])
+    for track, tab in zip(entry["tracks"], track_tabs):
+        rows = [r for r in entry["rows"] if r["track"] == track]
+        with tab:
+            probabilities = pd.DataFrame([r["probabilities"] for r in rows], index=[r["second"] for r in rows])
+            probabilities.index.name = "second"
+            st.line_chart(probabilities, color=[EMOTION_COLORS.get(em, "#6366f1") for em in probabilities.columns])
+            st.dataframe(
+                pd.DataFrame(
+                    {"second": r["second"], "emotion": f"{EMOTION_EMOJIS.get(r['emotion'], '')} {r['emotion']}",
+                     "confidence": round(r["confidence"], 3), "frames": r["samples"]}
+                    for r in rows
+                ),
+                hide_index=True,
+                width="stretch",
+            )
+    st.download_button("⬇️ Download timeline (CSV)", entry["csv"], file_name="emotion_timeline.csv", mime="text/csv")
+
+
 # ─────────────────────────────────────────────────────────────
 # Main app
 # ─────────────────────────────────────────────────────────────
 def main():
-    model = load_model()
-    if model is None:
+    engine = load_engine()
+    if engine is None:
         st.stop()
 
     if "webcam_active" not in st.session_state:
         st.session_state.webcam_active = False
 
-    show_hero_section()
+    show_hero_section(engine.img_size)
 
     # Sidebar
     st.sidebar.title("🔍 Model overview")
     st.sidebar.markdown(
-        """
+        f"""
 - Backbone: transfer-learning CNN  
-- Input size: **224 × 224** RGB  
+- Input size: **{engine.img_size} × {engine.img_size}** RGB  
 - Framework: **TensorFlow · Keras**  
 - Vision stack: **OpenCV + Haar Cascade**  
 - UI: **Streamlit**
 """
     )
     st.sidebar.markdown("---")
+    st.sidebar.markdown("#### ⚙️ Live detection settings")
+    tracking_enabled = st.sidebar.checkbox(
+        "Track faces between detections",
+        value=True,
+        help="Run the full face detector only every N frames and follow faces in between.",
+    )
+    adaptive = st.sidebar.checkbox(
+        "Adaptive scheduling",
+        value=True,
+        help="Measure detection and inference times and pick how often to classify and re-detect "
+        "so the work fits the frame-rate target and CPU budget.",
+    )
+    target_fps = st.sidebar.slider("Target frame rate", 5, 30, 15, disabled=not adaptive)
+    cpu_budget = st.sidebar.slider(
+        "CPU budget per frame", 0.1, 1.0, 0.6, step=0.05, disabled=not adaptive
+    )
+    detect_every = st.sidebar.slider(
+        "Full detection every N frames", 1, 30, 10, disabled=adaptive or not tracking_enabled
+    )
+    display_fps = st.sidebar.slider(
+        "Display frame rate",
+        1,
+        30,
+        int(np.clip(DISPLAY_FPS, 1, 30)),
+        help="Frames published to the browser per second, however fast the camera captures.",
+    )
+    display_width = st.sidebar.slider(
+        "Display width (px)", 240, 1280, int(np.clip(DISPLAY_WIDTH or 1280, 240, 1280)), step=80
+    )
+    display_quality = st.sidebar.slider("Display JPEG quality", 30, 95, int(np.clip(DISPLAY_JPEG_QUALITY, 30, 95)))
+    st.sidebar.markdown("---")
     st.sidebar.caption(
         "For robust predictions, keep a single face in frame, with good lighting and frontal pose."
     )
 
     # Tabs: live vs upload
-    live_tab, upload_tab = st.tabs(["🎥 Live Detection", "📸 Image Upload"])
+    live_tab, upload_tab = st.tabs(["🎥 Live Detection", "📸 Image / Video Upload"])
 
     # ── Live detection tab ────────────────────────────────────
     with live_tab:
@@ -954,6 +1121,7 @@ def main():
 
             emotion_placeholder = st.empty()
             confidence_placeholder = st.empty()
+            stats_placeholder = st.empty()
 
             # OpenCV webcam - try multiple camera indices
             cap = None
@@ -1064,92 +1232,110 @@ def main():
                 
                 st.session_state.webcam_active = False
             else:
-                cascade = cv2.CascadeClassifier(
-                    cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+                scheduler = None
+                if adaptive:
+                    scheduler = AdaptiveScheduler(
+                        target_fps=target_fps,
+                        cpu_budget=cpu_budget,
+                        detect_range=(1, 30) if tracking_enabled else (1, 1),
+                    )
+                analyzer = LiveAnalyzer(
+                    engine,
+                    FaceTracker(engine.detector, detect_every=detect_every if tracking_enabled else 1),
+                    classify_every=5,
+                    scheduler=scheduler,
                 )
-                last_emotion = None
-                last_conf = 0.0
-                frame_count = 0
-
-                while st.session_state.webcam_active:
-                    ret, frame = cap.read()
-                    if not ret:
-                        st.error("Failed to read from webcam.")
-                        break
 
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                    faces = cascade.detectMultiScale(gray, 1.1, 4)
+                def analyze(frame_bgr):
+                    frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+                    gray = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+                    return analyzer.process(frame_rgb, gray)
 
-                    if len(faces) > 0 and frame_count % 5 == 0:
-                        x, y, w, h = faces[0]
-                        face_roi = frame_rgb[y : y + h, x : x + w]
-                        try:
-                            emotion, conf, all_preds = predict_emotion(
-                                model, Image.fromarray(face_roi)
-                            )
-                            last_emotion = emotion
-                            last_conf = conf
-                        except Exception:
-                            pass
-
-                    # draw overlay
-                    for (x, y, w, h) in faces:
-                        color_hex = EMOTION_COLORS.get(last_emotion, "#6366f1")
-                        color_rgb = tuple(int(color_hex[i : i + 2], 16) for i in (1, 3, 5))
-                        cv2.rectangle(frame_rgb, (x, y), (x + w, y + h), color_rgb, 2)
-                        if last_emotion:
-                            label = f"{EMOTION_EMOJIS.get(last_emotion, '😊')} {last_emotion} ({last_conf:.0%})"
-                            font = cv2.FONT_HERSHEY_SIMPLEX
-                            (tw, th), baseline = cv2.getTextSize(label, font, 0.6, 2)
-                            cv2.rectangle(
-                                frame_rgb,
-                                (x, y - th - 10),
-                                (x + tw, y),
-                                color_rgb,
-                                -1,
-                            )
-                            cv2.putText(
-                                frame_rgb,
-                                label,
-                                (x, y - 5),
-                                font,
-                                0.6,
-                                (255, 255, 255),
-                                2,
-                            )
+                # capture and inference run on background threads; this loop only renders
+                pipeline = LivePipeline(cap.read, analyze).start()
+                publisher = FramePublisher(display_width, display_quality, display_fps)
+                rendered = 0
+                shown_card = None
+                try:
+                    while st.session_state.webcam_active:
+                        # publish at the display rate; frames captured meanwhile are dropped by the pipeline
+                        publisher.wait()
+                        if pipeline.error is not None:
+                            # already logged with its traceback by the pipeline
+                            st.error(f"Live detection stopped: {pipeline.error}")
+                            st.session_state.webcam_active = False
+                            break
+                        packet = pipeline.next_frame(timeout=1.0)
+                        if packet is None:
+                            if not pipeline.running and pipeline.error is None:
+                                st.error("Failed to read from webcam.")
+                                break
+                            continue
 
-                    # show frame in center column - let CSS + max-width control the size
-                    with middle:
-                        video_placeholder.image(
-                            frame_rgb,
-                            channels="RGB",
-                            width='stretch',  # let CSS + max-width control the size
-                        )
-
-                    if last_emotion:
-                        color = EMOTION_COLORS.get(last_emotion, "#6366f1")
-                        emoji = EMOTION_EMOJIS.get(last_emotion, "😊")
-                        desc = EMOTION_DESCRIPTIONS.get(last_emotion, "")
-                        emotion_placeholder.markdown(
-                            f"""
-                                <div class="result-card">
-                                <div class="result-emoji">{emoji}</div>
-                                <div class="result-label" style="color:{color};">{last_emotion}</div>
-                                <div class="result-confidence">Confidence: {last_conf:.1%}</div>
-                                <div class="result-desc">{desc}</div>
-                                </div>
-                                """,
-                            unsafe_allow_html=True,
-                        )
-                        confidence_placeholder.progress(last_conf)
-                    else:
-                        emotion_placeholder.info("Align your face with the camera.")
-                        confidence_placeholder.empty()
+                        result = pipeline.latest_result()
+                        faces = result.result if result else []
+
+                        # draw overlay on the display-sized frame and send it pre-encoded
+                        frame_bgr, scale = publisher.prepare(packet.frame)
+                        for face in faces:
+                            draw_face_overlay(frame_bgr, scale_box(face.box, scale), face.prediction, channels="BGR")
 
-                    frame_count += 1
-                    time.sleep(0.03)
+                        # show frame in center column - let CSS + max-width control the size
+                        with middle:
+                            video_placeholder.image(
+                                publisher.encode(frame_bgr),
+                                width='stretch',  # let CSS + max-width control the size
+                            )
 
+                        # the summary card follows the largest classified face (smoothed per track)
+                        main = main_face(faces)
+                        # only send the card when what it shows changes
+                        card = (main.prediction.emotion, round(main.prediction.confidence, 3)) if main else None
+                        if card != shown_card:
+                            if main:
+                                emotion = main.prediction.emotion
+                                conf = main.prediction.confidence
+                                color = EMOTION_COLORS.get(emotion, "#6366f1")
+                                emoji = EMOTION_EMOJIS.get(emotion, "😊")
+                                desc = EMOTION_DESCRIPTIONS.get(emotion, "")
+                                emotion_placeholder.markdown(
+                                    f"""
+                                        <div class="result-card">
+                                        <div class="result-emoji">{emoji}</div>
+                                        <div class="result-label" style="color:{color};">{emotion}</div>
+                                        <div class="result-confidence">Confidence: {conf:.1%}</div>
+                                        <div class="result-desc">{desc}</div>
+                                        </div>
+                                        """,
+                                    unsafe_allow_html=True,
+                                )
+                                confidence_placeholder.progress(conf)
+                            else:
+                                emotion_placeholder.info("Align your face with the camera.")
+                                confidence_placeholder.empty()
+                            shown_card = card
+
+                        rendered += 1
+                        if rendered % 15 == 0:
+                            stats = pipeline.stats()
+                            latency = stats["latency_p50_ms"]
+                            caption = (
+                                f"Capture {stats['capture_fps']:.0f} fps · "
+                                f"Inference {stats['inference_fps']:.0f} fps · "
+                                f"Frame-to-label "
+                                + (f"{latency:.0f} ms" if latency is not None else "n/a")
+                                + f" · Model calls {analyzer.model_calls_per_minute:.0f}/min"
+                            )
+                            if scheduler is not None:
+                                caption += (
+                                    f" · Classify every {scheduler.classify_every} · "
+                                    f"Detect every {scheduler.detect_every} frames"
+                                )
+                            stats_placeholder.caption(caption + f" · {publisher.summary()}" + predictor_caption())
+                finally:
+                    pipeline.stop()
+                    if scheduler is not None:
+                        logger.info("live scheduler report: %s", json.dumps(scheduler.report()))
                 cap.release()
         else:
             st.info("Press **Start live detection** to activate the webcam.")
@@ -1168,42 +1354,59 @@ def main():
             unsafe_allow_html=True,
         )
 
-        file = st.file_uploader("Upload an image", type=["jpg", "jpeg", "png"])
-        if file is not None:
-            image = Image.open(file).convert("RGB")
-
-            faces, arr = detect_face_pil(image)
+        file = st.file_uploader(
+            "Upload an image or a video", type=["jpg", "jpeg", "png"] + [ext[1:] for ext in VIDEO_EXTENSIONS]
+        )
+        if file is not None and file.name.lower().endswith(VIDEO_EXTENSIONS):
+            sample_fps = st.slider("Frames analyzed per second of video", 1.0, 10.0, VIDEO_SAMPLE_FPS, step=1.0)
+            if st.button("🎞️ Analyze video", width="stretch") or st.session_state.get("video_key") == (
+                file.file_id, sample_fps
+            ):
+                st.session_state.video_key = (file.file_id, sample_fps)
+                show_video_timeline(analyze_video_upload(engine, file, sample_fps))
+        elif file is not None:
+            data = file.getvalue()
+            # detections come from the shared content-addressed cache on every rerun
+            key, entry = analyze_upload(engine, data)
+            faces = entry["faces"]
             if len(faces) == 0:
                 st.error("No face detected. Try another image with a clear frontal face.")
             else:
-                # show faces overlay
-                img_draw = arr.copy()
-                for (x, y, w, h) in faces:
-                    cv2.rectangle(img_draw, (x, y), (x + w, y + h), (99, 102, 241), 2)
-
                 # Horizontal layout - side by side images (minimal gap)
                 spacer, col_left, col_right, spacer1 = st.columns([1, 1, 1, 1]) 
                 
                 with col_left:
                     st.markdown('<div style="text-align: center;">', unsafe_allow_html=True)
                     st.markdown("**Input image**")
-                    st.image(image, width=350)
+                    st.image(data, width=350)
                     st.markdown("</div>", unsafe_allow_html=True)
 
                 with col_right:
                     st.markdown('<div style="text-align: center;">', unsafe_allow_html=True)
                     st.markdown("**Detected face(s)**")
-                    st.image(img_draw, width=350)
+                    st.image(entry["overlay"], width=350)
                     st.markdown("</div>", unsafe_allow_html=True)
 
                 # Center the analyze button
                 col_btn_left, col_btn_center, col_btn_right = st.columns([1, 2, 1])
                 with col_btn_center:
                     if st.button("🔮 Analyze emotion", width='stretch'):
-                        x, y, w, h = faces[0]
-                        face_roi = image.crop((x, y, x + w, y + h))
-                        emotion, conf, all_preds = predict_emotion(model, face_roi)
-                        show_prediction_result(emotion, conf, all_preds)
+                        # every detected face is classified in one batch, once per image and model
+                        probabilities = classify_upload(engine, key, entry, data)
+                        predictions = [decode_prediction(p) for p in probabilities]
+                        if len(predictions) == 1:
+                            show_prediction_result(*predictions[0])
+                        else:
+                            face_tabs = st.tabs([f"Face {i + 1}" for i in range(len(predictions))])
+                            for face_tab, prediction in zip(face_tabs, predictions):
+                                with face_tab:
+                                    show_prediction_result(*prediction)
+
+            stats = get_prediction_cache().stats()
+            st.caption(
+                f"Analysis cache: {stats['hits']} hits · {stats['misses']} misses · "
+                f"{stats['entries']} images" + predictor_caption()
+            )
 
     # ── Reference chips ───────────────────────────────────────
     st.markdown("---")